@@ -1,7 +1,9 @@
 # api/admin.py
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis
+from django.db.models import Q
+from .models import CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, AuditEvent
+from . import search
 
 # Define an inline admin descriptor for Doctor model
 # which acts a bit like a singleton
@@ -30,15 +32,36 @@ admin.site.register(CustomUser, CustomUserAdmin)
 # We no longer need a separate admin for Doctor
 # admin.site.register(Doctor) 
 
-admin.site.register(Patient)
+# Admin search through the FTS5 index (api/search.py) instead of icontains scans
+class FullTextSearchMixin:
+    search_kind = None
+    # Also match rows whose patient's name or condition matches
+    search_patients = True
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search.match_expression(search_term):
+            return super().get_search_results(request, queryset, search_term)
+        matches = Q(id__in=search.matching_ids(search_term, self.search_kind))
+        if self.search_patients:
+            matches |= Q(patient_id__in=search.matching_ids(search_term, 'patient'))
+        return queryset.filter(matches), False
+
+@admin.register(Patient)
+class PatientAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_fields = ('name', 'condition')
+    search_kind = 'patient'
+    search_patients = False
+
 admin.site.register(Bed)
 admin.site.register(Appointment)
 
 @admin.register(Medicine)
-class MedicineAdmin(admin.ModelAdmin):
+class MedicineAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('medicine_name', 'patient', 'dosage', 'frequency_display', 'relation_to_food', 'no_of_days', 'created_at')
     list_filter = ('relation_to_food', 'created_at')
     search_fields = ('medicine_name', 'patient__name')
+    readonly_fields = ('frequency_mask',)
+    search_kind = 'medicine'
     ordering = ('-created_at',)
     date_hierarchy = 'created_at'
     
@@ -51,13 +74,31 @@ class MedicineAdmin(admin.ModelAdmin):
     frequency_display.short_description = 'Frequency'
 
 @admin.register(Diagnosis)
-class DiagnosisAdmin(admin.ModelAdmin):
+class DiagnosisAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('patient', 'diagnosis_preview', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('diagnosis', 'patient__name')
+    search_kind = 'diagnosis'
     ordering = ('-created_at',)
     date_hierarchy = 'created_at'
     
     def diagnosis_preview(self, obj):
         return obj.diagnosis[:50] + '...' if len(obj.diagnosis) > 50 else obj.diagnosis
-    diagnosis_preview.short_description = 'Diagnosis Preview'
\ No newline at end of file
+    diagnosis_preview.short_description = 'Diagnosis Preview'
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = ('timestamp', 'action', 'model', 'object_id')
+    list_filter = ('action', 'model')
+    ordering = ('-timestamp',)
+    date_hierarchy = 'timestamp'
+
+    # The audit trail is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
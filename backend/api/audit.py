@@ -0,0 +1,134 @@
+# api/audit.py
+"""
+Structured audit log.
+
+Signal receivers call record() with plain field values they already hold
+(ids, not related objects), so recording never triggers a query. Events are
+queued once the surrounding transaction commits and a background thread
+writes them to the AuditEvent table in batches.
+
+With AUDIT_LOG_ASYNC = False events are written straight away on commit,
+in the calling thread (used by the tests).
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_writer = None
+_writer_pid = None
+_lock = threading.Lock()
+dropped = 0
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def record(action, model, object_id, **data):
+    """Queue an audit event for `model` row `object_id` after commit."""
+    event = (timezone.now(), action, model, object_id, data)
+    transaction.on_commit(lambda: _enqueue(event))
+
+
+def record_many(action, model, rows):
+    """
+    record() for a batch: `rows` are (object_id, data) pairs, queued with one
+    commit hook. A batch of at least AUDIT_LOG_BATCH_SIZE events is written
+    on commit in the calling thread instead: it is one INSERT either way, and
+    bulk writes and imports would otherwise overflow the queue.
+    """
+    timestamp = timezone.now()
+    events = [(timestamp, action, model, object_id, data) for object_id, data in rows]
+    if len(events) >= _setting('AUDIT_LOG_BATCH_SIZE', 200):
+        transaction.on_commit(lambda: _write(events))
+    elif events:
+        transaction.on_commit(lambda: _enqueue(*events))
+
+
+def _enqueue(*events):
+    global dropped
+    if not _setting('AUDIT_LOG_ASYNC', True):
+        _write(events)
+        return
+    _ensure_writer()
+    for event in events:
+        try:
+            _queue.put_nowait(event)
+        except queue.Full:
+            # Never block a request on the audit log
+            dropped += 1
+            if dropped % 1000 == 1:
+                logger.warning("Audit queue full, %d event(s) dropped so far", dropped)
+
+
+def _write(events):
+    from .models import AuditEvent
+    AuditEvent.objects.bulk_create([
+        AuditEvent(timestamp=ts, action=action, model=model, object_id=object_id, data=data)
+        for ts, action, model, object_id, data in events
+    ])
+
+
+def _ensure_writer():
+    global _queue, _writer, _writer_pid
+    with _lock:
+        # Restart after a fork: threads do not survive into gunicorn workers
+        if _writer is not None and _writer_pid == os.getpid() and _writer.is_alive():
+            return
+        _queue = queue.Queue(maxsize=_setting('AUDIT_LOG_QUEUE_SIZE', 10000))
+        _writer_pid = os.getpid()
+        _writer = threading.Thread(target=_run_writer, name='audit-writer', daemon=True)
+        _writer.start()
+
+
+def _drain(limit):
+    batch = []
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run_writer():
+    batch_size = _setting('AUDIT_LOG_BATCH_SIZE', 200)
+    interval = _setting('AUDIT_LOG_FLUSH_INTERVAL', 1.0)
+    while True:
+        try:
+            first = _queue.get(timeout=interval)
+        except queue.Empty:
+            continue
+        # Give a burst a moment to accumulate, then write it in one INSERT
+        time.sleep(min(interval, 0.05))
+        batch = [first] + _drain(batch_size - 1)
+        try:
+            _write(batch)
+        except Exception:
+            logger.exception("Failed to write %d audit event(s)", len(batch))
+        finally:
+            close_old_connections()
+
+
+def flush():
+    """Write everything still queued in this process, in the calling thread."""
+    if _queue is None or _writer_pid != os.getpid():
+        return
+    while True:
+        batch = _drain(_setting('AUDIT_LOG_BATCH_SIZE', 200))
+        if not batch:
+            return
+        _write(batch)
+
+
+atexit.register(flush)
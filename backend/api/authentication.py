@@ -1,8 +1,116 @@
 # accounts/authentication.py
 
+import threading
+import time
+from collections import OrderedDict
+
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
 from django.conf import settings
 
+
+class UserCache:
+    """
+    Bounded in-process LRU of full CustomUser rows, by id. Every request's
+    user comes from here, so a cold entry costs one query. Entries expire
+    after JWT_USER_CACHE_TIMEOUT seconds, which bounds how long another
+    worker process can serve a user that was changed elsewhere; in this
+    process the CustomUser signals reload an entry when the user is saved.
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _size(self):
+        return getattr(settings, 'JWT_USER_CACHE_SIZE', 1024)
+
+    def _timeout(self):
+        return getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 300)
+
+    def peek(self, user_id):
+        """The cached user, or None; never queries"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, stored_at = entry
+            if time.monotonic() - stored_at > self._timeout():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def get(self, user_id):
+        """The full user, loaded once and then served from the cache (None if it does not exist)"""
+        user = self.peek(user_id)
+        if user is None:
+            from .models import CustomUser
+            user = CustomUser.objects.filter(pk=user_id).first()
+            if user is not None:
+                self.put(user)
+        return user
+
+    def put(self, user):
+        with self._lock:
+            self._users[user.pk] = (user, time.monotonic())
+            self._users.move_to_end(user.pk)
+            while len(self._users) > self._size():
+                self._users.popitem(last=False)
+
+    def reload(self, user_id):
+        self.invalidate(user_id)
+        return self.get(user_id)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user built from the access token claims set by
+    MyTokenObtainPairSerializer (username, name). The role and any other
+    attribute (email, doctor_profile, ...) are read from the full user in
+    user_cache, so a role change applies to tokens already issued.
+    """
+
+    @property
+    def full_user(self):
+        user = user_cache.get(self.id)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        return user
+
+    @property
+    def role(self):
+        return self.full_user.role
+
+    def get_full_name(self):
+        return self.token.get('name', '')
+
+    def __str__(self):
+        return self.username
+
+    def __getattr__(self, name):
+        # Only called for attributes TokenUser does not define: claims first,
+        # then the full user
+        if name.startswith('_') or name == 'token':
+            raise AttributeError(name)
+        if name in self.token:
+            return self.token[name]
+        return getattr(self.full_user, name)
+
+
 class CustomJWTAuthentication(JWTAuthentication):
     """
     Custom authentication class to extract JWT from either Authorization header or HttpOnly cookie.
@@ -18,7 +126,7 @@ class CustomJWTAuthentication(JWTAuthentication):
 
         # If no header token, try to get from cookie
         raw_token = request.COOKIES.get(settings.SIMPLE_JWT.get('AUTH_COOKIE', 'access_token'))
-        
+
         if raw_token is None:
             return None
 
@@ -26,4 +134,25 @@ class CustomJWTAuthentication(JWTAuthentication):
         validated_token = self.get_validated_token(raw_token)
 
         # Return the user and validated token
-        return self.get_user(validated_token), validated_token
\ No newline at end of file
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        """
+        The user of the token, from user_cache: one query when the entry is
+        cold, none when it is warm. Deactivated users are refused even with a
+        token that has not expired. Tokens carrying claims get a ClaimsUser;
+        older tokens the full user.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed('Token contained no recognizable user identification', code='token_not_valid')
+
+        user = user_cache.get(user_id)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if 'role' in validated_token:
+            return ClaimsUser(validated_token)
+        return user
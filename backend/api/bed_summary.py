@@ -0,0 +1,85 @@
+# api/bed_summary.py
+"""
+Per-ward bed occupancy counts kept in the WardOccupancy table.
+
+Every Bed write adjusts its ward's row with an atomic UPDATE in the same
+transaction (the Bed receivers in api/signals.py, and the set-based writers
+that bypass them), so the counts are shared by all worker processes, commit
+or roll back with the beds, and never need rebuilding on a timer. Reading
+the summary is one query over O(wards) rows, regardless of how many beds
+exist.
+
+rebuild() recounts from the Bed table, for writers that change too many
+beds to track one by one; the migration seeds the table with it. Call it
+after the writes it covers, in the same transaction: SQLite holds the write
+lock from the first write to the commit, so no other writer's delta can
+land between the recount and the commit, and no delta of the caller's is
+applied twice.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Bed, WardOccupancy
+
+
+def _wards():
+    return [ward for ward, _ in Bed.WARD_CHOICES]
+
+
+def rebuild():
+    """Recompute the counters from the database and store them."""
+    counts = {ward: {'total': 0, 'occupied': 0} for ward in _wards()}
+    # One transaction, so no Bed write commits between the count and the store
+    with transaction.atomic():
+        rows = (
+            Bed.objects.values('ward')
+            .annotate(total=Count('id'), occupied=Count('id', filter=Q(is_occupied=True)))
+            .order_by()
+        )
+        for row in rows:
+            if row['ward'] in counts:
+                counts[row['ward']] = {'total': row['total'], 'occupied': row['occupied']}
+        WardOccupancy.objects.bulk_create(
+            [WardOccupancy(ward=ward, **count) for ward, count in counts.items()],
+            update_conflicts=True, unique_fields=['ward'], update_fields=['total', 'occupied'],
+        )
+    return counts
+
+
+def get_summary():
+    """Return total/occupied/free per ward"""
+    counts = dict(
+        (ward, (total, occupied))
+        for ward, total, occupied in WardOccupancy.objects.values_list('ward', 'total', 'occupied')
+    )
+    summary = []
+    for ward in _wards():
+        total, occupied = counts.get(ward, (0, 0))
+        summary.append({'ward': ward, 'total': total, 'occupied': occupied, 'free': total - occupied})
+    return summary
+
+
+def apply_delta(ward, total=0, occupied=0):
+    """
+    Adjust a ward's counters inside the current transaction, so a rolled
+    back save never leaks into the summary.
+    """
+    if ward not in _wards() or not (total or occupied):
+        return
+    changes = {'total': F('total') + total, 'occupied': F('occupied') + occupied}
+    if not WardOccupancy.objects.filter(ward=ward).update(**changes):
+        WardOccupancy.objects.bulk_create([WardOccupancy(ward=ward)], ignore_conflicts=True)
+        WardOccupancy.objects.filter(ward=ward).update(**changes)
+
+
+def apply_deltas(changes):
+    """
+    apply_delta() for a batch of (ward, total, occupied) changes, summed per
+    ward first, so a set-based write costs at most one UPDATE per ward.
+    """
+    totals = {}
+    for ward, total, occupied in changes:
+        previous = totals.get(ward, (0, 0))
+        totals[ward] = (previous[0] + total, previous[1] + occupied)
+    for ward, (total, occupied) in totals.items():
+        apply_delta(ward, total=total, occupied=occupied)
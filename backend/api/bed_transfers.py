@@ -0,0 +1,133 @@
+# api/bed_transfers.py
+"""
+Moving patients between beds in one transaction with set-based UPDATEs.
+
+A transfer through PatientViewSet costs a re-read of the patient, two Bed
+saves and their receivers for every patient. Here any number of moves is a
+fixed handful of statements, and the "bed is free" check is part of the
+UPDATE itself, so two receptionists cannot both fill the same bed.
+
+Queryset.update() skips the model signals and auto_now, so the per-ward bed
+summary, the model version counters, the audit log and updated_at are
+updated here, once per batch. The change log behind the change feeds and
+live events (api/changes.py, api/live.py) is kept by database triggers.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Case, When, Value
+
+from .models import Bed, Patient
+from . import audit, bed_summary, versions
+
+
+class BedTransferError(Exception):
+    """A transfer batch was rejected; nothing was changed."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def transfer_patients(moves):
+    """
+    Apply {patient_id: bed_id or None} atomically. None discharges the patient
+    from their bed. Returns a list of {'patient', 'from_bed', 'to_bed'}.
+    """
+    if not moves:
+        raise BedTransferError("No transfers given")
+
+    targets = [bed_id for bed_id in moves.values() if bed_id is not None]
+    duplicates = [bed_id for bed_id, count in Counter(targets).items() if count > 1]
+    if duplicates:
+        raise BedTransferError(f"Beds assigned to more than one patient: {duplicates}")
+
+    with transaction.atomic():
+        patients = {
+            row['id']: row
+            for row in Patient.objects.select_for_update()
+            .filter(id__in=moves.keys())
+            .values('id', 'assigned_bed_id', 'assigned_bed__ward')
+        }
+        missing = sorted(set(moves) - set(patients))
+        if missing:
+            raise BedTransferError(f"Patients not found: {missing}", status=404)
+
+        target_beds = {
+            row['id']: row
+            for row in Bed.objects.select_for_update().filter(id__in=targets).values('id', 'ward')
+        }
+        missing = sorted(set(targets) - set(target_beds))
+        if missing:
+            raise BedTransferError(f"Beds not found: {missing}", status=404)
+
+        old_beds = [row['assigned_bed_id'] for row in patients.values() if row['assigned_bed_id']]
+        now = datetime.now()
+
+        # Clear first so swaps never trip the unique constraint on assigned_bed
+        Patient.objects.filter(id__in=moves.keys()).update(assigned_bed=None, updated_at=now)
+        Bed.objects.filter(id__in=old_beds).update(is_occupied=False, updated_at=now)
+
+        # Only beds that are free now may be filled; a bed held by anyone
+        # outside this batch makes the row count come up short
+        filled = Bed.objects.filter(id__in=targets, is_occupied=False).update(is_occupied=True, updated_at=now)
+        if filled != len(targets):
+            raise BedTransferError("One or more target beds are already occupied", status=409)
+        # A bed flagged free can still be held by a patient when the flag
+        # drifted; without this the update below fails on the unique bed
+        if targets and Patient.objects.filter(assigned_bed__in=targets).exclude(id__in=moves.keys()).exists():
+            raise BedTransferError("One or more target beds are already occupied", status=409)
+
+        if targets:
+            Patient.objects.filter(id__in=[pid for pid, bed_id in moves.items() if bed_id is not None]).update(
+                assigned_bed=Case(
+                    *[When(id=pid, then=Value(bed_id)) for pid, bed_id in moves.items() if bed_id is not None]
+                ),
+                updated_at=now,
+            )
+
+        # Signals were bypassed: bump the versions and apply the ward counters once for the batch
+        versions.bump('Patient', 'Bed')
+        bed_summary.apply_deltas(
+            [(row['assigned_bed__ward'], 0, -1) for row in patients.values() if row['assigned_bed_id']]
+            + [(bed['ward'], 0, 1) for bed in target_beds.values()]
+        )
+
+        results = [
+            {'patient': pid, 'from_bed': patients[pid]['assigned_bed_id'], 'to_bed': bed_id}
+            for pid, bed_id in moves.items()
+        ]
+        for result in results:
+            audit.record('update', 'Patient', result['patient'], bed=result['to_bed'],
+                         from_bed=result['from_bed'], transfer=True)
+
+    return results
+
+
+def transfer_ward(from_ward, to_ward):
+    """
+    Move every patient in from_ward into the free beds of to_ward, in bed
+    number order, in one transaction.
+    """
+    with transaction.atomic():
+        patient_ids = list(
+            Patient.objects.select_for_update()
+            .filter(assigned_bed__ward=from_ward)
+            .order_by('assigned_bed__bed_number')
+            .values_list('id', flat=True)
+        )
+        if not patient_ids:
+            return []
+        free_beds = list(
+            Bed.objects.select_for_update()
+            .filter(ward=to_ward, is_occupied=False)
+            .order_by('bed_number')
+            .values_list('id', flat=True)[:len(patient_ids)]
+        )
+        if len(free_beds) < len(patient_ids):
+            raise BedTransferError(
+                f"{to_ward} has {len(free_beds)} free bed(s) for {len(patient_ids)} patient(s) in {from_ward}",
+                status=409,
+            )
+        return transfer_patients(dict(zip(patient_ids, free_beds)))
@@ -0,0 +1,333 @@
+# api/benchmarks.py
+"""
+Endpoint latency, query-count and memory benchmarks, run by the
+EndpointBenchmarkTests in api/tests.py when RUN_BENCHMARKS=1 is set:
+
+    RUN_BENCHMARKS=1 python manage.py test api --tag benchmark
+
+Every route in api/urls.py (list, detail and create for the ViewSets, their
+extra actions, the PDF, export, import, search and availability views) is
+requested through the DRF test client against synthetic datasets
+(api/synthetic.py) of increasing size. Each route gets one untimed warm-up
+request, `repeat` timed requests for the median and p95 latency, and one more
+under tracemalloc and CaptureQueriesContext for its peak Python memory and
+SQL query count. Streaming responses are read to the end inside the timing.
+
+Lists are requested a page at a time (?page_size=50), as the frontend pages
+them. /api/live/ is left out: it is a long-lived Server-Sent Events stream
+with no latency to speak of.
+
+Results are plain dicts, {scale: {'dataset': counts, 'routes': {route: stats}}},
+written as JSON so runs can be compared with compare().
+"""
+import io
+import json
+import math
+import os
+import statistics
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .models import CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, AuditEvent
+from .serializers import MyTokenObtainPairSerializer
+from .synthetic import LAST_NAMES, Generator
+
+PAGE = {'page_size': 50}
+# Ids sampled per model for the detail routes
+SAMPLE_SIZE = 100
+
+
+def dataset(patients):
+    """Generator counts for a dataset of `patients` patients"""
+    return {
+        'doctors': max(patients // 50, 2),
+        'beds': max(patients // 5, 10),
+        'patients': patients,
+        'appointments': patients * 10,
+        'medicines': patients * 2,
+        'diagnoses': patients,
+    }
+
+
+class Context:
+    """What the route builders draw on: sampled ids, users and a unique tag per dataset size"""
+
+    def __init__(self, tag, users):
+        self.tag = tag
+        self.users = users
+        self.ids = {model.__name__: self._sample(model) for model in (
+            Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, AuditEvent,
+        )}
+        self.doctor_masks = dict(Doctor.objects.filter(id__in=self.ids['Doctor']).values_list('id', 'availability_mask'))
+
+    @staticmethod
+    def _sample(model):
+        step = model.objects.count() // SAMPLE_SIZE + 1
+        return [pk for index, pk in enumerate(model.objects.order_by('id').values_list('id', flat=True).iterator())
+                if index % step == 0]
+
+    def pick(self, model, i):
+        ids = self.ids[model]
+        return ids[(i * 37) % len(ids)]
+
+    def working_day(self, doctor_id):
+        """The doctor's first working day after today"""
+        mask = self.doctor_masks[doctor_id] or 0b1111111
+        day = date.today() + timedelta(days=1)
+        while not mask & (1 << day.weekday()):
+            day += timedelta(days=1)
+        return day
+
+    def transfer(self, i):
+        """Move an admitted patient to a free bed"""
+        beds = Bed.objects.filter(is_occupied=False).order_by('id').values_list('id', flat=True)
+        patients = Patient.objects.filter(assigned_bed__isnull=False).order_by('id').values_list('id', flat=True)
+        return {'patient': patients[i % patients.count()], 'bed': beds[i % beds.count()]}
+
+
+def _csv(header, rows):
+    upload = io.BytesIO('\n'.join([header] + rows).encode())
+    upload.name = 'import.csv'
+    return upload
+
+
+def _appointment(context, i):
+    doctor = context.pick('Doctor', i)
+    return {
+        'patient': context.pick('Patient', i), 'doctor': doctor,
+        'appointment_date': context.working_day(doctor).isoformat(), 'appointment_time': '10:30',
+    }
+
+
+def _patient(context, i, j=0):
+    return {
+        'name': f'Bench {context.tag} {i} {j}', 'age': 40, 'gender': 'Female', 'contact': '555-0400',
+        'assigned_doctor': context.pick('Doctor', i),
+    }
+
+
+# (name, role, method, path, data); path and data may be callables of (context, i)
+ROUTES = (
+    ('token', 'doctor', 'post', '/api/token/',
+     lambda c, i: {'username': c.users['doctor'].username, 'password': 'password123'}),
+    ('user-info', 'doctor', 'get', '/api/user-info/', None),
+    ('debug-data', 'admin', 'get', '/api/debug-data/', None),
+    ('doctor-availability', 'receptionist', 'get', '/api/doctor-availability/',
+     lambda c, i: {'doctor_id': c.pick('Doctor', i), 'date': date.today().isoformat()}),
+    ('doctor-free-slots', 'receptionist', 'get', '/api/doctor-availability/slots/',
+     lambda c, i: {'start': date.today().isoformat(), 'end': (date.today() + timedelta(days=6)).isoformat()}),
+    ('search', 'receptionist', 'get', '/api/search/', lambda c, i: {'q': LAST_NAMES[i % len(LAST_NAMES)]}),
+    ('import-beds', 'receptionist', 'post', '/api/imports/beds/',
+     lambda c, i: {'file': _csv('bed_number,ward', [f'i{c.tag}-{i}-{j},Ward B' for j in range(20)])}),
+    ('import-patients', 'receptionist', 'post', '/api/imports/patients/', lambda c, i: {'file': _csv(
+        'name,age,gender,contact', [f'Imported {c.tag} {i} {j},50,Male,555-0500' for j in range(20)]
+    )}),
+    ('export-patients', 'receptionist', 'get', '/api/exports/patients/', None),
+    ('export-appointments', 'receptionist', 'get', '/api/exports/appointments/',
+     lambda c, i: {'start': date.today().isoformat()}),
+    ('export-prescriptions', 'receptionist', 'get', '/api/exports/prescriptions/', None),
+    ('medication-round', 'receptionist', 'get', '/api/medication-rounds/', {'ward': 'Ward A'}),
+    ('receptionist-dashboard', 'receptionist', 'get', '/api/dashboard/receptionist/', None),
+    ('patient-report-pdf', 'doctor', 'get', lambda c, i: f"/api/patient-report-pdf/{c.pick('Patient', i)}/", None),
+    ('patient-report-bundle', 'receptionist', 'get', '/api/patient-reports/export/',
+     lambda c, i: {'patients': ','.join(str(c.pick('Patient', i + j)) for j in range(3))}),
+    ('test-pdf', 'doctor', 'get', '/api/test-pdf/', None),
+    ('api-root', 'receptionist', 'get', '/api/', None),
+
+    ('doctor-list', 'receptionist', 'get', '/api/doctors/', PAGE),
+    ('doctor-detail', 'receptionist', 'get', lambda c, i: f"/api/doctors/{c.pick('Doctor', i)}/", None),
+    ('patient-list', 'receptionist', 'get', '/api/patients/', PAGE),
+    ('patient-list-doctor', 'doctor', 'get', '/api/patients/', PAGE),
+    ('patient-feed', 'receptionist', 'get', '/api/patients/', {'since': '0', 'page_size': 100}),
+    ('patient-detail', 'receptionist', 'get', lambda c, i: f"/api/patients/{c.pick('Patient', i)}/", None),
+    ('patient-create', 'receptionist', 'post', '/api/patients/', _patient),
+    ('patient-bulk-create', 'receptionist', 'post', '/api/patients/bulk/',
+     lambda c, i: [_patient(c, i, j) for j in range(50)]),
+    ('bed-list', 'receptionist', 'get', '/api/beds/', PAGE),
+    ('bed-detail', 'receptionist', 'get', lambda c, i: f"/api/beds/{c.pick('Bed', i)}/", None),
+    ('bed-create', 'receptionist', 'post', '/api/beds/', lambda c, i: {'bed_number': f'c{c.tag}-{i}', 'ward': 'Ward C'}),
+    ('bed-bulk-create', 'receptionist', 'post', '/api/beds/bulk/',
+     lambda c, i: [{'bed_number': f'k{c.tag}-{i}-{j}', 'ward': 'Ward A'} for j in range(50)]),
+    ('bed-summary', 'doctor', 'get', '/api/beds/summary/', None),
+    ('bed-transfer', 'receptionist', 'post', '/api/beds/transfer/', lambda c, i: c.transfer(i)),
+    ('appointment-list', 'receptionist', 'get', '/api/appointments/', PAGE),
+    ('appointment-list-doctor', 'doctor', 'get', '/api/appointments/', PAGE),
+    ('appointment-detail', 'receptionist', 'get',
+     lambda c, i: f"/api/appointments/{c.pick('Appointment', i)}/", None),
+    ('appointment-create', 'receptionist', 'post', '/api/appointments/', _appointment),
+    ('medicine-list', 'receptionist', 'get', '/api/medicines/', PAGE),
+    ('medicine-detail', 'receptionist', 'get', lambda c, i: f"/api/medicines/{c.pick('Medicine', i)}/", None),
+    ('medicine-create', 'receptionist', 'post', '/api/medicines/', lambda c, i: {
+        'patient': c.pick('Patient', i), 'medicine_name': 'Paracetamol', 'dosage': '500mg',
+        'frequency': 'Breakfast,Dinner', 'relation_to_food': 'After', 'no_of_days': 5,
+    }),
+    ('medicine-bulk-create', 'receptionist', 'post', '/api/medicines/bulk/', lambda c, i: [{
+        'patient': c.pick('Patient', i + j), 'medicine_name': 'Amoxicillin', 'dosage': '250mg',
+        'frequency': 'Lunch', 'relation_to_food': 'With', 'no_of_days': 7,
+    } for j in range(50)]),
+    ('diagnosis-list', 'receptionist', 'get', '/api/diagnoses/', PAGE),
+    ('diagnosis-detail', 'receptionist', 'get', lambda c, i: f"/api/diagnoses/{c.pick('Diagnosis', i)}/", None),
+    ('diagnosis-create', 'doctor', 'post', '/api/diagnoses/',
+     lambda c, i: {'patient': c.pick('Patient', i), 'diagnosis': 'Benchmark review'}),
+    ('audit-event-list', 'admin', 'get', '/api/audit-events/', PAGE),
+    ('audit-event-detail', 'admin', 'get', lambda c, i: f"/api/audit-events/{c.pick('AuditEvent', i)}/", None),
+)
+
+
+def _resolve(value, context, i):
+    return value(context, i) if callable(value) else value
+
+
+def _client(user):
+    client = APIClient()
+    token = MyTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def _request(client, method, path, data):
+    if method == 'get':
+        started = time.perf_counter()
+        response = client.get(path, data)
+    else:
+        multipart = isinstance(data, dict) and any(hasattr(value, 'read') for value in data.values())
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data, format='multipart' if multipart else 'json')
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    elapsed = time.perf_counter() - started
+    response.close()
+    return response, elapsed
+
+
+def _stats(url_name, timings, queries, peak, status):
+    timings = sorted(timings)
+    return {
+        'url_name': url_name,
+        'status': status,
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        # Nearest rank, so one stray slow request out of 20 is not the p95
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1] * 1000, 2),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def measure(clients, context, route, repeat):
+    """Stats for one route: warm-up, `repeat` timed requests, then one measured for queries and memory"""
+    name, role, method, path, data = route
+    client = clients[role]
+    timings, statuses = [], set()
+    for i in range(repeat + 1):
+        # Built right before sending: some depend on what the previous request changed
+        response, elapsed = _request(client, method, _resolve(path, context, i), _resolve(data, context, i))
+        statuses.add(response.status_code)
+        if i:
+            timings.append(elapsed)
+
+    url, payload = _resolve(path, context, repeat + 1), _resolve(data, context, repeat + 1)
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = _request(client, method, url, payload)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    statuses.add(response.status_code)
+    return _stats(response.resolver_match.url_name, timings, len(queries), peak, max(statuses))
+
+
+def prepare_users():
+    """Staff users for the staff routes; the doctor routes use the first generated doctor"""
+    users = {}
+    for role in ('admin', 'receptionist'):
+        users[role], _ = CustomUser.objects.get_or_create(
+            username=f'bench_{role}', defaults={'role': role, 'first_name': 'Bench', 'last_name': role.title()},
+        )
+    users['doctor'] = CustomUser.objects.filter(role='doctor', doctor_profile__isnull=False).order_by('id').first()
+    return users
+
+
+def _audit_sample():
+    # Generated rows are not audited; give the audit routes something to read
+    now = datetime.now()
+    AuditEvent.objects.bulk_create([
+        AuditEvent(timestamp=now, action='update', model='Patient', object_id=pk, data={'benchmark': True})
+        for pk in Patient.objects.order_by('id').values_list('id', flat=True)[:SAMPLE_SIZE]
+    ])
+
+
+def run(sizes, repeat=10, seed=0, log=None):
+    """
+    Grow the dataset through `sizes` (patient counts) and benchmark every
+    route at each size. Returns {str(size): {'dataset': counts, 'routes': {name: stats}}}.
+    """
+    log = log or (lambda message: None)
+    results, previous = {}, {key: 0 for key in dataset(0)}
+    for step, size in enumerate(sorted(sizes)):
+        counts = dataset(size)
+        Generator(seed=seed + step, prefix=f'b{step}').generate(
+            **{key: counts[key] - previous[key] for key in counts}
+        )
+        previous = counts
+        _audit_sample()
+        users = prepare_users()
+        clients = {role: _client(user) for role, user in users.items()}
+        context = Context(str(step), users)
+        routes = {}
+        for route in ROUTES:
+            routes[route[0]] = measure(clients, context, route, repeat)
+            log(f"{size} patients  {route[0]:<26} {routes[route[0]]}")
+        results[str(size)] = {'dataset': counts, 'routes': routes}
+    return results
+
+
+def compare(results, baseline, tolerance, latency_floor_ms, memory_floor_kb):
+    """
+    Regressions of `results` against `baseline`, as readable lines, split into
+    (queries, timings). A route regresses on queries when it issues more than
+    before. It regresses on timings when its p95 and median latency both grow
+    by more than `tolerance` (a fraction) and the p95 by more than the floor,
+    or when its peak memory grows by more than `tolerance` and the floor.
+    Requiring the median as well keeps a few stray slow requests from being
+    flagged. Routes or sizes missing from the baseline are not compared.
+    """
+    queries, timings = [], []
+    for size, run_ in results.items():
+        recorded = baseline.get('results', {}).get(size, {}).get('routes', {})
+        for name, now in run_['routes'].items():
+            before = recorded.get(name)
+            if before is None:
+                continue
+            if now['queries'] > before['queries']:
+                queries.append(f"{size} patients, {name}: {now['queries']} queries (baseline {before['queries']})")
+            grew = {key: now[key] > before[key] * (1 + tolerance) for key in ('median_ms', 'p95_ms', 'peak_kb')}
+            if grew['p95_ms'] and grew['median_ms'] and now['p95_ms'] - before['p95_ms'] > latency_floor_ms:
+                timings.append(
+                    f"{size} patients, {name}: p95 {now['p95_ms']}ms, median {now['median_ms']}ms "
+                    f"(baseline {before['p95_ms']}ms, {before['median_ms']}ms)"
+                )
+            if grew['peak_kb'] and now['peak_kb'] - before['peak_kb'] > memory_floor_kb:
+                timings.append(f"{size} patients, {name}: peak {now['peak_kb']}KB (baseline {before['peak_kb']}KB)")
+    return queries, timings
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write(path, results, repeat):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'recorded_at': datetime.now().isoformat(timespec='seconds'), 'repeat': repeat, 'results': results},
+                  f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,315 @@
+# api/bulk.py
+"""
+Bulk create and update for the Patient, Bed and Medicine ViewSets.
+
+POST /api/<resource>/bulk/ with a list of objects creates them; PATCH with a
+list of objects that each carry an "id" partially updates them. The whole
+batch is validated by the ViewSet's serializer first. If any item fails, the
+response is 400 with the errors by item index and nothing is written.
+Otherwise all rows are written with bulk_create/bulk_update in one
+transaction.
+
+Validation costs no query per item: related ids are loaded with one query
+per relation, and unique fields are checked with one query per field.
+
+bulk_create and bulk_update skip save() and the model signals. This module
+therefore sets the derived fields (Medicine.frequency_mask, updated_at on
+update). It also applies the side effects of api/signals.py once per batch:
+bed occupancy and the ward summary, the version counters and the audit log.
+The change log behind the change feeds and live events is kept by database
+triggers (api/changes.py).
+"""
+import copy
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from .models import Bed, Patient, Medicine, frequency_mask
+from . import audit, bed_summary, versions
+
+
+class Prefetched:
+    """
+    Stands in for a related field's queryset during batch validation:
+    get(pk=...) answers from rows loaded for the whole batch up front.
+    """
+
+    def __init__(self, model, objects):
+        self.model = model
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            return self.objects[int(pk)]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+
+def _pk(value):
+    return getattr(value, 'pk', value)
+
+
+class BulkWriteMixin:
+    """Adds the /bulk/ action to a ViewSet whose model has writers in WRITERS"""
+
+    @action(detail=False, methods=['post', 'patch'])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Send a non-empty list of objects'}, status=400)
+        limit = getattr(settings, 'BULK_MAX_ITEMS', 500)
+        if len(items) > limit:
+            return Response({'error': f'At most {limit} objects per request'}, status=400)
+        if not all(isinstance(item, dict) for item in items):
+            return Response({'error': 'Every item must be an object'}, status=400)
+
+        partial = request.method == 'PATCH'
+        queryset = self.get_queryset()
+        create_rows, update_rows = WRITERS[queryset.model.__name__]
+
+        with transaction.atomic():
+            instances, errors = {}, {}
+            if partial:
+                instances, errors = self.bulk_instances(queryset, items)
+            validated, item_errors = self.validate_batch(items, instances, partial, skip=errors)
+            errors.update(item_errors)
+            if errors:
+                return Response(
+                    {'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)]},
+                    status=400,
+                )
+
+            if partial:
+                changes, fields = [], set()
+                for item, data in zip(items, validated):
+                    instance = instances[int(item['id'])]
+                    old = copy.copy(instance)
+                    for attr, value in data.items():
+                        setattr(instance, attr, value)
+                    changes.append((instance, old))
+                    fields.update(data)
+                update_rows(changes, fields)
+                ids = [instance.id for instance, _ in changes]
+            else:
+                objects = [queryset.model(**data) for data in validated]
+                create_rows(objects)
+                ids = [obj.id for obj in objects]
+
+        # Re-read through the ViewSet's queryset for its select_related
+        rows = queryset.in_bulk(ids)
+        data = self.get_serializer([rows[pk] for pk in ids], many=True).data
+        if partial:
+            return Response({'updated': len(ids), 'results': data})
+        return Response({'created': len(ids), 'results': data}, status=status.HTTP_201_CREATED)
+
+    def bulk_instances(self, queryset, items):
+        """The rows a PATCH batch updates, by id, scoped by the ViewSet; errors by index"""
+        errors, seen = {}, set()
+        for index, item in enumerate(items):
+            try:
+                pk = int(item['id'])
+            except (KeyError, TypeError, ValueError):
+                errors[index] = {'id': ['A numeric id is required.']}
+                continue
+            if pk in seen:
+                errors[index] = {'id': ['Appears more than once in the batch.']}
+            seen.add(pk)
+        instances = queryset.in_bulk(seen)
+        for index, item in enumerate(items):
+            if index not in errors and int(item['id']) not in instances:
+                errors[index] = {'id': ['Not found.']}
+        return instances, errors
+
+    def validate_batch(self, items, instances, partial, skip=()):
+        """
+        Validated data for every item and the errors by index. Items in `skip`
+        already failed and are not validated again.
+        """
+        prototype = self.get_serializer()
+        related, unique = {}, {}
+        for name, field in prototype.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                ids = set()
+                for item in items:
+                    try:
+                        ids.add(int(item[name]))
+                    except (KeyError, TypeError, ValueError):
+                        pass
+                queryset = field.get_queryset()
+                related[name] = Prefetched(queryset.model, queryset.in_bulk(ids))
+            validators = [v for v in field.validators if isinstance(v, UniqueValidator)]
+            if validators:
+                unique[name] = (field.source, validators[0].message)
+
+        validated, errors = [], {}
+        for index, item in enumerate(items):
+            if index in skip:
+                validated.append(None)
+                continue
+            instance = instances.get(int(item['id'])) if partial else None
+            serializer = self.get_serializer(instance, data=item, partial=partial)
+            for name, prefetched in related.items():
+                serializer.fields[name].queryset = prefetched
+            for name in unique:
+                field = serializer.fields[name]
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+            if serializer.is_valid():
+                validated.append(serializer.validated_data)
+            else:
+                validated.append(None)
+                errors[index] = serializer.errors
+
+        for name, (source, message) in unique.items():
+            self.check_unique(items, instances, validated, source, name, message, errors)
+        return validated, errors
+
+    def check_unique(self, items, instances, validated, source, name, message, errors):
+        """One query per unique field, against other rows and within the batch"""
+        final = {}
+        for index, data in enumerate(validated):
+            if data is None:
+                continue
+            if source in data:
+                value = _pk(data[source])
+            elif instances:
+                value = _pk(getattr(instances[int(items[index]['id'])], source))
+            else:
+                continue
+            if value not in (None, ''):
+                final[index] = value
+        if not final:
+            return
+        model = self.get_queryset().model
+        taken = set(
+            model.objects.filter(**{f'{source}__in': set(final.values())})
+            .exclude(pk__in=list(instances))
+            .values_list(source, flat=True)
+        )
+        claimed = set()
+        for index, value in final.items():
+            if value in taken or value in claimed:
+                errors.setdefault(index, {})[name] = [str(message)]
+                validated[index] = None
+            claimed.add(value)
+
+
+def _bed_audit(beds):
+    return [(bed.id, {'bed_number': bed.bed_number, 'ward': bed.ward, 'occupied': bed.is_occupied}) for bed in beds]
+
+
+def create_beds(beds):
+    Bed.objects.bulk_create(beds)
+    bed_summary.apply_deltas((bed.ward, 1, int(bed.is_occupied)) for bed in beds)
+    audit.record_many('create', 'Bed', _bed_audit(beds))
+    versions.bump('Bed')
+
+
+def update_beds(changes, fields):
+    now = datetime.now()
+    beds = [bed for bed, _ in changes]
+    for bed in beds:
+        bed.updated_at = now
+    Bed.objects.bulk_update(beds, fields | {'updated_at'})
+    moved = [(bed, old) for bed, old in changes if (old.ward, old.is_occupied) != (bed.ward, bed.is_occupied)]
+    bed_summary.apply_deltas(
+        [(old.ward, -1, -int(old.is_occupied)) for _, old in moved]
+        + [(bed.ward, 1, int(bed.is_occupied)) for bed, _ in moved]
+    )
+    audit.record_many('update', 'Bed', _bed_audit(beds))
+    versions.bump('Bed')
+
+
+def _move_beds(freed, filled, now):
+    """
+    Set is_occupied on the beds patients left and took ({id: Bed}), as the
+    patient save receivers do one bed at a time. A bed both left and taken
+    in the batch stays occupied.
+    """
+    freed = {pk: bed for pk, bed in freed.items() if pk not in filled}
+    if not freed and not filled:
+        return
+    for beds, occupied in ((freed, False), (filled, True)):
+        if not beds:
+            continue
+        Bed.objects.filter(id__in=list(beds)).update(is_occupied=occupied, updated_at=now)
+        bed_summary.apply_deltas((bed.ward, 0, 1 if occupied else -1) for bed in beds.values())
+        audit.record_many('update', 'Bed', [
+            (bed.id, {'bed_number': bed.bed_number, 'ward': bed.ward, 'occupied': occupied})
+            for bed in beds.values()
+        ])
+    versions.bump('Bed')
+
+
+def _patient_audit(patients):
+    return [
+        (p.id, {'name': p.name, 'bed': p.assigned_bed_id, 'doctor': p.assigned_doctor_id})
+        for p in patients
+    ]
+
+
+def create_patients(patients):
+    Patient.objects.bulk_create(patients)
+    _move_beds({}, {p.assigned_bed_id: p.assigned_bed for p in patients if p.assigned_bed_id}, datetime.now())
+    audit.record_many('create', 'Patient', _patient_audit(patients))
+    versions.bump('Patient')
+
+
+def update_patients(changes, fields):
+    now = datetime.now()
+    moved = [(p, old) for p, old in changes if p.assigned_bed_id != old.assigned_bed_id]
+    if moved:
+        # Clear first so swaps within the batch never trip the unique constraint on assigned_bed
+        Patient.objects.filter(id__in=[p.id for p, _ in moved]).update(assigned_bed=None)
+    patients = [p for p, _ in changes]
+    for patient in patients:
+        patient.updated_at = now
+    Patient.objects.bulk_update(patients, fields | {'updated_at'})
+    _move_beds(
+        {old.assigned_bed_id: old.assigned_bed for _, old in moved if old.assigned_bed_id},
+        {p.assigned_bed_id: p.assigned_bed for p, _ in moved if p.assigned_bed_id},
+        now,
+    )
+    audit.record_many('update', 'Patient', _patient_audit(patients))
+    versions.bump('Patient')
+
+
+def _medicine_audit(medicines):
+    return [
+        (m.id, {'patient': m.patient_id, 'medicine': m.medicine_name, 'dosage': m.dosage,
+                'frequency': m.frequency, 'days': m.no_of_days})
+        for m in medicines
+    ]
+
+
+def create_medicines(medicines):
+    for medicine in medicines:
+        medicine.frequency_mask = frequency_mask(medicine.frequency)
+    Medicine.objects.bulk_create(medicines)
+    audit.record_many('create', 'Medicine', _medicine_audit(medicines))
+    versions.bump('Medicine')
+
+
+def update_medicines(changes, fields):
+    now = datetime.now()
+    medicines = [m for m, _ in changes]
+    for medicine in medicines:
+        medicine.frequency_mask = frequency_mask(medicine.frequency)
+        medicine.updated_at = now
+    Medicine.objects.bulk_update(medicines, fields | {'frequency_mask', 'updated_at'})
+    audit.record_many('update', 'Medicine', _medicine_audit(medicines))
+    versions.bump('Medicine')
+
+
+# (create, update) writers by model name
+WRITERS = {
+    'Bed': (create_beds, update_beds),
+    'Patient': (create_patients, update_patients),
+    'Medicine': (create_medicines, update_medicines),
+}
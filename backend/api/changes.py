@@ -0,0 +1,78 @@
+# api/changes.py
+"""
+Incremental change feed for the API ViewSets: GET /api/<resource>/?since=<cursor>.
+
+Reads the Change log (api/models.py), which SQLite triggers keep with one
+entry per row, replaced on every write, so bulk writes and queryset.update()
+show up like any other save. Entries are numbered by an AUTOINCREMENT id and
+SQLite runs one write transaction at a time, so the numbers follow commit
+order: a transaction still open holds the write lock, and nothing numbered
+after its entries can commit before it. The cursor is the last number sent,
+so a long transaction (a bulk write, a CSV import) is never skipped.
+
+A page returns the changed rows still in the ViewSet's own queryset (so role
+scoping applies) in `results`, and in `deleted` the ids of rows deleted or
+moved out of that queryset, e.g. a patient reassigned to another doctor.
+Start with an empty `since` to page through everything once; that first pass
+sends no deletions. Ids in `deleted` are not scoped: clients ignore ids they
+never held.
+"""
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .models import Change
+
+
+def decode_cursor(value):
+    """Change log position from a cursor; an empty value starts from the beginning"""
+    if not value:
+        return 0
+    try:
+        position = int(value)
+    except ValueError:
+        position = -1
+    if position < 0:
+        raise ValueError(f'Invalid change feed cursor: {value!r}')
+    return position
+
+
+class ChangeFeedMixin:
+    """Adds the ?since= change feed to a ViewSet's list action"""
+    feed_page_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if 'since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.change_feed(request)
+
+    def change_feed(self, request):
+        try:
+            position = decode_cursor(request.query_params['since'])
+        except ValueError as e:
+            raise serializers.ValidationError({'since': str(e)})
+        try:
+            limit = min(int(request.query_params.get('page_size', self.feed_page_size)), self.feed_page_size)
+        except ValueError:
+            raise serializers.ValidationError({'page_size': 'Must be a number'})
+        limit = max(limit, 1)
+
+        queryset = self.get_queryset()
+        entries = list(
+            Change.objects.filter(model=queryset.model.__name__, id__gt=position)
+            .order_by('id')
+            .values_list('id', 'object_id', 'deleted')[:limit + 1]
+        )
+        more = len(entries) > limit
+        entries = entries[:limit]
+
+        changed_ids = [object_id for _, object_id, deleted in entries if not deleted]
+        rows = {row.id: row for row in queryset.filter(id__in=changed_ids)} if changed_ids else {}
+        return Response({
+            'results': self.get_serializer(
+                [rows[object_id] for _, object_id, _ in entries if object_id in rows], many=True,
+            ).data,
+            # Deleted, or changed so that this user no longer sees the row
+            'deleted': [object_id for _, object_id, _ in entries if object_id not in rows] if position else [],
+            'cursor': str(entries[-1][0] if entries else position),
+            'more': more,
+        })
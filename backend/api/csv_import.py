@@ -0,0 +1,307 @@
+# api/csv_import.py
+"""
+Streaming CSV import of beds, doctors and patients, shared by the import_csv
+management command and POST /api/imports/<kind>/.
+
+Rows are read one at a time with csv.DictReader and validated by the API
+serializers, one serializer instance per import. Bed numbers, doctor
+usernames and the beds already held are resolved through maps loaded once
+per import, so validating a row costs no query. Valid rows are written with
+bulk_create every `chunk_size` rows, each chunk in its own transaction.
+After each commit the importer reports the number of rows read so far; a
+failed import restarts from there by passing it back as `skip`.
+
+Rows that fail validation are skipped and reported with their line number.
+The signals are bypassed, so each chunk sets the derived fields and applies
+the bed occupancy, version counters, audit events and ward counters itself
+before it commits.
+
+Columns (header row required; optional columns may be left out):
+  beds:     bed_number, ward[, is_occupied]
+  doctors:  username[, first_name, last_name, email, password, specialization, contact, availability]
+  patients: name, age, gender, contact[, address, emergency_contact, condition, bed_number, doctor_username]
+"""
+import csv
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from .bulk import Prefetched
+from .models import CustomUser, Doctor, Patient, Bed, weekday_mask
+from .serializers import BedSerializer, DoctorSerializer, PatientSerializer
+from . import audit, bed_summary, versions
+
+# Errors kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+class CSVImportError(Exception):
+    """The file cannot be imported at all (e.g. missing columns)."""
+
+
+class Importer(ABC):
+    kind = None
+    required = ()
+    optional = ()
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = max(int(chunk_size), 1)
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.load_maps()
+
+    def load_maps(self):
+        """Load the lookup maps the rows are resolved against"""
+
+    @abstractmethod
+    def build(self, row):
+        """A model instance for a valid row, or raise ValidationError with a dict of errors"""
+
+    @abstractmethod
+    def write(self, objects):
+        """Insert one chunk of instances and apply the side effects"""
+
+    def run(self, stream, skip=0, on_commit=None):
+        """
+        Import every row of the text `stream` after the first `skip` rows.
+        on_commit(rows) is called after each chunk commits with the number of
+        rows read so far, which is where a later run can resume.
+        """
+        reader = csv.DictReader(stream)
+        columns = {name.strip() for name in reader.fieldnames or ()}
+        missing = [name for name in self.required if name not in columns]
+        if missing:
+            raise CSVImportError(f"Missing column(s) for {self.kind}: {', '.join(missing)}")
+
+        self.rows = skip
+        pending = []
+        for index, row in enumerate(reader, 1):
+            if index <= skip:
+                continue
+            self.rows = index
+            row = {(key or '').strip(): (value or '').strip() for key, value in row.items()}
+            try:
+                pending.append(self.build(row))
+            except ValidationError as e:
+                self.error(index, e.message_dict if hasattr(e, 'error_dict') else {'row': e.messages})
+            if index % self.chunk_size == 0:
+                self.commit(pending, on_commit)
+                pending = []
+        self.commit(pending, on_commit)
+        return self.report()
+
+    def commit(self, objects, on_commit):
+        if objects:
+            with transaction.atomic():
+                self.write(objects)
+            self.created += len(objects)
+        if on_commit is not None:
+            on_commit(self.rows)
+
+    def error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            # Line numbers count the header as line 1
+            self.errors.append({'line': row_number + 1, 'errors': errors})
+
+    def report(self):
+        return {
+            'kind': self.kind,
+            'rows': self.rows,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    @staticmethod
+    def validator(serializer_class, related=None):
+        """
+        One serializer of `serializer_class` for the whole import, used through
+        run_validation() so its fields are built once rather than per row.
+        Related ids are answered from `related` ({field: Prefetched}); unique
+        checks are left to the importer's maps. Neither costs a query.
+        """
+        serializer = serializer_class()
+        for name, prefetched in (related or {}).items():
+            serializer.fields[name].queryset = prefetched
+        for field in serializer.fields.values():
+            if any(isinstance(v, UniqueValidator) for v in field.validators):
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+        return serializer
+
+    @staticmethod
+    def validate(serializer, data):
+        try:
+            return serializer.run_validation(data)
+        except serializers.ValidationError as e:
+            raise ValidationError({
+                name: [str(message) for message in messages] if isinstance(messages, list) else [str(messages)]
+                for name, messages in e.detail.items()
+            })
+
+
+class BedImporter(Importer):
+    kind = 'beds'
+    required = ('bed_number', 'ward')
+    optional = ('is_occupied',)
+
+    def load_maps(self):
+        self.bed_numbers = set(Bed.objects.values_list('bed_number', flat=True).iterator())
+        self.serializer = self.validator(BedSerializer)
+
+    def build(self, row):
+        data = {name: row[name] for name in self.required + self.optional if row.get(name)}
+        validated = self.validate(self.serializer, data)
+        if validated['bed_number'] in self.bed_numbers:
+            raise ValidationError({'bed_number': ['A bed with this number already exists.']})
+        self.bed_numbers.add(validated['bed_number'])
+        return Bed(**validated)
+
+    def write(self, beds):
+        Bed.objects.bulk_create(beds)
+        audit.record_many('create', 'Bed', [
+            (bed.id, {'bed_number': bed.bed_number, 'ward': bed.ward, 'occupied': bed.is_occupied}) for bed in beds
+        ])
+        versions.bump('Bed')
+        bed_summary.apply_deltas((bed.ward, 1, int(bed.is_occupied)) for bed in beds)
+
+
+class DoctorImporter(Importer):
+    kind = 'doctors'
+    required = ('username',)
+    optional = ('first_name', 'last_name', 'email', 'password', 'specialization', 'contact', 'availability')
+
+    def load_maps(self):
+        self.usernames = set(CustomUser.objects.values_list('username', flat=True).iterator())
+        self.serializer = self.validator(DoctorSerializer)
+        self.password_hashes = {}
+
+    def hash_password(self, password):
+        """
+        make_password() once per distinct password in the file, since hashing
+        is deliberately slow; rows without one get an unusable password.
+        Rows sharing a password share its salt, as with an initial password
+        handed to a whole department.
+        """
+        if password not in self.password_hashes:
+            self.password_hashes[password] = make_password(password or None)
+        return self.password_hashes[password]
+
+    def build(self, row):
+        errors = {}
+        username = row['username']
+        try:
+            CustomUser._meta.get_field('username').run_validators(username)
+            if not username:
+                raise ValidationError('This field may not be blank.')
+            if username in self.usernames:
+                raise ValidationError('A user with that username already exists.')
+        except ValidationError as e:
+            errors['username'] = e.messages
+        if row.get('email'):
+            try:
+                validate_email(row['email'])
+            except ValidationError as e:
+                errors['email'] = e.messages
+        try:
+            validated = self.validate(self.serializer, {
+                name: row.get(name, '') for name in ('specialization', 'contact', 'availability')
+            })
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if errors:
+            raise ValidationError(errors)
+
+        self.usernames.add(username)
+        user = CustomUser(
+            username=username, role='doctor', email=row.get('email', ''),
+            first_name=row.get('first_name', ''), last_name=row.get('last_name', ''),
+            password=self.hash_password(row.get('password', '')),
+        )
+        doctor = Doctor(**validated)
+        doctor.availability_mask = weekday_mask(doctor.availability)
+        doctor.user = user
+        return doctor
+
+    def write(self, doctors):
+        users = CustomUser.objects.bulk_create([doctor.user for doctor in doctors])
+        for doctor, user in zip(doctors, users):
+            doctor.user = user
+        Doctor.objects.bulk_create(doctors)
+        audit.record_many('create', 'Doctor', [
+            (doctor.id, {'user': doctor.user_id, 'username': doctor.user.username}) for doctor in doctors
+        ])
+        versions.bump('CustomUser', 'Doctor')
+
+
+class PatientImporter(Importer):
+    kind = 'patients'
+    required = ('name', 'age', 'gender', 'contact')
+    # Passed to the serializer as they are; bed_number and doctor_username are resolved to ids
+    plain = ('address', 'emergency_contact', 'condition')
+    optional = plain + ('bed_number', 'doctor_username')
+
+    def load_maps(self):
+        beds = {bed.id: bed for bed in Bed.objects.only('id', 'bed_number', 'ward', 'is_occupied').iterator()}
+        self.beds = {bed.bed_number: bed for bed in beds.values()}
+        self.held_beds = set(
+            Patient.objects.filter(assigned_bed__isnull=False).values_list('assigned_bed_id', flat=True).iterator()
+        )
+        doctors = {doctor.id: doctor for doctor in Doctor.objects.select_related('user').only('id', 'user__username')}
+        self.doctors = {doctor.user.username: doctor for doctor in doctors.values()}
+        self.serializer = self.validator(PatientSerializer, {
+            'assigned_bed': Prefetched(Bed, beds), 'assigned_doctor': Prefetched(Doctor, doctors),
+        })
+
+    def build(self, row):
+        errors = {}
+        data = {name: row[name] for name in self.required + self.plain if row.get(name)}
+        bed_number, username = row.get('bed_number'), row.get('doctor_username')
+        if bed_number:
+            bed = self.beds.get(bed_number)
+            if bed is None:
+                errors['bed_number'] = [f'Unknown bed {bed_number}.']
+            elif bed.id in self.held_beds:
+                errors['bed_number'] = [f'Bed {bed_number} is already assigned to a patient.']
+            else:
+                data['assigned_bed'] = bed.id
+        if username:
+            doctor = self.doctors.get(username)
+            if doctor is None:
+                errors['doctor_username'] = [f'Unknown doctor {username}.']
+            else:
+                data['assigned_doctor'] = doctor.id
+        try:
+            validated = self.validate(self.serializer, data)
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if errors:
+            raise ValidationError(errors)
+        if validated.get('assigned_bed'):
+            self.held_beds.add(validated['assigned_bed'].id)
+        return Patient(**validated)
+
+    def write(self, patients):
+        Patient.objects.bulk_create(patients)
+        filled = [patient.assigned_bed_id for patient in patients if patient.assigned_bed_id]
+        if filled:
+            # Beds already flagged occupied are left as they are and not counted again
+            emptied = Bed.objects.filter(id__in=filled, is_occupied=False)
+            wards = list(emptied.values_list('ward', flat=True))
+            emptied.update(is_occupied=True, updated_at=datetime.now())
+            bed_summary.apply_deltas((ward, 0, 1) for ward in wards)
+        audit.record_many('create', 'Patient', [
+            (p.id, {'name': p.name, 'bed': p.assigned_bed_id, 'doctor': p.assigned_doctor_id}) for p in patients
+        ])
+        versions.bump('Patient', 'Bed')
+
+
+IMPORTERS = {importer.kind: importer for importer in (BedImporter, DoctorImporter, PatientImporter)}
@@ -0,0 +1,105 @@
+# api/exports.py
+"""
+Streaming CSV / NDJSON export of patients, appointments and prescriptions,
+shared by GET /api/exports/<kind>/ and the export_data management command.
+
+Rows are read as values_list() tuples in primary key order with
+queryset.iterator(chunk_size), so no model instance is built and only one
+chunk of rows is held at a time. They are encoded and handed to the response
+a chunk at a time. Memory stays flat however many rows match.
+
+The endpoint starts from the ViewSet's own get_queryset() (role scoping and
+its query parameter filters); the command exports everything. Both narrow by
+?start= / ?end= on each kind's date column.
+"""
+import csv
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Patient, Appointment, Medicine
+
+# kind: (model, date column for start/end, ((column, values() lookup), ...))
+EXPORTS = {
+    'patients': (Patient, 'updated_at', (
+        ('id', 'id'), ('name', 'name'), ('age', 'age'), ('gender', 'gender'), ('contact', 'contact'),
+        ('address', 'address'), ('emergency_contact', 'emergency_contact'), ('condition', 'condition'),
+        ('bed_number', 'assigned_bed__bed_number'), ('ward', 'assigned_bed__ward'),
+        ('doctor_username', 'assigned_doctor__user__username'), ('updated_at', 'updated_at'),
+    )),
+    'appointments': (Appointment, 'appointment_date', (
+        ('id', 'id'), ('patient_id', 'patient_id'), ('patient_name', 'patient__name'),
+        ('doctor_username', 'doctor__user__username'), ('appointment_date', 'appointment_date'),
+        ('appointment_time', 'appointment_time'), ('status', 'status'), ('updated_at', 'updated_at'),
+    )),
+    'prescriptions': (Medicine, 'created_at', (
+        ('id', 'id'), ('patient_id', 'patient_id'), ('patient_name', 'patient__name'),
+        ('medicine_name', 'medicine_name'), ('dosage', 'dosage'), ('frequency', 'frequency'),
+        ('relation_to_food', 'relation_to_food'), ('no_of_days', 'no_of_days'), ('created_at', 'created_at'),
+    )),
+}
+
+FORMATS = ('csv', 'ndjson')
+
+
+def parse_bound(value):
+    """A date or datetime from ?start= / ?end=; ValueError if it is neither"""
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value!r}. Use YYYY-MM-DD or an ISO datetime')
+    return parsed
+
+
+def export_rows(kind, queryset, start=None, end=None, chunk_size=2000):
+    """Rows of `kind` from `queryset` as tuples in export column order"""
+    model, date_field, columns = EXPORTS[kind]
+    if start is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{date_field}__lt': end})
+    return (
+        queryset.order_by('id')
+        .values_list(*[lookup for _, lookup in columns])
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def columns(kind):
+    return [column for column, _ in EXPORTS[kind][2]]
+
+
+class _Echo:
+    """csv.writer target that hands each row straight back"""
+    def write(self, value):
+        return value
+
+
+def _chunks(rows, encode, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def stream_csv(kind, rows, chunk_size=2000):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns(kind))
+    yield from _chunks(rows, writer.writerow, chunk_size)
+
+
+def stream_ndjson(kind, rows, chunk_size=2000):
+    names = columns(kind)
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    yield from _chunks(rows, lambda row: encoder.encode(dict(zip(names, row))) + '\n', chunk_size)
+
+
+STREAMS = {'csv': (stream_csv, 'text/csv'), 'ndjson': (stream_ndjson, 'application/x-ndjson')}
+
+
+def filename(kind, output):
+    return f'{kind}_{datetime.now():%Y%m%d_%H%M}.{output}'
@@ -0,0 +1,222 @@
+# api/live.py
+"""
+Live bed, patient and appointment events for GET /api/live/ (Server-Sent Events).
+
+Every stream polls the Change log (api/models.py) that the ?since= change
+feeds read. SQLite triggers add to it on every write, whatever the process
+or code path, so a stream sees the writes of every gunicorn worker, bulk
+writes and imports included. A poll costs one indexed query while nothing
+changed, plus one per kind of row that did. Who gets what:
+
+- admins and receptionists get every event;
+- doctors get patient and appointment events for their own patients and
+  appointments, and for ones just taken from them. Bed events go to staff only.
+
+Event ids are Change log positions, so a client reconnecting with
+Last-Event-ID resumes where it left off. Deleted rows are sent as
+{"id": ..., "deleted": true}. Streams end after LIVE_EVENTS_MAX_AGE seconds
+and clients reconnect by themselves.
+
+Under WSGI a stream holds a worker thread for its whole life, so each process
+serves at most LIVE_EVENTS_WSGI_STREAMS of them (see the view); under ASGI
+the polls run in the sync thread between sleeps.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+
+from .models import Change, Bed, Patient, Appointment
+
+STAFF_ROLES = ('admin', 'receptionist')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _beds(ids):
+    return {
+        row['id']: {**row, 'deleted': False}
+        for row in Bed.objects.filter(id__in=ids).values('id', 'bed_number', 'ward', 'is_occupied')
+    }
+
+
+def _patients(ids):
+    return {
+        row['id']: {
+            'id': row['id'], 'name': row['name'], 'bed': row['assigned_bed_id'],
+            'ward': row['assigned_bed__ward'], 'doctor': row['assigned_doctor_id'], 'deleted': False,
+        }
+        for row in Patient.objects.filter(id__in=ids).values(
+            'id', 'name', 'assigned_bed_id', 'assigned_bed__ward', 'assigned_doctor_id',
+        )
+    }
+
+
+def _appointments(ids):
+    return {
+        row['id']: {
+            'id': row['id'], 'patient': row['patient_id'], 'doctor': row['doctor_id'],
+            'date': row['appointment_date'], 'time': row['appointment_time'], 'status': row['status'],
+            'deleted': False,
+        }
+        for row in Appointment.objects.filter(id__in=ids).values(
+            'id', 'patient_id', 'doctor_id', 'appointment_date', 'appointment_time', 'status',
+        )
+    }
+
+
+# Change log model: (event kind, loader of the event data by id)
+KINDS = {
+    'Bed': ('bed', _beds),
+    'Patient': ('patient', _patients),
+    'Appointment': ('appointment', _appointments),
+}
+
+
+class Feed:
+    """The position of one stream in the Change log, and what its user may see"""
+
+    def __init__(self, role, doctor_id=None, position=None):
+        self.role = role
+        self.doctor_id = doctor_id
+        if position is None:
+            position = Change.objects.aggregate(last=Max('id'))['last'] or 0
+        self.position = position
+        # A doctor's patients and appointments, so the doctor is also told
+        # when one is deleted or reassigned away
+        self.held = {}
+        if role == 'doctor':
+            self.held = {
+                'Patient': set(Patient.objects.filter(assigned_doctor_id=doctor_id).values_list('id', flat=True)),
+                'Appointment': set(Appointment.objects.filter(doctor_id=doctor_id).values_list('id', flat=True)),
+            }
+        self.behind = False
+
+    def wants(self, model, object_id, data):
+        if self.role in STAFF_ROLES:
+            return True
+        if model not in self.held:
+            return False
+        held = self.held[model]
+        was_held = object_id in held
+        if data is not None and data['doctor'] == self.doctor_id:
+            held.add(object_id)
+            return True
+        held.discard(object_id)
+        return was_held
+
+    def poll(self):
+        """Events committed since the last poll, oldest first"""
+        batch = _setting('LIVE_EVENTS_BATCH', 500)
+        entries = list(
+            Change.objects.filter(id__gt=self.position, model__in=KINDS)
+            .order_by('id')
+            .values_list('id', 'model', 'object_id', 'deleted')[:batch]
+        )
+        self.behind = len(entries) == batch
+        if not entries:
+            return []
+        self.position = entries[-1][0]
+
+        rows = {}
+        for model, (_, load) in KINDS.items():
+            ids = [object_id for _, entry_model, object_id, deleted in entries if entry_model == model and not deleted]
+            rows[model] = load(ids) if ids else {}
+        events = []
+        for entry_id, model, object_id, deleted in entries:
+            data = rows[model].get(object_id)
+            if self.wants(model, object_id, data):
+                events.append({
+                    'id': entry_id, 'kind': KINDS[model][0],
+                    'data': data if data is not None else {'id': object_id, 'deleted': True},
+                })
+        return events
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+def stream(feed):
+    """The body of one SSE response under WSGI: polls, sleeping in the worker thread between"""
+    interval = _setting('LIVE_EVENTS_POLL_INTERVAL', 1)
+    heartbeat = _setting('LIVE_EVENTS_HEARTBEAT', 15)
+    deadline = time.monotonic() + _setting('LIVE_EVENTS_MAX_AGE', 300)
+    last_sent = time.monotonic()
+    yield 'retry: 3000\n\n'
+    while time.monotonic() < deadline:
+        events = feed.poll()
+        if events:
+            yield ''.join(format_event(event) for event in events)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= heartbeat:
+            yield ': keep-alive\n\n'
+            last_sent = time.monotonic()
+        if not feed.behind:
+            time.sleep(interval)
+
+
+async def astream(feed):
+    """The body of one SSE response under ASGI"""
+    loop = asyncio.get_running_loop()
+    interval = _setting('LIVE_EVENTS_POLL_INTERVAL', 1)
+    heartbeat = _setting('LIVE_EVENTS_HEARTBEAT', 15)
+    deadline = loop.time() + _setting('LIVE_EVENTS_MAX_AGE', 300)
+    last_sent = loop.time()
+    yield 'retry: 3000\n\n'
+    while loop.time() < deadline:
+        events = await sync_to_async(feed.poll)()
+        if events:
+            yield ''.join(format_event(event) for event in events)
+            last_sent = loop.time()
+        elif loop.time() - last_sent >= heartbeat:
+            yield ': keep-alive\n\n'
+            last_sent = loop.time()
+        if not feed.behind:
+            await asyncio.sleep(interval)
+
+
+class WSGIStreams:
+    """Counts the streams open in this process against LIVE_EVENTS_WSGI_STREAMS"""
+
+    def __init__(self):
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def open(self, feed):
+        """A response body holding one slot until the server closes it, or None when all are taken"""
+        with self._lock:
+            if self._open >= _setting('LIVE_EVENTS_WSGI_STREAMS', 4):
+                return None
+            self._open += 1
+        return _SlotStream(self, feed)
+
+    def release(self):
+        with self._lock:
+            self._open -= 1
+
+
+class _SlotStream:
+    # Django calls close() when the response is closed, started or not
+    def __init__(self, streams, feed):
+        self._streams = streams
+        self._body = stream(feed)
+        self._closed = False
+
+    def __iter__(self):
+        return self._body
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._body.close()
+            self._streams.release()
+
+
+wsgi_streams = WSGIStreams()
@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.sqlite_backend.base import DEFAULT_PRAGMAS, apply_pragmas
+
+READ_SQL = """
+    SELECT p.id, p.name, b.bed_number, b.ward
+    FROM api_patient p LEFT JOIN api_bed b ON b.id = p.assigned_bed_id
+    ORDER BY p.id DESC LIMIT 50
+"""
+
+
+def run_worker(path, mode, seconds, write_ratio, seed, results):
+    """
+    One "web worker": a loop of patient-list reads and writes shaped like a
+    patient save (read a patient, update it and toggle a bed) until the deadline.
+    """
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    conn = None
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=mode['timeout'], isolation_level=None)
+            apply_pragmas(conn, mode['pragmas'])
+        is_write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if is_write:
+                conn.execute(f"BEGIN {mode['transaction_mode']}")
+                try:
+                    patient = conn.execute(
+                        'SELECT id, assigned_bed_id FROM api_patient ORDER BY random() LIMIT 1'
+                    ).fetchone()
+                    if patient:
+                        conn.execute('UPDATE api_patient SET contact = ? WHERE id = ?',
+                                     (f'555-{rng.randint(0, 9999):04d}', patient[0]))
+                        conn.execute('UPDATE api_bed SET is_occupied = NOT is_occupied WHERE id = ?', (patient[1],))
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            else:
+                conn.execute(READ_SQL).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            errors += 1
+        else:
+            (writes if is_write else reads).append(time.perf_counter() - started)
+        if not mode['persistent']:
+            conn.close()
+            conn = None
+    if conn is not None:
+        conn.close()
+    results.put((reads, writes, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Concurrent read/write benchmark of the SQLite database: Django\'s default '
+        'connection setup against the tuned one in api/sqlite_backend'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent worker processes')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of requests that write')
+        parser.add_argument('--source', help='Database file to copy (default: the configured database)')
+
+    def handle(self, *args, **options):
+        source = options['source'] or str(connection.settings_dict['NAME'])
+        if not os.path.exists(source):
+            raise CommandError(f'Database file not found: {source}')
+
+        tuned_options = connection.settings_dict.get('OPTIONS', {})
+        modes = {
+            # What django.db.backends.sqlite3 does out of the box
+            'default': {
+                'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+                'transaction_mode': 'DEFERRED',
+                'persistent': False,
+                'timeout': 5.0,
+            },
+            'tuned': {
+                'pragmas': {**DEFAULT_PRAGMAS, **tuned_options.get('pragmas', {})},
+                'transaction_mode': tuned_options.get('transaction_mode', 'IMMEDIATE'),
+                'persistent': True,
+                'timeout': 5.0,
+            },
+        }
+
+        self.stdout.write(
+            f"{options['workers']} workers, {options['seconds']}s per run, "
+            f"{options['write_ratio']:.0%} writes, copy of {source}"
+        )
+        header = f"{'mode':<8} {'reads/s':>9} {'writes/s':>9} {'read p50':>9} {'read p95':>9} " \
+                 f"{'write p50':>10} {'write p95':>10} {'errors':>7}"
+        self.stdout.write(header)
+        tmpdir = tempfile.mkdtemp(prefix='sqlite_bench_')
+        try:
+            for name, mode in modes.items():
+                path = os.path.join(tmpdir, f'{name}.sqlite3')
+                # The backup API copies a consistent snapshot, WAL included
+                with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+                    src.backup(dst)
+                self.stdout.write(self.format_row(name, self.run(path, mode, options), options['seconds']))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def run(self, path, mode, options):
+        # Set the journal mode once, as a deployed database would already have it
+        with sqlite3.connect(path) as conn:
+            conn.execute(f"PRAGMA journal_mode = {mode['pragmas']['journal_mode']}")
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=run_worker,
+                args=(path, mode, options['seconds'], options['write_ratio'], seed, results),
+            )
+            for seed in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        reads = [latency for r, _, _ in collected for latency in r]
+        writes = [latency for _, w, _ in collected for latency in w]
+        return reads, writes, sum(errors for _, _, errors in collected)
+
+    @staticmethod
+    def format_row(name, result, seconds):
+        reads, writes, errors = result
+
+        def ms(samples, q):
+            if len(samples) < 2:
+                return '-'
+            return f'{statistics.quantiles(samples, n=100)[q - 1] * 1000:.2f}ms'
+
+        return f"{name:<8} {len(reads) / seconds:>9.0f} {len(writes) / seconds:>9.0f} " \
+               f"{ms(reads, 50):>9} {ms(reads, 95):>9} {ms(writes, 50):>10} {ms(writes, 95):>10} {errors:>7}"
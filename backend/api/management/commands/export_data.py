@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import exports
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream every patient, appointment or prescription to CSV or NDJSON with '
+        'flat memory (see api/exports.py), optionally within a date range'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--output', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--file', help='Write here instead of standard output')
+        parser.add_argument('--start', help='First date (or datetime) to include')
+        parser.add_argument('--end', help='Date (or datetime) to stop before')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched and written per chunk')
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        try:
+            start, end = (exports.parse_bound(options[bound]) if options[bound] else None for bound in ('start', 'end'))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        model = exports.EXPORTS[kind][0]
+        rows = exports.export_rows(kind, model.objects.all(), start, end, options['chunk_size'])
+        stream, _ = exports.STREAMS[options['output']]
+
+        started = time.perf_counter()
+        if not options['file']:
+            for chunk in stream(kind, rows, options['chunk_size']):
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['file'], 'w', newline='', encoding='utf-8') as out:
+            for chunk in stream(kind, rows, options['chunk_size']):
+                out.write(chunk)
+        self.stderr.write(f"Exported {kind} to {options['file']} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import CustomUser, Bed
+from api.synthetic import Generator
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a seeded synthetic dataset for load testing (see api/synthetic.py). '
+        'The same seed and counts always produce the same data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--doctors', type=int, default=20)
+        parser.add_argument('--beds', type=int, default=300)
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--appointments', type=int, default=5000)
+        parser.add_argument('--medicines', type=int, default=2000)
+        parser.add_argument('--diagnoses', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction')
+        parser.add_argument(
+            '--prefix', default='syn', help='Start of the generated usernames and bed numbers, so runs can coexist',
+        )
+
+    def handle(self, *args, **options):
+        counts = {name: options[name] for name in
+                  ('doctors', 'beds', 'patients', 'appointments', 'medicines', 'diagnoses')}
+        if any(count < 0 for count in counts.values()):
+            raise CommandError('Counts cannot be negative')
+        if counts['doctors'] < 1:
+            raise CommandError('At least one doctor is needed')
+        prefix = options['prefix']
+        if len(f"{prefix}{max(counts['beds'] - 1, 0)}") > Bed._meta.get_field('bed_number').max_length:
+            raise CommandError('Bed numbers would be too long: use a shorter --prefix')
+        if CustomUser.objects.filter(username__startswith=f'{prefix}_dr').exists() or \
+                Bed.objects.filter(bed_number__startswith=prefix).exists():
+            raise CommandError(f'Data with prefix {prefix!r} already exists: pass another --prefix')
+
+        started = time.perf_counter()
+        generator = Generator(
+            seed=options['seed'], batch_size=max(options['batch_size'], 1), prefix=prefix, log=self.stdout.write,
+        )
+        created = generator.generate(**counts)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(created.values())} rows in {time.perf_counter() - started:.1f}s'
+        ))
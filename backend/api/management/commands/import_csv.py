@@ -0,0 +1,60 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.csv_import import IMPORTERS, CSVImportError
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream a CSV file of beds, doctors or patients into the database in '
+        'chunks (see api/csv_import.py for the columns). Progress is saved after '
+        'every chunk; --resume continues an interrupted import.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--resume', action='store_true', help='Skip the rows a previous run committed')
+        parser.add_argument('--progress-file', help='Where progress is kept (default: <path>.progress)')
+
+    def handle(self, *args, **options):
+        path, kind = options['path'], options['kind']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        progress_file = options['progress_file'] or f'{path}.progress'
+
+        skip = 0
+        if options['resume'] and os.path.exists(progress_file):
+            with open(progress_file) as f:
+                progress = json.load(f)
+            if progress.get('kind') != kind:
+                raise CommandError(f"{progress_file} belongs to a {progress.get('kind')} import")
+            skip = progress['rows']
+            self.stdout.write(f'Resuming after row {skip}')
+
+        def save_progress(rows):
+            with open(progress_file, 'w') as f:
+                json.dump({'kind': kind, 'rows': rows}, f)
+
+        started = time.perf_counter()
+        importer = IMPORTERS[kind](chunk_size=options['chunk_size'])
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(stream, skip=skip, on_commit=save_progress)
+        except CSVImportError as e:
+            raise CommandError(str(e))
+        os.remove(progress_file)
+
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"... and {report['error_count'] - len(report['errors'])} more invalid row(s)")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} {kind} from {report['rows'] - skip} row(s) in {elapsed:.1f}s; "
+            f"{report['error_count']} row(s) skipped"
+        ))
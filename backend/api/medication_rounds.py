@@ -0,0 +1,124 @@
+# api/medication_rounds.py
+"""
+Ward medication round (MAR) for one day.
+
+Every dose due in a ward is read in a single query: medicines joined through
+Patient.assigned_bed to the ward, as plain values() rows. A course runs from
+the day it was prescribed for `no_of_days` days. The query keeps only the
+courses running on the day, with SQLite's date() doing the day arithmetic the
+ORM cannot, and reads no further back than the longest course in the table
+(an indexed MAX), so each patient's past prescriptions are never loaded.
+
+Doses are then grouped by dose slot (Breakfast, Lunch, Dinner) and relation
+to food, and written out as JSON or CSV a chunk at a time.
+"""
+import csv
+import datetime
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DateField, DateTimeField
+from django.db.models.expressions import RawSQL
+
+from .models import Medicine, DOSE_SLOTS, MASK_DOSE_SLOTS
+
+RELATION_ORDER = ('Before', 'With', 'After')
+
+CSV_COLUMNS = (
+    'slot', 'relation_to_food', 'bed_number', 'patient_id', 'patient_name',
+    'medicine_id', 'medicine_name', 'dosage', 'course_day', 'no_of_days',
+)
+
+
+def active_doses(medicines, ward, day):
+    """
+    Doses of every course running on `day` for patients in `ward`, as
+    {slot: {relation_to_food: [dose, ...]}}. One query, which returns only
+    those courses.
+    """
+    table = Medicine._meta.db_table
+    rows = (
+        medicines.filter(
+            patient__assigned_bed__ward=ward,
+            frequency_mask__gt=0,
+            created_at__lt=datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min),
+            # Nothing prescribed before the longest course could still be running
+            created_at__gte=RawSQL(
+                f"datetime(%s, '-' || (SELECT MAX(no_of_days) FROM {table}) || ' days')",
+                (day.isoformat(),), output_field=DateTimeField(),
+            ),
+        )
+        .alias(course_end=RawSQL(
+            f"date({table}.created_at, '+' || {table}.no_of_days || ' days')", (), output_field=DateField(),
+        ))
+        .filter(course_end__gt=day)
+        .order_by('patient__assigned_bed__bed_number', 'medicine_name', 'id')
+        .values(
+            'id', 'medicine_name', 'dosage', 'frequency_mask', 'relation_to_food',
+            'no_of_days', 'created_at', 'patient_id', 'patient__name', 'patient__assigned_bed__bed_number',
+        )
+    )
+
+    rounds = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        course_day = (day - row['created_at'].date()).days + 1
+        dose = {
+            'bed_number': row['patient__assigned_bed__bed_number'],
+            'patient_id': row['patient_id'],
+            'patient_name': row['patient__name'],
+            'medicine_id': row['id'],
+            'medicine_name': row['medicine_name'],
+            'dosage': row['dosage'],
+            'course_day': course_day,
+            'no_of_days': row['no_of_days'],
+        }
+        for slot in MASK_DOSE_SLOTS[row['frequency_mask']]:
+            rounds[slot][row['relation_to_food']].append(dose)
+    return rounds
+
+
+def _groups(rounds):
+    """(slot, relation_to_food, doses) in round order, skipping empty groups"""
+    for slot in DOSE_SLOTS:
+        by_relation = rounds.get(slot, {})
+        extra = sorted(set(by_relation) - set(RELATION_ORDER))
+        for relation in RELATION_ORDER + tuple(extra):
+            if by_relation.get(relation):
+                yield slot, relation, by_relation[relation]
+
+
+def stream_json(ward, day, rounds):
+    """
+    {"ward", "date", "rounds": [{"slot", "groups": [{"relation_to_food",
+    "doses": [...]}]}]}, yielded a dose at a time.
+    """
+    encode = DjangoJSONEncoder().encode
+    yield '{"ward": %s, "date": %s, "rounds": [' % (encode(ward), encode(day))
+    for slot_index, slot in enumerate(DOSE_SLOTS):
+        yield '%s{"slot": %s, "groups": [' % (', ' if slot_index else '', encode(slot))
+        first_group = True
+        for group_slot, relation, doses in _groups(rounds):
+            if group_slot != slot:
+                continue
+            yield '%s{"relation_to_food": %s, "doses": [' % ('' if first_group else ', ', encode(relation))
+            first_group = False
+            for index, dose in enumerate(doses):
+                yield (', ' if index else '') + json.dumps(dose, cls=DjangoJSONEncoder)
+            yield ']}'
+        yield ']}'
+    yield ']}'
+
+
+class _Echo:
+    """csv.writer target that hands each row straight back"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(rounds):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for slot, relation, doses in _groups(rounds):
+        for dose in doses:
+            yield writer.writerow([slot, relation] + [dose[column] for column in CSV_COLUMNS[2:]])
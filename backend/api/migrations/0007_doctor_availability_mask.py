@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-17 23:11
+
+import calendar
+
+from django.db import migrations, models
+
+
+def populate_availability_mask(apps, schema_editor):
+    """Convert the comma-separated availability strings into weekday bitmasks"""
+    Doctor = apps.get_model('api', 'Doctor')
+    bits = {day.lower(): 1 << index for index, day in enumerate(calendar.day_name)}
+    bits.update({abbr.lower(): 1 << index for index, abbr in enumerate(calendar.day_abbr)})
+    doctors = list(Doctor.objects.only('id', 'availability'))
+    for doctor in doctors:
+        doctor.availability_mask = 0
+        for day in (doctor.availability or '').split(','):
+            doctor.availability_mask |= bits.get(day.strip().lower(), 0)
+    Doctor.objects.bulk_update(doctors, ['availability_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_auditevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='availability_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(populate_availability_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.14 on 2026-10-17 23:12
+
+from django.db import migrations, models
+
+
+def populate_frequency_mask(apps, schema_editor):
+    """Convert the comma-separated frequency strings into dose slot bitmasks"""
+    Medicine = apps.get_model('api', 'Medicine')
+    bits = {'Breakfast': 1, 'Lunch': 2, 'Dinner': 4}
+    medicines = list(Medicine.objects.only('id', 'frequency'))
+    for medicine in medicines:
+        medicine.frequency_mask = 0
+        for slot in (medicine.frequency or '').split(','):
+            medicine.frequency_mask |= bits.get(slot.strip(), 0)
+    Medicine.objects.bulk_update(medicines, ['frequency_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_doctor_availability_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='frequency_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(populate_frequency_mask, migrations.RunPython.noop),
+    ]
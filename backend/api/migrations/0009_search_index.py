@@ -0,0 +1,101 @@
+# Generated by Django 4.2.14 on 2026-10-17 23:40
+
+from django.db import migrations
+
+# rowid = object id * 4 + kind, so triggers can update and delete index rows
+# by primary key: 1 = patient, 2 = diagnosis, 3 = medicine
+CREATE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE api_search_index USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, patient_id UNINDEXED, title, body,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # Patients: name is the title, condition the body
+    """
+    CREATE TRIGGER api_search_patient_ai AFTER INSERT ON api_patient BEGIN
+        INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+        VALUES (new.id * 4 + 1, 'patient', new.id, new.id, new.name, new.condition);
+    END
+    """,
+    """
+    CREATE TRIGGER api_search_patient_au AFTER UPDATE OF name, condition ON api_patient BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 4 + 1;
+        INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+        VALUES (new.id * 4 + 1, 'patient', new.id, new.id, new.name, new.condition);
+    END
+    """,
+    """
+    CREATE TRIGGER api_search_patient_ad AFTER DELETE ON api_patient BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 4 + 1;
+    END
+    """,
+    # Diagnoses: the free-text notes are the body
+    """
+    CREATE TRIGGER api_search_diagnosis_ai AFTER INSERT ON api_diagnosis BEGIN
+        INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+        VALUES (new.id * 4 + 2, 'diagnosis', new.id, new.patient_id, '', new.diagnosis);
+    END
+    """,
+    """
+    CREATE TRIGGER api_search_diagnosis_au AFTER UPDATE OF diagnosis, patient_id ON api_diagnosis BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 4 + 2;
+        INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+        VALUES (new.id * 4 + 2, 'diagnosis', new.id, new.patient_id, '', new.diagnosis);
+    END
+    """,
+    """
+    CREATE TRIGGER api_search_diagnosis_ad AFTER DELETE ON api_diagnosis BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 4 + 2;
+    END
+    """,
+    # Medicines: the medicine name is the title
+    """
+    CREATE TRIGGER api_search_medicine_ai AFTER INSERT ON api_medicine BEGIN
+        INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+        VALUES (new.id * 4 + 3, 'medicine', new.id, new.patient_id, new.medicine_name, '');
+    END
+    """,
+    """
+    CREATE TRIGGER api_search_medicine_au AFTER UPDATE OF medicine_name, patient_id ON api_medicine BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 4 + 3;
+        INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+        VALUES (new.id * 4 + 3, 'medicine', new.id, new.patient_id, new.medicine_name, '');
+    END
+    """,
+    """
+    CREATE TRIGGER api_search_medicine_ad AFTER DELETE ON api_medicine BEGIN
+        DELETE FROM api_search_index WHERE rowid = old.id * 4 + 3;
+    END
+    """,
+    # Index the rows that already exist
+    """
+    INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+    SELECT id * 4 + 1, 'patient', id, id, name, condition FROM api_patient
+    """,
+    """
+    INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+    SELECT id * 4 + 2, 'diagnosis', id, patient_id, '', diagnosis FROM api_diagnosis
+    """,
+    """
+    INSERT INTO api_search_index (rowid, kind, object_id, patient_id, title, body)
+    SELECT id * 4 + 3, 'medicine', id, patient_id, medicine_name, '' FROM api_medicine
+    """,
+]
+
+DROP_INDEX = [
+    f"DROP TRIGGER IF EXISTS api_search_{model}_{event}"
+    for model in ('patient', 'diagnosis', 'medicine')
+    for event in ('ai', 'au', 'ad')
+] + ["DROP TABLE IF EXISTS api_search_index"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_medicine_frequency_mask'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
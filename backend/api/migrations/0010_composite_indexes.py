@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-17 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'appointment_date'], name='api_appt_doctor_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['appointment_date'], name='api_appt_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bed',
+            index=models.Index(fields=['ward', 'is_occupied'], name='api_bed_ward_occupied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diagnosis',
+            index=models.Index(fields=['patient', '-created_at', '-id'], name='api_diag_patient_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['patient', '-created_at', '-id'], name='api_med_patient_created_idx'),
+        ),
+    ]
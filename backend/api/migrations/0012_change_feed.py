@@ -0,0 +1,81 @@
+# Generated by Django 4.2.14 on 2026-10-17 23:30
+
+import importlib
+
+from django.db import migrations, models
+
+# Adding a NOT NULL column makes SQLite's schema editor rebuild api_patient,
+# which drops the full-text search triggers created in 0009; put them back.
+_search_index = importlib.import_module('api.migrations.0009_search_index')
+PATIENT_TRIGGERS = [sql for sql in _search_index.CREATE_INDEX if 'ON api_patient BEGIN' in sql]
+DROP_PATIENT_TRIGGERS = [f"DROP TRIGGER IF EXISTS api_search_patient_{event}" for event in ('ai', 'au', 'ad')]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_modelversion'),
+    ]
+
+    operations = [
+        # Rolling back removes the column, which rebuilds the table again
+        migrations.RunSQL(migrations.RunSQL.noop, DROP_PATIENT_TRIGGERS + PATIENT_TRIGGERS),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='bed',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['updated_at'], name='api_appt_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bed',
+            index=models.Index(fields=['updated_at'], name='api_bed_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diagnosis',
+            index=models.Index(fields=['updated_at'], name='api_diag_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['updated_at'], name='api_doctor_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['updated_at'], name='api_med_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['updated_at'], name='api_patient_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted_at'], name='api_tombstone_model_idx'),
+        ),
+        migrations.RunSQL(DROP_PATIENT_TRIGGERS + PATIENT_TRIGGERS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.14 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+# Feed models and their tables. Triggers write the api_change log, so bulk
+# writes and queryset.update() are logged too. A later migration that rebuilds
+# one of these tables (SQLite's schema editor does for most column changes)
+# drops its triggers and must run CREATE_TRIGGERS for it again.
+FEED_TABLES = {
+    'Doctor': 'api_doctor',
+    'Patient': 'api_patient',
+    'Bed': 'api_bed',
+    'Appointment': 'api_appointment',
+    'Medicine': 'api_medicine',
+    'Diagnosis': 'api_diagnosis',
+}
+_EVENTS = {'ai': ('INSERT', 'new', 0), 'au': ('UPDATE', 'new', 0), 'ad': ('DELETE', 'old', 1)}
+
+# INSERT OR REPLACE drops the row's previous entry and appends a new one with
+# the next id, so the log holds one entry per row, in the order writes commit
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER api_change_{table}_{suffix} AFTER {event} ON {table} BEGIN
+        INSERT OR REPLACE INTO api_change (model, object_id, deleted) VALUES ('{model}', {row}.id, {deleted});
+    END
+    """
+    for model, table in FEED_TABLES.items()
+    for suffix, (event, row, deleted) in _EVENTS.items()
+]
+DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS api_change_{table}_{suffix}" for table in FEED_TABLES.values() for suffix in _EVENTS
+]
+
+# Seed the log with the deletes recorded so far, then every existing row
+# oldest write first, so clients holding an old cursor resync from scratch
+BACKFILL = [
+    "INSERT OR REPLACE INTO api_change (model, object_id, deleted) "
+    "SELECT model, object_id, 1 FROM api_tombstone ORDER BY deleted_at, id",
+] + [
+    f"INSERT OR REPLACE INTO api_change (model, object_id, deleted) "
+    f"SELECT '{model}', id, 0 FROM {table} ORDER BY updated_at, id"
+    for model, table in FEED_TABLES.items()
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='change',
+            constraint=models.UniqueConstraint(fields=('model', 'object_id'), name='api_change_object_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'id'], name='api_change_model_idx'),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.DeleteModel(
+            name='Tombstone',
+        ),
+    ]
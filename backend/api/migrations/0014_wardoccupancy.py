@@ -0,0 +1,28 @@
+# Generated by Django 4.2.14 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+# Seed the counters from the beds; from here on every Bed write adjusts them
+SEED = """
+    INSERT INTO api_wardoccupancy (ward, total, occupied)
+    SELECT ward, COUNT(*), SUM(is_occupied) FROM api_bed GROUP BY ward
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WardOccupancy',
+            fields=[
+                ('ward', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('total', models.IntegerField(default=0)),
+                ('occupied', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(SEED, migrations.RunSQL.noop),
+    ]
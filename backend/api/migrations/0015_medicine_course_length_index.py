@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_wardoccupancy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['no_of_days'], name='api_med_days_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 # api/models.py
+import calendar
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -13,6 +15,35 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+# Weekday bitmask used for Doctor.availability_mask: Monday = 1, Tuesday = 2, ... Sunday = 64
+WEEKDAYS = tuple(calendar.day_name)
+WEEKDAY_BITS = {day: 1 << index for index, day in enumerate(WEEKDAYS)}
+# Also accept abbreviations ("Wed") when parsing
+_WEEKDAY_LOOKUP = {
+    **{day.lower(): bit for day, bit in WEEKDAY_BITS.items()},
+    **{abbr.lower(): 1 << index for index, abbr in enumerate(calendar.day_abbr)},
+}
+# Day names for every possible mask, so reading availability never re-parses a string
+MASK_DAYS = tuple(
+    tuple(day for day in WEEKDAYS if mask & WEEKDAY_BITS[day]) for mask in range(1 << len(WEEKDAYS))
+)
+
+def weekday_mask(availability):
+    """Bitmask for a comma-separated list of day names or abbreviations (case-insensitive; unknown names are ignored)"""
+    mask = 0
+    for day in (availability or '').split(','):
+        mask |= _WEEKDAY_LOOKUP.get(day.strip().lower(), 0)
+    return mask
+
+class DoctorQuerySet(models.QuerySet):
+    def available_on(self, date):
+        """
+        Doctors working on date's weekday. Matches the masks that contain the
+        weekday bit with IN, so the availability_mask index can be used.
+        """
+        bit = 1 << date.weekday()
+        return self.filter(availability_mask__in=[mask for mask in range(len(MASK_DAYS)) if mask & bit])
+
 class Doctor(models.Model):
     # One-to-one link to the user model
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='doctor_profile')
@@ -23,33 +54,40 @@ class Doctor(models.Model):
     specialization = models.CharField(max_length=100)
     contact = models.CharField(max_length=15)
     availability = models.CharField(max_length=255, blank=True, help_text="Comma-separated days, e.g., Monday,Tuesday")
+    # Derived from `availability` on save; lets the database answer "who works on Thursday"
+    availability_mask = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DoctorQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Recently changed rows
+            models.Index(fields=['updated_at'], name='api_doctor_updated_idx'),
+        ]
 
     def __str__(self):
         # Get the full name from the linked user
         return f"Dr. {self.user.get_full_name()} ({self.specialization})"
+
+    def save(self, *args, **kwargs):
+        self.availability_mask = weekday_mask(self.availability)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'availability' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'availability_mask'}
+        super().save(*args, **kwargs)
     
     def get_available_days(self):
         """Return list of available days"""
-        if self.availability:
-            return [day.strip() for day in self.availability.split(',')]
-        return []
+        return list(MASK_DAYS[self.availability_mask])
     
     def is_available_on_date(self, date):
         """Check if doctor is available on a specific date"""
-        import calendar
-        if not self.availability:
-            return False
-        
-        # Get the day name from the date
-        day_name = calendar.day_name[date.weekday()]
-        available_days = self.get_available_days()
-        
-        return day_name in available_days
+        return bool(self.availability_mask & (1 << date.weekday()))
     
     def is_available_on_day(self, day_name):
         """Check if doctor is available on a specific day name (e.g., 'Monday')"""
-        available_days = self.get_available_days()
-        return day_name in available_days
+        return bool(self.availability_mask & WEEKDAY_BITS.get(day_name, 0))
 
 class Bed(models.Model):
     WARD_CHOICES = (
@@ -60,10 +98,19 @@ class Bed(models.Model):
     bed_number = models.CharField(max_length=10, unique=True)
     ward = models.CharField(max_length=50, choices=WARD_CHOICES)
     is_occupied = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.ward} - {self.bed_number}"
 
+    class Meta:
+        indexes = [
+            # Free/occupied beds of a ward (transfers, summary)
+            models.Index(fields=['ward', 'is_occupied'], name='api_bed_ward_occupied_idx'),
+            # Recently changed rows
+            models.Index(fields=['updated_at'], name='api_bed_updated_idx'),
+        ]
+
 class Patient(models.Model):
     GENDER_CHOICES = (
         ('Male', 'Male'),
@@ -80,10 +127,17 @@ class Patient(models.Model):
     
     assigned_bed = models.OneToOneField(Bed, on_delete=models.SET_NULL, null=True, blank=True, related_name='patient')
     assigned_doctor = models.ForeignKey(Doctor, on_delete=models.SET_NULL, null=True, blank=True, related_name='patients')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Recently changed rows; the patient export filters on it
+            models.Index(fields=['updated_at'], name='api_patient_updated_idx'),
+        ]
+
 class Appointment(models.Model):
     STATUS_CHOICES = (
         ('scheduled', 'Scheduled'),
@@ -95,16 +149,43 @@ class Appointment(models.Model):
     appointment_date = models.DateField()
     appointment_time = models.CharField(max_length=5) # e.g., '09:30'
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Appointment for {self.patient.name} with Dr. {self.doctor.name}"
 
+    class Meta:
+        indexes = [
+            # A doctor's schedule over a date range (doctor list, free slots)
+            models.Index(fields=['doctor', 'appointment_date'], name='api_appt_doctor_date_idx'),
+            # Day views and the (appointment_date, id) cursor ordering
+            models.Index(fields=['appointment_date'], name='api_appt_date_idx'),
+            # Recently changed rows
+            models.Index(fields=['updated_at'], name='api_appt_updated_idx'),
+        ]
+
+# Dose slots bitmask used for Medicine.frequency_mask: Breakfast = 1, Lunch = 2, Dinner = 4
+DOSE_SLOTS = ('Breakfast', 'Lunch', 'Dinner')
+DOSE_SLOT_BITS = {slot: 1 << index for index, slot in enumerate(DOSE_SLOTS)}
+MASK_DOSE_SLOTS = tuple(
+    tuple(slot for slot in DOSE_SLOTS if mask & DOSE_SLOT_BITS[slot]) for mask in range(1 << len(DOSE_SLOTS))
+)
+
+def frequency_mask(frequency):
+    """Bitmask for a comma-separated list of dose slots (unknown names are ignored)"""
+    mask = 0
+    for slot in (frequency or '').split(','):
+        mask |= DOSE_SLOT_BITS.get(slot.strip(), 0)
+    return mask
+
+class MedicineQuerySet(models.QuerySet):
+    def due_at(self, slot):
+        """Prescriptions taken at a dose slot, matched by IN over the masks containing it"""
+        bit = DOSE_SLOT_BITS[slot]
+        return self.filter(frequency_mask__in=[mask for mask in range(len(MASK_DOSE_SLOTS)) if mask & bit])
+
 class Medicine(models.Model):
-    FREQUENCY_CHOICES = (
-        ('Breakfast', 'Breakfast'),
-        ('Lunch', 'Lunch'),
-        ('Dinner', 'Dinner'),
-    )
+    FREQUENCY_CHOICES = tuple((slot, slot) for slot in DOSE_SLOTS)
     
     RELATION_TO_FOOD_CHOICES = (
         ('Before', 'Before'),
@@ -116,17 +197,26 @@ class Medicine(models.Model):
     medicine_name = models.CharField(max_length=100)
     dosage = models.CharField(max_length=50, help_text="e.g., '500mg', '1 tablet'")
     frequency = models.CharField(max_length=100, help_text="Comma-separated values: e.g., 'Breakfast,Dinner'")
+    # Derived from `frequency` on save; lets the database filter by dose slot
+    frequency_mask = models.PositiveSmallIntegerField(default=0, db_index=True, editable=False)
     relation_to_food = models.CharField(max_length=20, choices=RELATION_TO_FOOD_CHOICES)
     no_of_days = models.PositiveIntegerField()
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MedicineQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.frequency_mask = frequency_mask(self.frequency)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'frequency' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'frequency_mask'}
+        super().save(*args, **kwargs)
+
     def get_frequency_list(self):
         """Return frequency as a list"""
-        if self.frequency:
-            return [f.strip() for f in self.frequency.split(',')]
-        return []
+        return list(MASK_DOSE_SLOTS[self.frequency_mask])
     
     def set_frequency_list(self, frequency_list):
         """Set frequency from a list"""
@@ -134,6 +224,7 @@ class Medicine(models.Model):
             self.frequency = ','.join(frequency_list)
         else:
             self.frequency = ''
+        self.frequency_mask = frequency_mask(self.frequency)
 
     def __str__(self):
         return f"{self.medicine_name} for {self.patient.name}"
@@ -141,6 +232,14 @@ class Medicine(models.Model):
     class Meta:
         verbose_name = "Medicine"
         verbose_name_plural = "Medicines"
+        indexes = [
+            # A patient's prescriptions, newest first
+            models.Index(fields=['patient', '-created_at', '-id'], name='api_med_patient_created_idx'),
+            # Recently changed rows
+            models.Index(fields=['updated_at'], name='api_med_updated_idx'),
+            # The longest course, which bounds how far back a medication round reads
+            models.Index(fields=['no_of_days'], name='api_med_days_idx'),
+        ]
 
 class Diagnosis(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='diagnoses')
@@ -155,4 +254,70 @@ class Diagnosis(models.Model):
     class Meta:
         verbose_name = "Diagnosis"
         verbose_name_plural = "Diagnoses"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # A patient's diagnoses, newest first
+            models.Index(fields=['patient', '-created_at', '-id'], name='api_diag_patient_created_idx'),
+            # Recently changed rows
+            models.Index(fields=['updated_at'], name='api_diag_updated_idx'),
+        ]
+
+class Change(models.Model):
+    """
+    Latest write to an API row, kept by SQLite triggers for the ?since= change
+    feeds (api/changes.py). Each write replaces the row's entry with a new one,
+    so the AUTOINCREMENT id is a commit-ordered sequence to keep cursors on.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {'deleted' if self.deleted else 'changed'} at {self.id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id'], name='api_change_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['model', 'id'], name='api_change_model_idx'),
+        ]
+
+class ModelVersion(models.Model):
+    """Change counter per model, bumped with every write (api/versions.py); feeds the API ETags"""
+    model = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.model} v{self.version}"
+
+class WardOccupancy(models.Model):
+    """Bed counts per ward, adjusted with every Bed write inside its transaction (api/bed_summary.py)"""
+    ward = models.CharField(max_length=50, primary_key=True)
+    total = models.IntegerField(default=0)
+    occupied = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.ward}: {self.occupied}/{self.total}"
+
+class AuditEvent(models.Model):
+    """Append-only audit record written in batches by api/audit.py"""
+    ACTION_CHOICES = (
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    )
+    timestamp = models.DateTimeField(db_index=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    model = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    data = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.timestamp:%Y-%m-%d %H:%M:%S} {self.action} {self.model} #{self.object_id}"
+
+    class Meta:
+        ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['model', 'object_id'], name='api_audit_model_obj_idx'),
+        ]
@@ -0,0 +1,129 @@
+# api/pagination.py
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class CompatCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for the list endpoints.
+
+    Pages are located with a WHERE on the ordering columns instead of an
+    OFFSET, so page 1000 costs the same as page 1. Each ViewSet picks its own
+    ordering with a `cursor_ordering` attribute (defaults to newest id first);
+    `id` is added as the last column when missing, so the ordering is unique.
+
+    DRF's CursorPagination keys the cursor on the first ordering column only
+    and falls back to an OFFSET past rows that share its value, e.g. the
+    appointments of one day. Here the cursor holds the values of every
+    ordering column of the last row sent, and the next page starts right
+    after that row whatever the ties. Ordering columns must not be null.
+
+    Compatibility mode: existing clients that send neither `cursor` nor
+    `page_size` keep receiving the plain, unpaginated list.
+    """
+    ordering = ('-id',)
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is None:
+            ordering = super().get_ordering(request, queryset, view)
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._after(json.loads(position), reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # One extra row tells whether there is a page after this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_following
+        else:
+            self.has_next, self.has_previous = has_following, position is not None
+        if self.page:
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            self.previous_position = self.next_position = position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after(self, values, reverse):
+        """
+        Rows after `values` in the ordering (before them when reverse), as
+        a >= b AND (a > b OR ...) so the first column bounds an index range
+        and the rest only break ties within it.
+        """
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError('Cursor does not match the ordering')
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip('-')
+            op = 'lt' if field.startswith('-') != reverse else 'gt'
+            if condition is None:
+                condition = Q(**{f'{name}__{op}': value})
+            else:
+                condition = Q(**{f'{name}__{op}e': value}) & (Q(**{f'{name}__{op}': value}) | condition)
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ]
+        return json.dumps([str(value) for value in values], separators=(',', ':'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+
+class AlwaysCursorPagination(CompatCursorPagination):
+    """
+    Cursor pagination without the compatibility mode, for new endpoints whose
+    tables are too large to ever return whole.
+    """
+    def get_page_size(self, request):
+        return CursorPagination.get_page_size(self, request)
@@ -0,0 +1,102 @@
+# api/pdf_pool.py
+"""
+Bounded process pool for CPU-bound PDF rendering.
+
+Rendering runs in separate worker processes so a burst of report requests
+cannot hold the GIL of the process serving the rest of the API. Each worker
+builds the ReportLab styles once at startup (reports.warm_up), and every
+worker is started as soon as the pool is created, so only the first render
+after a restart waits for a process to spawn. When too many renders are
+already in flight, render() raises RenderQueueFull and the view answers 503
+with Retry-After instead of queueing without bound. A render counts as in
+flight until its worker is done with it, even after the caller timed out.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from . import reports
+
+
+class RenderQueueFull(Exception):
+    """Too many renders are already queued or running in this process."""
+
+
+_pool = None
+_lock = threading.Lock()
+_in_flight = 0
+
+
+def _ready():
+    """No-op run once per worker when the pool starts, so every worker is spawned and warmed up front"""
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        # Created lazily so every gunicorn worker gets its own pool after forking
+        if _pool is None:
+            context = multiprocessing.get_context(getattr(settings, 'PDF_RENDER_START_METHOD', 'spawn'))
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_RENDER_WORKERS,
+                mp_context=context,
+                initializer=reports.warm_up,
+            )
+            for _ in range(settings.PDF_RENDER_WORKERS):
+                _pool.submit(_ready)
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render(func, *args, reject_when_full=True):
+    """
+    Run func(*args) in the pool and return its result.
+
+    With reject_when_full, raises RenderQueueFull once PDF_RENDER_MAX_QUEUE
+    renders are in flight. PDF_RENDER_WORKERS = 0 renders in-process.
+    """
+    global _in_flight
+    if not getattr(settings, 'PDF_RENDER_WORKERS', 0):
+        return func(*args)
+
+    with _lock:
+        if reject_when_full and _in_flight >= settings.PDF_RENDER_MAX_QUEUE:
+            raise RenderQueueFull()
+        _in_flight += 1
+    try:
+        future = _get_pool().submit(func, *args)
+    except BrokenProcessPool:
+        _finished(None)
+        _discard_pool()
+        raise
+    except BaseException:
+        _finished(None)
+        raise
+    future.add_done_callback(_finished)
+    try:
+        return future.result(timeout=settings.PDF_RENDER_TIMEOUT)
+    except FuturesTimeoutError:
+        # Drop it if no worker has picked it up yet; a running render keeps
+        # its slot until it ends
+        future.cancel()
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        _discard_pool()
+        raise
+
+
+def _finished(future):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
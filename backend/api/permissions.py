@@ -7,6 +7,13 @@ class IsAdminOrReceptionist(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and request.user.role in ['admin', 'receptionist']
 
+class IsAdmin(permissions.BasePermission):
+    """
+    Allows access only to admin users.
+    """
+    def has_permission(self, request, view):
+        return request.user and request.user.is_authenticated and request.user.role == 'admin'
+
 class IsDoctor(permissions.BasePermission):
     """
     Allows access only to doctor users.
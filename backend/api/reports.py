@@ -0,0 +1,280 @@
+# api/reports.py
+"""
+Patient PDF report layout and the on-disk cache of rendered reports.
+
+Rendered files are content-addressed: the file name is a fingerprint of the
+rows printed in the report, so an unchanged patient is served straight from
+disk and a changed one simply gets a new file. The footer names the
+requesting user, so each user has their own copy; a new render only prunes
+that user's older copies of the report. Each patient's reports live in their
+own subdirectory, so pruning reads a handful of names however large the
+cache grows, and deleting the patient removes the directory. Files are
+handed out already open, so a copy pruned by a concurrent request stays
+readable until it is served.
+
+The render_* functions run inside the PDF worker processes (api/pdf_pool.py):
+they take plain data and a file path, never model instances, and use the
+styles built once per worker by warm_up().
+"""
+import datetime
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+
+def report_fingerprint(patient, medicines, diagnoses, generated_by):
+    """
+    Hash of everything the report prints: the patient fields, the ids and
+    updated_at of each medicine and diagnosis, and the requesting user (shown
+    in the footer).
+    """
+    parts = [
+        'patient', patient.id, patient.name, patient.age, patient.gender,
+        patient.contact, patient.address, patient.condition,
+        'medicines', *[(med.id, med.updated_at) for med in medicines],
+        'diagnoses', *[(diag.id, diag.updated_at) for diag in diagnoses],
+        'user', generated_by,
+    ]
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+
+def cache_dir():
+    path = getattr(settings, 'PDF_REPORT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'report_cache'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def report_context(patient, medicines, diagnoses, generated_by):
+    """Plain, picklable data printed in a patient report"""
+    return {
+        'patient': [
+            ['Patient Name:', patient.name],
+            ['Patient ID:', str(patient.id)],
+            ['Age:', str(patient.age)],
+            ['Gender:', patient.gender],
+            ['Contact:', patient.contact],
+            ['Address:', patient.address],
+            ['Condition:', patient.condition],
+        ],
+        'medicines': [
+            [
+                med.medicine_name,
+                med.dosage,
+                ', '.join(med.get_frequency_list()) or 'As needed',
+                med.created_at.strftime('%Y-%m-%d') if med.created_at else 'Not specified',
+            ]
+            for med in medicines
+        ],
+        'diagnoses': [
+            [
+                diag.diagnosis[:100] + '...' if len(diag.diagnosis) > 100 else diag.diagnosis,
+                'Diagnosis Details',  # Static description since no description field exists
+                diag.created_at.strftime('%Y-%m-%d') if diag.created_at else 'Not specified',
+            ]
+            for diag in diagnoses
+        ],
+        'generated_by': generated_by,
+    }
+
+
+def _patient_dir(patient_id):
+    return os.path.join(cache_dir(), f'patient_{patient_id}')
+
+
+def _report_prefix(generated_by):
+    return hashlib.sha256(generated_by.encode('utf-8')).hexdigest()[:16] + '_'
+
+
+def open_cached_report(patient_id, generated_by, fingerprint):
+    """The rendered report opened for reading, or None when it is not cached"""
+    path = os.path.join(_patient_dir(patient_id), f'{_report_prefix(generated_by)}{fingerprint}.pdf')
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        return None
+
+
+def store_report(patient_id, generated_by, fingerprint, render):
+    """
+    Call render(tmp_path) to write a temp file in the cache directory, then
+    atomically move it into place. The same user's older renders of the
+    patient are removed. Returns the new file, opened for reading.
+    """
+    directory = _patient_dir(patient_id)
+    os.makedirs(directory, exist_ok=True)
+    prefix = _report_prefix(generated_by)
+    name = f'{prefix}{fingerprint}.pdf'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        render(tmp_path)
+        report = open(tmp_path, 'rb')
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, os.path.join(directory, name))
+
+    for other in os.listdir(directory):
+        if other.startswith(prefix) and other.endswith('.pdf') and other != name:
+            try:
+                os.unlink(os.path.join(directory, other))
+            except FileNotFoundError:
+                pass
+    return report
+
+
+def discard_reports(patient_id):
+    """Remove every cached report of a patient"""
+    shutil.rmtree(_patient_dir(patient_id), ignore_errors=True)
+
+
+# Styles shared by every render in this process, built once by warm_up()
+_styles = None
+
+
+def warm_up():
+    """
+    Import ReportLab, load the standard font metrics and build the stylesheet,
+    paragraph styles and table styles. Runs once as the worker initializer.
+    """
+    global _styles
+    if _styles is not None:
+        return _styles
+
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.platypus import TableStyle
+
+    for font_name in ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'):
+        pdfmetrics.getFont(font_name)
+
+    styles = getSampleStyleSheet()
+    header_row = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.black),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]
+    _styles = {
+        'sheet': styles,
+        # Custom styles - Black and White theme
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=20,
+            spaceAfter=20,
+            textColor=colors.black,
+            alignment=1  # Center alignment
+        ),
+        'header': ParagraphStyle(
+            'CustomHeader',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=10,
+            textColor=colors.black
+        ),
+        'patient_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.white),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+        'medicine_table': TableStyle(header_row),
+        'diagnosis_table': TableStyle(header_row + [('VALIGN', (0, 0), (-1, -1), 'TOP')]),
+    }
+    return _styles
+
+
+def build_patient_report(output, context):
+    """Write the patient medical report PDF to a path or file-like object"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+    from reportlab.lib.units import inch
+
+    styles = warm_up()
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    story = []
+
+    # Title
+    story.append(Paragraph("Patient Medical Report", styles['title']))
+    story.append(Spacer(1, 20))
+
+    # Patient Information Section
+    story.append(Paragraph("Patient Information", styles['header']))
+    patient_table = Table(context['patient'], colWidths=[2*inch, 4*inch])
+    patient_table.setStyle(styles['patient_table'])
+    story.append(patient_table)
+    story.append(Spacer(1, 20))
+
+    # Medicines Section
+    story.append(Paragraph("Prescribed Medicines", styles['header']))
+    if context['medicines']:
+        medicine_data = [['Medicine Name', 'Dosage', 'Frequency', 'Date Prescribed']] + context['medicines']
+        medicine_table = Table(medicine_data, colWidths=[2*inch, 1.5*inch, 2*inch, 1.5*inch])
+        medicine_table.setStyle(styles['medicine_table'])
+        story.append(medicine_table)
+    else:
+        story.append(Paragraph("No medicines prescribed.", styles['sheet']['Normal']))
+
+    story.append(Spacer(1, 20))
+
+    # Diagnoses Section
+    story.append(Paragraph("Medical Diagnoses", styles['header']))
+    if context['diagnoses']:
+        diagnosis_data = [['Diagnosis', 'Description', 'Date']] + context['diagnoses']
+        diagnosis_table = Table(diagnosis_data, colWidths=[2*inch, 3*inch, 2*inch])
+        diagnosis_table.setStyle(styles['diagnosis_table'])
+        story.append(diagnosis_table)
+    else:
+        story.append(Paragraph("No diagnoses recorded.", styles['sheet']['Normal']))
+
+    story.append(Spacer(1, 30))
+
+    # Footer
+    footer_text = f"""
+    <para align="center">
+        <b>Report Generated:</b> {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>
+        <b>Generated by:</b> {context['generated_by']}<br/>
+        <i>Hospital Management System</i>
+    </para>
+    """
+    story.append(Paragraph(footer_text, styles['sheet']['Normal']))
+
+    # Build the PDF
+    doc.build(story)
+
+
+def render_patient_report(path, context):
+    """Worker entry point: render a patient report into `path`"""
+    build_patient_report(path, context)
+    return path
+
+
+def render_test_pdf(path, username):
+    """Worker entry point: render the simple test PDF into `path`"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph
+
+    styles = warm_up()['sheet']
+    doc = SimpleDocTemplate(path, pagesize=A4)
+    story = [
+        Paragraph("Test PDF Generation", styles['Title']),
+        Paragraph("This is a test PDF to verify the functionality is working.", styles['Normal']),
+        Paragraph(f"Generated at: {datetime.datetime.now()}", styles['Normal']),
+        Paragraph(f"User: {username}", styles['Normal']),
+    ]
+    doc.build(story)
+    return path
@@ -0,0 +1,92 @@
+# api/search.py
+"""
+Full-text search over patients, diagnoses and medicines.
+
+The index is the SQLite FTS5 table api_search_index (migration 0009). One row
+per patient (name and condition), diagnosis (notes) and medicine (name), kept
+in sync by triggers on the source tables, so bulk_create, queryset.update()
+and cascading deletes are covered as well as model saves.
+
+Free text is turned into an FTS5 query of quoted prefix terms, all of which
+must match; hits are ranked by bm25 with the title column (patient and
+medicine names) weighted above the body.
+"""
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+KINDS = ('patient', 'diagnosis', 'medicine')
+
+# bm25 column weights: kind, object_id, patient_id (unindexed), title, body
+_RANK = "bm25(api_search_index, 0.0, 0.0, 0.0, 5.0, 1.0)"
+
+
+def match_expression(text):
+    """
+    FTS5 query for free text: every word becomes a quoted prefix term, so
+    operators and punctuation typed by the user are never parsed. Returns
+    None when there is nothing to search for.
+    """
+    terms = re.findall(r'\w+', text or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search(text, patients, kinds=KINDS, limit=20, offset=0):
+    """
+    Ranked hits for `text` among rows belonging to the `patients` queryset, as
+    dicts with kind, id, patient_id, patient_name, title and snippet. One query.
+    """
+    match = match_expression(text)
+    if match is None or not kinds:
+        return []
+    try:
+        patients_sql, patients_params = patients.values('id').query.sql_with_params()
+    except EmptyResultSet:
+        # The user may see no patients at all
+        return []
+
+    sql = f"""
+        SELECT api_search_index.kind, api_search_index.object_id, api_search_index.patient_id,
+               p.name, api_search_index.title,
+               snippet(api_search_index, -1, '[', ']', '...', 12)
+        FROM api_search_index
+        JOIN api_patient p ON p.id = api_search_index.patient_id
+        WHERE api_search_index MATCH %s
+          AND api_search_index.kind IN ({', '.join(['%s'] * len(kinds))})
+          AND api_search_index.patient_id IN ({patients_sql})
+        ORDER BY {_RANK}
+        LIMIT %s OFFSET %s
+    """
+    params = [match, *kinds, *patients_params, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {
+            'kind': kind,
+            'id': object_id,
+            'patient_id': patient_id,
+            'patient_name': patient_name,
+            'title': title or patient_name,
+            'snippet': snippet,
+        }
+        for kind, object_id, patient_id, patient_name, title, snippet in rows
+    ]
+
+
+def matching_ids(text, kind, column='object_id'):
+    """
+    RawSQL subquery of `column` (object_id or patient_id) for index rows of
+    `kind` matching `text`, for use in queryset filters such as id__in.
+    """
+    match = match_expression(text)
+    if match is None:
+        return None
+    return RawSQL(
+        f"SELECT {column} FROM api_search_index WHERE api_search_index MATCH %s AND kind = %s",
+        (match, kind),
+    )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Doctor, Patient, Bed, Appointment, Medicine, Diagnosis
+from .models import Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, AuditEvent, DOSE_SLOTS
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -22,8 +22,8 @@ class DoctorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Doctor
         # Include all fields from Doctor model and the new user fields
-        fields = ['id', 'user', 'first_name', 'last_name', 'full_name', 'email', 'specialization', 'contact', 'availability', 'available_days']
-        read_only_fields = ['user'] # User should not be changed directly via API
+        fields = ['id', 'user', 'first_name', 'last_name', 'full_name', 'email', 'specialization', 'contact', 'availability', 'availability_mask', 'available_days']
+        read_only_fields = ['user', 'availability_mask'] # User should not be changed directly via API
     
     def get_available_days(self, obj):
         """Get list of available days for the doctor"""
@@ -121,17 +121,16 @@ class MedicineSerializer(serializers.ModelSerializer):
     class Meta:
         model = Medicine
         fields = '__all__'
+        read_only_fields = ['frequency_mask']
     
     def get_frequency_list(self, obj):
-        """Convert comma-separated frequency string to list for frontend display"""
-        if obj.frequency:
-            return obj.frequency.split(',')
-        return []
+        """Dose slots as a list for frontend display, read from the stored bitmask"""
+        return obj.get_frequency_list()
     
     def validate_frequency(self, value):
         """Validate that frequency contains valid choices"""
         if value:
-            frequency_choices = ['Breakfast', 'Lunch', 'Dinner']
+            frequency_choices = list(DOSE_SLOTS)
             frequencies = [f.strip() for f in value.split(',')]
             
             for freq in frequencies:
@@ -149,4 +148,9 @@ class DiagnosisSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Diagnosis
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = '__all__'
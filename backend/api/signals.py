@@ -1,25 +1,12 @@
 # api/signals.py
-from django.db.models.signals import post_save, pre_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete, post_init
 from django.dispatch import receiver
-from django.utils import timezone
 from .models import CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis
-import logging
-
-# Configure console logger for audit trails
-logger = logging.getLogger('audit_console')
-logger.setLevel(logging.INFO)
-
-# Create console handler if it doesn't exist
-if not logger.handlers:
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        '🔍 AUDIT LOG [{asctime}] {levelname}: {message}',
-        style='{',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+from . import audit, bed_summary, reports, versions
+
+# Audit receivers record only values already on the instance (ids, not related
+# objects), so logging never issues a query; api/audit.py writes them in batches.
 
 @receiver(post_save, sender=CustomUser)
 def create_doctor_profile(sender, instance, created, **kwargs):
@@ -27,8 +14,8 @@ def create_doctor_profile(sender, instance, created, **kwargs):
     Automatically create a Doctor profile when a CustomUser with the 'doctor' role is created.
     """
     if created and instance.role == 'doctor':
-        Doctor.objects.create(user=instance)
-        logger.info(f"👨‍⚕️ NEW DOCTOR CREATED: {instance.username} ({instance.get_full_name()}) - Role: {instance.role}")
+        doctor = Doctor.objects.create(user=instance)
+        audit.record('create', 'Doctor', doctor.id, user=instance.id, username=instance.username)
 
 @receiver(post_save, sender=CustomUser)
 def save_doctor_profile(sender, instance, **kwargs):
@@ -38,6 +25,21 @@ def save_doctor_profile(sender, instance, **kwargs):
     if instance.role == 'doctor' and hasattr(instance, 'doctor_profile'):
         instance.doctor_profile.save()
 
+@receiver(post_save, sender=CustomUser)
+def refresh_cached_user(sender, instance, **kwargs):
+    """
+    Drop the user from the JWT user cache now and reload it once the change
+    commits, so a new role or a deactivation applies to tokens already issued.
+    """
+    from .authentication import user_cache
+    user_cache.invalidate(instance.pk)
+    transaction.on_commit(lambda: user_cache.reload(instance.pk))
+
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    from .authentication import user_cache
+    user_cache.invalidate(instance.pk)
+
 @receiver(pre_save, sender=Patient)
 def track_bed_changes(sender, instance, **kwargs):
     """
@@ -60,37 +62,32 @@ def update_bed_occupancy_on_patient_save(sender, instance, created, **kwargs):
     old_bed = getattr(instance, '_old_assigned_bed', None)
     new_bed = instance.assigned_bed
     
-    # Log patient creation or update
-    if created:
-        bed_info = f" | Bed: {new_bed}" if new_bed else " | No bed assigned"
-        doctor_info = f" | Doctor: {instance.assigned_doctor}" if instance.assigned_doctor else " | No doctor assigned"
-        logger.info(f"👤 NEW PATIENT CREATED: {instance.name} (ID: {instance.id}) | Age: {instance.age} | Gender: {instance.gender}{bed_info}{doctor_info}")
-    else:
-        logger.info(f"👤 PATIENT UPDATED: {instance.name} (ID: {instance.id})")
+    audit.record(
+        'create' if created else 'update', 'Patient', instance.id,
+        name=instance.name, bed=instance.assigned_bed_id, doctor=instance.assigned_doctor_id,
+    )
     
     # If old bed exists and is different from new bed, mark it as unoccupied
     if old_bed and old_bed != new_bed:
         old_bed.is_occupied = False
         old_bed.save()
-        logger.info(f"🛏️ BED FREED: {old_bed} | Patient: {instance.name} moved out")
     
     # If new bed exists, mark it as occupied
     if new_bed:
         new_bed.is_occupied = True
         new_bed.save()
-        if old_bed != new_bed:  # Only log if bed actually changed
-            logger.info(f"🛏️ BED ASSIGNED: {new_bed} | Patient: {instance.name} moved in")
 
 @receiver(post_delete, sender=Patient)
 def update_bed_occupancy_on_patient_delete(sender, instance, **kwargs):
     """
     Mark bed as unoccupied when patient is deleted.
     """
-    logger.info(f"🗑️ PATIENT DELETED: {instance.name} (ID: {instance.id})")
+    audit.record('delete', 'Patient', instance.id, name=instance.name, bed=instance.assigned_bed_id)
     if instance.assigned_bed:
         instance.assigned_bed.is_occupied = False
         instance.assigned_bed.save()
-        logger.info(f"🛏️ BED FREED: {instance.assigned_bed} | Patient {instance.name} deleted")
+    patient_id = instance.id
+    transaction.on_commit(lambda: reports.discard_reports(patient_id))
 
 # Appointment Audit Logging
 @receiver(post_save, sender=Appointment)
@@ -98,17 +95,18 @@ def log_appointment_changes(sender, instance, created, **kwargs):
     """
     Log appointment creation and updates.
     """
-    if created:
-        logger.info(f"📅 NEW APPOINTMENT CREATED: Patient {instance.patient.name} with Dr. {instance.doctor} | Date: {instance.appointment_date} at {instance.appointment_time} | Status: {instance.status}")
-    else:
-        logger.info(f"📅 APPOINTMENT UPDATED: ID {instance.id} | Patient: {instance.patient.name} | Status: {instance.status} | Date: {instance.appointment_date}")
+    audit.record(
+        'create' if created else 'update', 'Appointment', instance.id,
+        patient=instance.patient_id, doctor=instance.doctor_id,
+        date=str(instance.appointment_date), time=instance.appointment_time, status=instance.status,
+    )
 
 @receiver(post_delete, sender=Appointment)
 def log_appointment_deletion(sender, instance, **kwargs):
     """
     Log appointment deletions.
     """
-    logger.info(f"🗑️ APPOINTMENT DELETED: ID {instance.id} | Patient: {instance.patient.name} | Date: {instance.appointment_date}")
+    audit.record('delete', 'Appointment', instance.id, patient=instance.patient_id, date=str(instance.appointment_date))
 
 # Medicine Audit Logging
 @receiver(post_save, sender=Medicine)
@@ -116,17 +114,18 @@ def log_medicine_prescription(sender, instance, created, **kwargs):
     """
     Log medicine prescriptions and updates.
     """
-    if created:
-        logger.info(f"💊 NEW MEDICINE PRESCRIBED: {instance.medicine_name} ({instance.dosage}) | Patient: {instance.patient.name} | Frequency: {instance.frequency} | Days: {instance.no_of_days}")
-    else:
-        logger.info(f"💊 MEDICINE PRESCRIPTION UPDATED: ID {instance.id} | {instance.medicine_name} | Patient: {instance.patient.name}")
+    audit.record(
+        'create' if created else 'update', 'Medicine', instance.id,
+        patient=instance.patient_id, medicine=instance.medicine_name, dosage=instance.dosage,
+        frequency=instance.frequency, days=instance.no_of_days,
+    )
 
 @receiver(post_delete, sender=Medicine)
 def log_medicine_deletion(sender, instance, **kwargs):
     """
     Log medicine prescription deletions.
     """
-    logger.info(f"🗑️ MEDICINE PRESCRIPTION DELETED: {instance.medicine_name} | Patient: {instance.patient.name}")
+    audit.record('delete', 'Medicine', instance.id, patient=instance.patient_id, medicine=instance.medicine_name)
 
 # Diagnosis Audit Logging
 @receiver(post_save, sender=Diagnosis)
@@ -134,17 +133,14 @@ def log_diagnosis_changes(sender, instance, created, **kwargs):
     """
     Log diagnosis creation and updates.
     """
-    if created:
-        logger.info(f"🩺 NEW DIAGNOSIS ADDED: Patient {instance.patient.name} | Diagnosis: {instance.diagnosis[:100]}...")
-    else:
-        logger.info(f"🩺 DIAGNOSIS UPDATED: ID {instance.id} | Patient: {instance.patient.name}")
+    audit.record('create' if created else 'update', 'Diagnosis', instance.id, patient=instance.patient_id)
 
 @receiver(post_delete, sender=Diagnosis)
 def log_diagnosis_deletion(sender, instance, **kwargs):
     """
     Log diagnosis deletions.
     """
-    logger.info(f"🗑️ DIAGNOSIS DELETED: ID {instance.id} | Patient: {instance.patient.name}")
+    audit.record('delete', 'Diagnosis', instance.id, patient=instance.patient_id)
 
 # Bed Management Audit Logging
 @receiver(post_save, sender=Bed)
@@ -152,16 +148,58 @@ def log_bed_changes(sender, instance, created, **kwargs):
     """
     Log bed creation and status changes.
     """
-    if created:
-        logger.info(f"🛏️ NEW BED CREATED: {instance.bed_number} in {instance.ward} | Status: {'Occupied' if instance.is_occupied else 'Available'}")
-    else:
-        status = 'Occupied' if instance.is_occupied else 'Available'
-        patient_info = f" | Patient: {instance.patient.name}" if hasattr(instance, 'patient') and instance.patient else ""
-        logger.info(f"🛏️ BED STATUS CHANGED: {instance.bed_number} in {instance.ward} | Status: {status}{patient_info}")
+    audit.record(
+        'create' if created else 'update', 'Bed', instance.id,
+        bed_number=instance.bed_number, ward=instance.ward, occupied=instance.is_occupied,
+    )
 
 @receiver(post_delete, sender=Bed)
 def log_bed_deletion(sender, instance, **kwargs):
     """
     Log bed deletions.
     """
-    logger.info(f"🗑️ BED DELETED: {instance.bed_number} in {instance.ward}")
\ No newline at end of file
+    audit.record('delete', 'Bed', instance.id, bed_number=instance.bed_number, ward=instance.ward)
+
+# Ward occupancy summary (see api/bed_summary.py)
+# Patient bed assignments reach these receivers through the Bed saves made by
+# update_bed_occupancy_on_patient_save / update_bed_occupancy_on_patient_delete.
+@receiver(post_init, sender=Bed)
+def remember_bed_occupancy(sender, instance, **kwargs):
+    """
+    Remember the ward and occupancy the bed was loaded with, so saves can be
+    applied to the summary as a delta without re-reading the row.
+    """
+    instance._loaded_occupancy = (instance.ward, instance.is_occupied) if instance.pk else None
+
+@receiver(post_save, sender=Bed)
+def update_bed_summary_on_save(sender, instance, created, **kwargs):
+    """
+    Apply the change in ward/occupancy to the per-ward counters.
+    """
+    old = getattr(instance, '_loaded_occupancy', None)
+    new = (instance.ward, instance.is_occupied)
+    if created or old is None:
+        bed_summary.apply_delta(instance.ward, total=1, occupied=int(instance.is_occupied))
+    elif old != new:
+        bed_summary.apply_delta(old[0], total=-1, occupied=-int(old[1]))
+        bed_summary.apply_delta(new[0], total=1, occupied=int(new[1]))
+    instance._loaded_occupancy = new
+
+@receiver(post_delete, sender=Bed)
+def update_bed_summary_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted bed from the per-ward counters.
+    """
+    ward, is_occupied = getattr(instance, '_loaded_occupancy', None) or (instance.ward, instance.is_occupied)
+    bed_summary.apply_delta(ward, total=-1, occupied=-int(is_occupied))
+
+# Model version counters behind the API ETags (see api/versions.py). The bump
+# runs inside the saving transaction, so it commits or rolls back with the row.
+VERSIONED_MODELS = (CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis)
+
+def bump_model_version(sender, **kwargs):
+    versions.bump(sender.__name__)
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=_model, dispatch_uid=f'bump_version_save_{_model.__name__}')
+    post_delete.connect(bump_model_version, sender=_model, dispatch_uid=f'bump_version_delete_{_model.__name__}')
@@ -0,0 +1,118 @@
+# api/slots.py
+"""
+Free appointment slot computation.
+
+A doctor's day is split into fixed slots (APPOINTMENT_DAY_START to
+APPOINTMENT_DAY_END, APPOINTMENT_SLOT_MINUTES long). Booked, non-cancelled
+appointments for every requested doctor over the whole date range are read in
+a single query and indexed per doctor in memory; open slots are then the
+weekday availability minus that index.
+
+appointment_time is free text, so a booking blocks the slot its time falls
+in: '9:30' and '09:30:00' take the 09:30 slot, '09:15' the 09:00 one. Times
+that cannot be read or fall outside the working day block nothing.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Appointment
+
+
+def _minutes(value):
+    """Minutes after midnight of an 'H:MM' or 'HH:MM[:SS]' time, or None"""
+    parts = str(value).strip().split(':')
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        return None
+    hours, minutes = int(parts[0]), int(parts[1])
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def _grid():
+    """(first slot start, end of day, slot length), in minutes"""
+    return (
+        _minutes(getattr(settings, 'APPOINTMENT_DAY_START', '09:00')),
+        _minutes(getattr(settings, 'APPOINTMENT_DAY_END', '17:00')),
+        getattr(settings, 'APPOINTMENT_SLOT_MINUTES', 30),
+    )
+
+
+def day_slots():
+    """All slot start times of a working day, as 'HH:MM' strings"""
+    start, end, step = _grid()
+    return [f'{minute // 60:02d}:{minute % 60:02d}' for minute in range(start, end - step + 1, step)]
+
+
+def slot_of(appointment_time):
+    """The 'HH:MM' slot a booked time falls in, or None when it is unreadable or off the working day"""
+    minute = _minutes(appointment_time)
+    start, end, step = _grid()
+    if minute is None or minute < start:
+        return None
+    slot = start + (minute - start) // step * step
+    if slot + step > end:
+        return None
+    return f'{slot // 60:02d}:{slot % 60:02d}'
+
+
+class DoctorSlotIndex:
+    """Booked appointment times of one doctor, keyed by date"""
+
+    def __init__(self, doctor):
+        self.doctor = doctor
+        self.availability_mask = doctor.availability_mask
+        self.booked = defaultdict(set)
+
+    def book(self, appointment_date, appointment_time):
+        slot = slot_of(appointment_time)
+        if slot is not None:
+            self.booked[appointment_date].add(slot)
+
+    def is_working(self, day):
+        return bool(self.availability_mask & (1 << day.weekday()))
+
+    def free_on(self, day, slots, not_before=None):
+        if not self.is_working(day):
+            return []
+        booked = self.booked.get(day, ())
+        return [slot for slot in slots if slot not in booked and (not_before is None or slot >= not_before)]
+
+
+def free_slots(doctors, start_date, end_date, now=None):
+    """
+    Open slots for each doctor from start_date to end_date inclusive, as
+    {doctor_id: {date: ['HH:MM', ...]}}. Days with no open slot are left out.
+    """
+    now = now or datetime.datetime.now()
+    indexes = {doctor.id: DoctorSlotIndex(doctor) for doctor in doctors}
+
+    booked = (
+        Appointment.objects.filter(
+            doctor_id__in=indexes.keys(),
+            appointment_date__gte=start_date,
+            appointment_date__lte=end_date,
+        )
+        .exclude(status='cancelled')
+        .values_list('doctor_id', 'appointment_date', 'appointment_time')
+    )
+    for doctor_id, appointment_date, appointment_time in booked:
+        indexes[doctor_id].book(appointment_date, appointment_time)
+
+    slots = day_slots()
+    result = {}
+    for doctor_id, index in indexes.items():
+        days = {}
+        day = start_date
+        while day <= end_date:
+            # Slots earlier today have already passed
+            not_before = now.strftime('%H:%M') if day == now.date() else None
+            if day >= now.date():
+                free = index.free_on(day, slots, not_before)
+                if free:
+                    days[day] = free
+            day += datetime.timedelta(days=1)
+        result[doctor_id] = days
+    return result
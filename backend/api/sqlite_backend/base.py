@@ -0,0 +1,61 @@
+# api/sqlite_backend/base.py
+"""
+SQLite database backend tuned for several web workers sharing one file.
+
+Django's sqlite3 backend opens the file with the driver defaults: rollback
+journal, synchronous=FULL and deferred transactions. Every new connection
+here is set up with the PRAGMAs in OPTIONS['pragmas'] (WAL by default, so
+readers never block the writer), and transactions start with
+BEGIN IMMEDIATE. A deferred transaction that reads first and writes later
+cannot wait for the write lock, so it fails with "database is locked";
+IMMEDIATE takes the lock up front and waits up to busy_timeout for it.
+
+    'ENGINE': 'api.sqlite_backend',
+    'OPTIONS': {
+        'transaction_mode': 'IMMEDIATE',   # or DEFERRED / EXCLUSIVE
+        'pragmas': {'busy_timeout': 5000, ...},
+    },
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Safe with WAL: a power cut can lose the last commits, never corrupt
+    'synchronous': 'NORMAL',
+    # Negative values are KiB: 20 MB page cache per connection
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def apply_pragmas(connection, pragmas):
+    """Run PRAGMA name = value for each item on a DB-API sqlite3 connection"""
+    for name, value in pragmas.items():
+        if not str(name).isidentifier():
+            raise ImproperlyConfigured(f"Invalid SQLite pragma name: {name!r}")
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **(params.pop('pragmas', None) or {})}
+        self.transaction_mode = params.pop('transaction_mode', 'IMMEDIATE').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+            )
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
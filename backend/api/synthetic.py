@@ -0,0 +1,294 @@
+# api/synthetic.py
+"""
+Seeded synthetic hospital data for load testing: doctors, beds in every ward,
+patients, appointments, prescriptions and diagnoses.
+
+The same seed and counts always produce the same values (ids depend on the
+rows already in the database). The distributions roughly follow a real ward:
+
+- a few doctors carry most of the patients and appointments;
+- about OCCUPANCY of the beds are taken, and wards differ in size;
+- patient ages spread around the mid-fifties;
+- appointments fall on the doctor's working days, in the slots of
+  api/slots.py, over the past PAST_DAYS and the next FUTURE_DAYS days. Past
+  appointments are mostly completed and future ones mostly scheduled;
+- prescriptions and diagnoses were written at random times over the past
+  PAST_DAYS days, so only some courses are still running.
+
+Rows are written with bulk_create in batches, one transaction per batch, and
+only the ids needed to link later tables are kept, so memory stays small.
+The model signals are bypassed: the masks and bed occupancy are set here,
+the ward counters follow each batch of beds and admissions, the version
+counters are bumped at the end, and no audit events are written. The full-text search triggers still index
+patients, diagnoses and medicines as they are inserted.
+"""
+import random
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+
+from .models import (
+    CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, frequency_mask, weekday_mask,
+)
+from . import bed_summary, slots, versions
+
+OCCUPANCY = 0.85
+PAST_DAYS = 180
+FUTURE_DAYS = 30
+# Rows per UPDATE when backdating, to stay well under SQLite's variable limit
+BACKDATE_CHUNK = 500
+
+FIRST_NAMES = (
+    'Aarav', 'Aisha', 'Ananya', 'Arjun', 'Carlos', 'Chen', 'Deepa', 'Elena', 'Fatima', 'Grace', 'Hiro',
+    'Isabel', 'James', 'Kavya', 'Lakshmi', 'Liam', 'Maria', 'Mohammed', 'Nadia', 'Noah', 'Olivia', 'Priya',
+    'Rahul', 'Ravi', 'Sara', 'Sofia', 'Suresh', 'Tariq', 'Uma', 'Vikram', 'Wei', 'Yusuf', 'Zara',
+)
+LAST_NAMES = (
+    'Ahmed', 'Brown', 'Das', 'Fernandes', 'Garcia', 'Gowda', 'Gupta', 'Hegde', 'Iyer', 'Johnson', 'Khan',
+    'Kumar', 'Lee', 'Martin', 'Menon', 'Nair', 'Patel', 'Rao', 'Reddy', 'Rossi', 'Shah', 'Sharma', 'Singh',
+    'Smith', 'Tanaka', 'Wang', 'Williams', 'Zhang',
+)
+SPECIALIZATIONS = (
+    ('General Medicine', 30), ('Cardiology', 12), ('Orthopedics', 12), ('Pediatrics', 10), ('Neurology', 8),
+    ('Pulmonology', 8), ('Gastroenterology', 8), ('Oncology', 6), ('Nephrology', 6),
+)
+AVAILABILITY = (
+    ('Monday,Tuesday,Wednesday,Thursday,Friday', 60), ('Monday,Wednesday,Friday', 15),
+    ('Tuesday,Thursday,Saturday', 15), ('Monday,Tuesday,Wednesday,Thursday,Friday,Saturday,Sunday', 10),
+)
+WARD_WEIGHTS = (5, 3, 2)
+GENDERS, GENDER_WEIGHTS = ('Female', 'Male', 'Other'), (49, 98, 100)
+CONDITIONS = (
+    ('Hypertension monitoring', 14), ('Type 2 diabetes', 12), ('Community-acquired pneumonia', 8),
+    ('Post-surgery recovery', 10), ('Fractured femur', 5), ('Chronic kidney disease', 5), ('Asthma exacerbation', 6),
+    ('Acute gastroenteritis', 7), ('Congestive heart failure', 6), ('Migraine', 4), ('Observation', 23),
+)
+MEDICINES = (
+    ('Paracetamol', '500mg', 20), ('Amoxicillin', '250mg', 10), ('Metformin', '500mg', 10),
+    ('Amlodipine', '5mg', 9), ('Atorvastatin', '20mg', 9), ('Omeprazole', '20mg', 9), ('Ibuprofen', '400mg', 8),
+    ('Lisinopril', '10mg', 7), ('Salbutamol', '2 puffs', 5), ('Insulin glargine', '10 units', 4),
+    ('Furosemide', '40mg', 4), ('Ceftriaxone', '1g', 5),
+)
+FREQUENCIES = (
+    ('Breakfast,Dinner', 35), ('Breakfast', 20), ('Breakfast,Lunch,Dinner', 20), ('Dinner', 15), ('Lunch', 10),
+)
+RELATIONS = (('After', 60), ('Before', 30), ('With', 10))
+COURSE_DAYS = ((3, 10), (5, 25), (7, 25), (10, 10), (14, 12), (30, 12), (90, 6))
+DIAGNOSIS_NOTES = (
+    '{condition}. Vitals stable, continue current plan.',
+    '{condition}. Responding to treatment; review in 48 hours.',
+    '{condition}. Symptoms improving, reduce monitoring frequency.',
+    '{condition}. Labs ordered; awaiting results before adjusting medication.',
+    '{condition}. Discussed care plan with patient and family.',
+)
+
+
+def _weighted(choices):
+    """Split ((value..., weight), ...) into the values and their cumulative weights"""
+    values = [choice[:-1] if len(choice) > 2 else choice[0] for choice in choices]
+    return values, list(accumulate(choice[-1] for choice in choices))
+
+
+class Generator:
+    """
+    One seeded run. generate() inserts everything and returns the number of
+    rows created per model; `log` receives a line as each model finishes.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, prefix='syn', log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.log = log or (lambda message: None)
+        self.today = date.today()
+        self.created = {}
+
+    def generate(self, doctors=20, beds=300, patients=1000, appointments=5000, medicines=2000, diagnoses=1000):
+        doctor_ids, doctor_masks = self.doctors(doctors)
+        bed_ids = self.beds(beds)
+        patient_ids, patient_doctors = self.patients(patients, doctor_ids, bed_ids)
+        self.appointments(appointments, patient_ids, patient_doctors, doctor_ids, doctor_masks)
+        self.medicines(medicines, patient_ids)
+        self.diagnoses(diagnoses, patient_ids)
+        versions.bump('CustomUser', 'Doctor', 'Bed', 'Patient', 'Appointment', 'Medicine', 'Diagnosis')
+        return self.created
+
+    def insert(self, model, rows, backdate=False, counted=False):
+        """
+        bulk_create `rows` (an iterable of unsaved instances) in batches; returns
+        the new ids. With backdate, created_at and updated_at (set to now by
+        auto_now_add and auto_now) are moved to random times in the past. With
+        counted (beds), each batch is added to the ward counters.
+        """
+        ids = array('q')
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                ids.extend(self._flush(model, batch, backdate, counted))
+                batch = []
+        if batch:
+            ids.extend(self._flush(model, batch, backdate, counted))
+        self.created[model.__name__] = len(ids)
+        self.log(f'{model.__name__}: {len(ids)}')
+        return ids
+
+    def _flush(self, model, batch, backdate=False, counted=False):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+            ids = [obj.id for obj in batch]
+            if counted:
+                bed_summary.apply_deltas((bed.ward, 1, int(bed.is_occupied)) for bed in batch)
+            if backdate:
+                now = datetime.now()
+                for start in range(0, len(ids), BACKDATE_CHUNK):
+                    chunk = ids[start:start + BACKDATE_CHUNK]
+                    written = Case(
+                        *[When(id=pk, then=Value(now - timedelta(seconds=self.rng.randrange(PAST_DAYS * 86400))))
+                          for pk in chunk],
+                        output_field=DateTimeField(),
+                    )
+                    model.objects.filter(id__in=chunk).update(created_at=written, updated_at=written)
+        return ids
+
+    def _people(self, count):
+        return ((self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)) for _ in range(count))
+
+    def doctors(self, count):
+        if count < 1:
+            raise ValueError('At least one doctor is needed')
+        password = make_password('password123')  # hashed once, shared by every generated doctor
+        users = self.insert(CustomUser, (
+            CustomUser(
+                username=f'{self.prefix}_dr{i}', first_name=first, last_name=last, role='doctor',
+                email=f'{self.prefix}_dr{i}@hospital.test', password=password,
+            )
+            for i, (first, last) in enumerate(self._people(count))
+        ))
+        specializations, specialization_weights = _weighted(SPECIALIZATIONS)
+        availabilities, availability_weights = _weighted(AVAILABILITY)
+        profiles = []
+        for user_id in users:
+            specialization = self.rng.choices(specializations, cum_weights=specialization_weights)[0]
+            availability = self.rng.choices(availabilities, cum_weights=availability_weights)[0]
+            profiles.append(Doctor(
+                user_id=user_id, specialization=specialization,
+                contact=f'555-{self.rng.randrange(10000):04d}', availability=availability,
+                availability_mask=weekday_mask(availability),
+            ))
+        ids = self.insert(Doctor, profiles)
+        return ids, [profile.availability_mask for profile in profiles]
+
+    def beds(self, count):
+        wards = [ward for ward, _ in Bed.WARD_CHOICES]
+        ward_weights = (WARD_WEIGHTS * len(wards))[:len(wards)]
+        return self.insert(Bed, (
+            Bed(bed_number=f'{self.prefix}{i}', ward=self.rng.choices(wards, ward_weights)[0])
+            for i in range(count)
+        ), counted=True)
+
+    def _doctor_weights(self, count):
+        # A few doctors carry most of the load
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(count)]
+        self.rng.shuffle(weights)
+        return list(accumulate(weights))
+
+    def patients(self, count, doctor_ids, bed_ids):
+        occupied = min(count, int(len(bed_ids) * OCCUPANCY))
+        bed_order = list(bed_ids)
+        self.rng.shuffle(bed_order)
+        admitted = dict(zip(self.rng.sample(range(count), occupied), bed_order))
+        doctor_range, doctor_weights = range(len(doctor_ids)), self._doctor_weights(len(doctor_ids))
+        conditions, condition_weights = _weighted(CONDITIONS)
+        patient_doctors = array('q')
+
+        def rows():
+            for i, (first, last) in enumerate(self._people(count)):
+                doctor_index = self.rng.choices(doctor_range, cum_weights=doctor_weights)[0]
+                patient_doctors.append(doctor_index)
+                yield Patient(
+                    name=f'{first} {last}', age=min(max(int(self.rng.gauss(55, 20)), 0), 100),
+                    gender=self.rng.choices(GENDERS, cum_weights=GENDER_WEIGHTS)[0],
+                    contact=f'555-{self.rng.randrange(10000):04d}',
+                    emergency_contact=f'555-{self.rng.randrange(10000):04d}',
+                    address=f'{self.rng.randrange(1, 999)} {self.rng.choice(LAST_NAMES)} Road',
+                    condition=self.rng.choices(conditions, cum_weights=condition_weights)[0],
+                    assigned_bed_id=admitted.get(i), assigned_doctor_id=doctor_ids[doctor_index],
+                )
+
+        ids = self.insert(Patient, rows())
+        taken, now = list(admitted.values()), datetime.now()
+        for start in range(0, len(taken), self.batch_size):
+            with transaction.atomic():
+                beds = Bed.objects.filter(id__in=taken[start:start + self.batch_size])
+                wards = list(beds.values_list('ward', flat=True))
+                beds.update(is_occupied=True, updated_at=now)
+                bed_summary.apply_deltas((ward, 0, 1) for ward in wards)
+        return ids, patient_doctors
+
+    def appointments(self, count, patient_ids, patient_doctors, doctor_ids, doctor_masks):
+        if not patient_ids:
+            return
+        working = [[day for day in range(7) if mask & (1 << day)] for mask in doctor_masks]
+        day_slots = slots.day_slots()
+
+        def rows():
+            for _ in range(count):
+                patient_index = self.rng.randrange(len(patient_ids))
+                # Most visits are with the patient's own doctor
+                doctor_index = patient_doctors[patient_index] if self.rng.random() < 0.8 \
+                    else self.rng.randrange(len(doctor_ids))
+                day = self.today + timedelta(days=self.rng.randint(-PAST_DAYS, FUTURE_DAYS))
+                days = working[doctor_index]
+                if days:
+                    # Move forward to the doctor's next working day
+                    day += timedelta(days=min((weekday - day.weekday()) % 7 for weekday in days))
+                if day < self.today:
+                    status = 'completed' if self.rng.random() < 0.85 else 'cancelled'
+                else:
+                    status = 'scheduled' if self.rng.random() < 0.92 else 'cancelled'
+                yield Appointment(
+                    patient_id=patient_ids[patient_index], doctor_id=doctor_ids[doctor_index],
+                    appointment_date=day, appointment_time=self.rng.choice(day_slots), status=status,
+                )
+
+        self.insert(Appointment, rows())
+
+    def medicines(self, count, patient_ids):
+        if not patient_ids:
+            return
+        medicines, medicine_weights = _weighted(MEDICINES)
+        frequencies, frequency_weights = _weighted(FREQUENCIES)
+        relations, relation_weights = _weighted(RELATIONS)
+        course_days, course_weights = _weighted(COURSE_DAYS)
+
+        def rows():
+            for _ in range(count):
+                name, dosage = self.rng.choices(medicines, cum_weights=medicine_weights)[0]
+                frequency = self.rng.choices(frequencies, cum_weights=frequency_weights)[0]
+                yield Medicine(
+                    patient_id=self.rng.choice(patient_ids), medicine_name=name, dosage=dosage,
+                    frequency=frequency, frequency_mask=frequency_mask(frequency),
+                    relation_to_food=self.rng.choices(relations, cum_weights=relation_weights)[0],
+                    no_of_days=self.rng.choices(course_days, cum_weights=course_weights)[0],
+                )
+
+        self.insert(Medicine, rows(), backdate=True)
+
+    def diagnoses(self, count, patient_ids):
+        if not patient_ids:
+            return
+        conditions, condition_weights = _weighted(CONDITIONS)
+        self.insert(Diagnosis, (
+            Diagnosis(
+                patient_id=self.rng.choice(patient_ids),
+                diagnosis=self.rng.choice(DIAGNOSIS_NOTES).format(
+                    condition=self.rng.choices(conditions, cum_weights=condition_weights)[0]
+                ),
+            )
+            for _ in range(count)
+        ), backdate=True)
@@ -1,3 +1,1561 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import date, datetime, timedelta
+from unittest import mock, skipUnless
+from urllib import parse
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .pagination import CompatCursorPagination
+from .serializers import MyTokenObtainPairSerializer
+
+from .models import (
+    CustomUser, Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, AuditEvent, Change, frequency_mask,
+    weekday_mask,
+)
+from . import bed_summary, bed_transfers, live, medication_rounds, pdf_pool, reports
+from .authentication import user_cache
+from .views import (
+    DoctorViewSet,
+    PatientViewSet,
+    BedViewSet,
+    AppointmentViewSet,
+    MedicineViewSet,
+    DiagnosisViewSet,
+    AuditEventViewSet,
+    ReceptionistDashboardDataView,
+)
+
+# Audit events are written in the test thread on commit instead of by the
+# background writer, which cannot see the test transaction.
+_audit_sync = override_settings(AUDIT_LOG_ASYNC=False)
+
+
+def setUpModule():
+    _audit_sync.enable()
+
+
+def tearDownModule():
+    _audit_sync.disable()
+
+
+def make_user(username, role, **extra):
+    user = CustomUser.objects.create_user(
+        username=username, password='password123', role=role,
+        first_name=username.title(), last_name='Test', **extra
+    )
+    return user
+
+
+def auth_client(user):
+    """API client authenticated the same way the frontend is: a Bearer JWT."""
+    client = APIClient()
+    # Warm the JWT user cache, as a logged-in user's first request does, so
+    # query counts measure the view alone
+    user_cache.reload(user.pk)
+    token = MyTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def populate(doctors=3, patients=30):
+    """Create a small hospital: doctors, beds, patients, appointments, medicines and diagnoses."""
+    doctor_profiles = []
+    for i in range(doctors):
+        user = make_user(f'doc{i}', 'doctor')
+        doctor = user.doctor_profile
+        doctor.specialization = 'Cardiology'
+        doctor.contact = '555-0100'
+        doctor.availability = 'Monday,Tuesday,Wednesday,Thursday,Friday,Saturday,Sunday'
+        doctor.save()
+        doctor_profiles.append(doctor)
+
+    wards = [choice[0] for choice in Bed.WARD_CHOICES]
+    for i in range(patients):
+        bed = Bed.objects.create(bed_number=f'B{i:03d}', ward=wards[i % len(wards)])
+        patient = Patient.objects.create(
+            name=f'Patient {i}', age=30 + i % 50, gender='Female', contact='555-0000',
+            assigned_bed=bed if i % 2 == 0 else None,
+            assigned_doctor=doctor_profiles[i % doctors],
+        )
+        Appointment.objects.create(
+            patient=patient, doctor=doctor_profiles[i % doctors],
+            appointment_date=date.today() + timedelta(days=i % 7), appointment_time='09:30',
+        )
+        Medicine.objects.create(
+            patient=patient, medicine_name='Paracetamol', dosage='500mg',
+            frequency='Breakfast,Dinner', relation_to_food='After', no_of_days=5,
+        )
+        Diagnosis.objects.create(patient=patient, diagnosis='Observation')
+    return doctor_profiles
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every ViewSet declares a `query_budget`; list and detail requests must stay
+    within it no matter how many rows are returned.
+    """
+    endpoints = [
+        ('doctors', DoctorViewSet, Doctor),
+        ('patients', PatientViewSet, Patient),
+        ('beds', BedViewSet, Bed),
+        ('appointments', AppointmentViewSet, Appointment),
+        ('medicines', MedicineViewSet, Medicine),
+        ('diagnoses', DiagnosisViewSet, Diagnosis),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate()
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def assertWithinBudget(self, client, url, budget):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertLessEqual(
+            len(ctx.captured_queries), budget,
+            f"{url} issued {len(ctx.captured_queries)} queries (budget {budget}):\n"
+            + '\n'.join(q['sql'] for q in ctx.captured_queries)
+        )
+        return response
+
+    def test_list_and_detail_within_budget(self):
+        client = auth_client(self.receptionist)
+        for prefix, viewset, model in self.endpoints:
+            with self.subTest(endpoint=prefix):
+                response = self.assertWithinBudget(client, f'/api/{prefix}/', viewset.query_budget['list'])
+                self.assertGreater(len(response.json()), 1)
+                obj = model.objects.first()
+                self.assertWithinBudget(client, f'/api/{prefix}/{obj.pk}/', viewset.query_budget['retrieve'])
+
+    def test_doctor_scoped_lists_within_budget(self):
+        client = auth_client(self.doctors[0].user)
+        for prefix, viewset in [('patients', PatientViewSet), ('appointments', AppointmentViewSet)]:
+            with self.subTest(endpoint=prefix):
+                response = self.assertWithinBudget(client, f'/api/{prefix}/', viewset.query_budget['list'])
+                self.assertEqual(len(response.json()), 10)
+
+    def test_budget_does_not_grow_with_rows(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as before:
+            client.get('/api/patients/')
+        populate_more = Patient.objects.count()
+        for i in range(populate_more):
+            Patient.objects.create(name=f'Extra {i}', age=40, gender='Male', contact='1',
+                                   assigned_doctor=self.doctors[i % len(self.doctors)])
+        with CaptureQueriesContext(connection) as after:
+            client.get('/api/patients/')
+        self.assertEqual(len(before.captured_queries), len(after.captured_queries))
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        populate(patients=25)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def walk(self, client, url):
+        """Follow `next` links and return the pages' ids and per-page query counts."""
+        ids, query_counts = [], []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                data = client.get(url).json()
+            query_counts.append(len(ctx.captured_queries))
+            ids.extend(row['id'] for row in data['results'])
+            url = data['next']
+        return ids, query_counts
+
+    def test_unpaginated_by_default(self):
+        response = auth_client(self.receptionist).get('/api/patients/')
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 25)
+
+    def test_cursor_walk_covers_every_row_once(self):
+        client = auth_client(self.receptionist)
+        for prefix, model in [('patients', Patient), ('appointments', Appointment), ('medicines', Medicine)]:
+            with self.subTest(endpoint=prefix):
+                ids, query_counts = self.walk(client, f'/api/{prefix}/?page_size=4')
+                self.assertEqual(sorted(ids), sorted(model.objects.values_list('id', flat=True)))
+                # The last page costs the same as the first
+                self.assertEqual(len(set(query_counts)), 1)
+
+    def test_ties_on_the_first_column_need_no_offset(self):
+        Medicine.objects.update(created_at=datetime(2025, 1, 1, 8, 0))
+        client = auth_client(self.receptionist)
+        url, ids, cursors = '/api/medicines/?page_size=4', [], []
+        while url:
+            data = client.get(url).json()
+            ids.extend(row['id'] for row in data['results'])
+            url = data['next']
+            cursors.append(url)
+        self.assertEqual(ids, sorted(Medicine.objects.values_list('id', flat=True), reverse=True))
+        for url in filter(None, cursors):
+            cursor = base64.b64decode(parse.parse_qs(parse.urlsplit(url).query)['cursor'][0]).decode()
+            self.assertNotIn('o=', cursor)
+
+        # And back again from the last page
+        data = client.get(cursors[-2]).json()
+        self.assertEqual(client.get(data['previous']).json()['results'][-1]['id'], ids[-len(data['results']) - 1])
+
+    def test_bad_cursor_is_not_found(self):
+        client = auth_client(self.receptionist)
+        cursor = base64.b64encode(b'p=%5B%22x%22%2C%221%22%5D').decode()
+        self.assertEqual(client.get(f'/api/appointments/?cursor={cursor}').status_code, 404)
+
+    def test_page_size_is_capped(self):
+        client = auth_client(self.receptionist)
+        data = client.get('/api/patients/?page_size=100000').json()
+        self.assertEqual(len(data['results']), 25)
+        self.assertIsNone(data['next'])
+
+
+class ReceptionistDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(patients=12)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def test_summary_counts(self):
+        data = auth_client(self.receptionist).get('/api/dashboard/receptionist/').json()
+        self.assertEqual(data['patients'], {'total': 12, 'without_bed': 6})
+        self.assertEqual(data['beds']['total'], 12)
+        self.assertEqual(data['beds']['occupied'], 6)
+        self.assertEqual(sum(ward['free'] for ward in data['beds']['by_ward']), 6)
+        self.assertEqual(data['appointments']['today_by_status']['scheduled'], 2)
+        self.assertEqual([d['patient_count'] for d in data['doctors']], [4, 4, 4])
+        # Every appointment is today or later
+        self.assertEqual(data['appointments']['upcoming_count'], 12)
+        # Patients 0 and 7 are seen today
+        self.assertEqual([d['today_appointments'] for d in data['doctors']], [1, 1, 0])
+
+    def test_query_count_independent_of_size(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as before:
+            client.get('/api/dashboard/receptionist/')
+        make_user('newdoc', 'doctor')
+        Bed.objects.bulk_create(Bed(bed_number=f'X{i}', ward='Ward C') for i in range(20))
+        with CaptureQueriesContext(connection) as after:
+            client.get('/api/dashboard/receptionist/')
+        self.assertEqual(len(before.captured_queries), len(after.captured_queries))
+
+    def test_today_count_is_not_capped_by_the_rows(self):
+        patient = Patient.objects.first()
+        Appointment.objects.bulk_create(
+            Appointment(patient=patient, doctor=self.doctors[0], appointment_date=date.today(),
+                        appointment_time=f'{10 + i // 60:02d}:{i % 60:02d}')
+            for i in range(60)
+        )
+        data = auth_client(self.receptionist).get('/api/dashboard/receptionist/').json()['appointments']
+        self.assertEqual(data['today_count'], 62)
+        self.assertEqual(len(data['today']), ReceptionistDashboardDataView.today_limit)
+
+    def test_bed_tiles_are_paged_per_ward(self):
+        from unittest import mock
+
+        client = auth_client(self.receptionist)
+        with mock.patch.object(ReceptionistDashboardDataView, 'tiles_per_ward', 3):
+            first = client.get('/api/dashboard/receptionist/').json()['beds']
+            second = client.get('/api/dashboard/receptionist/', {'tiles_offset': 3}).json()['beds']
+            one_ward = client.get('/api/dashboard/receptionist/', {'ward': 'Ward A'}).json()['beds']
+        # 4 beds per ward, 2 of them free: free ones come first
+        self.assertEqual(len(first['tiles']), 9)
+        self.assertEqual([tile['is_occupied'] for tile in first['tiles'][:3]], [False, False, True])
+        self.assertEqual(first['tiles_next_offset'], 3)
+        self.assertEqual((len(second['tiles']), second['tiles_next_offset']), (3, None))
+        self.assertEqual({tile['ward'] for tile in one_ward['tiles']}, {'Ward A'})
+        self.assertEqual(len(one_ward['by_ward']), 3)
+        response = client.get('/api/dashboard/receptionist/', {'tiles_offset': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_doctors_are_forbidden(self):
+        response = auth_client(self.doctors[0].user).get('/api/dashboard/receptionist/')
+        self.assertEqual(response.status_code, 403)
+
+
+class BedSummaryTests(TestCase):
+    def setUp(self):
+        self.receptionist = make_user('reception', 'receptionist')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beds = [Bed.objects.create(bed_number=f'S{i}', ward='Ward A' if i < 3 else 'Ward B') for i in range(5)]
+
+    def expected(self):
+        return {
+            ward: {
+                'total': Bed.objects.filter(ward=ward).count(),
+                'occupied': Bed.objects.filter(ward=ward, is_occupied=True).count(),
+            }
+            for ward, _ in Bed.WARD_CHOICES
+        }
+
+    def counted(self):
+        return {row['ward']: {'total': row['total'], 'occupied': row['occupied']} for row in bed_summary.get_summary()}
+
+    def test_counters_follow_patient_and_bed_changes(self):
+        self.assertEqual(self.counted(), self.expected())
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = Patient.objects.create(name='P', age=40, gender='Male', contact='1', assigned_bed=self.beds[0])
+        self.assertEqual(self.counted(), self.expected())
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.assigned_bed = self.beds[4]
+            patient.save()
+        self.assertEqual(self.counted(), self.expected())
+        with self.captureOnCommitCallbacks(execute=True):
+            bed = Bed.objects.get(pk=self.beds[1].pk)
+            bed.ward = 'Ward C'
+            bed.save()
+            Bed.objects.get(pk=self.beds[2].pk).delete()
+        self.assertEqual(self.counted(), self.expected())
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.delete()
+        self.assertEqual(self.counted(), self.expected())
+
+    def test_summary_does_not_touch_beds(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/beds/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertFalse([q for q in ctx.captured_queries if 'api_bed' in q['sql']])
+
+    def test_rebuild_after_writes_in_the_same_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            Bed.objects.create(bed_number='S9', ward='Ward A', is_occupied=True)
+            bed_summary.rebuild()
+        self.assertEqual(self.counted(), self.expected())
+
+    def test_rolled_back_writes_leave_the_counts(self):
+        before = self.counted()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Bed.objects.create(bed_number='S9', ward='Ward A', is_occupied=True)
+            raise RuntimeError
+        self.assertEqual(self.counted(), before)
+
+
+class PatientReportCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(patients=2)
+        cls.patient = Patient.objects.first()
+
+    def setUp(self):
+        report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, report_dir, ignore_errors=True)
+        settings_override = override_settings(PDF_REPORT_CACHE_DIR=report_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = auth_client(self.doctors[0].user)
+        self.url = f'/api/patient-report-pdf/{self.patient.id}/'
+
+    def test_unchanged_report_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(b''.join(first.streaming_content).startswith(b'%PDF'))
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_changed_rows_invalidate_report(self):
+        first = self.client.get(self.url)
+        Medicine.objects.create(
+            patient=self.patient, medicine_name='Amoxicillin', dosage='250mg',
+            frequency='Lunch', relation_to_food='With', no_of_days=3,
+        )
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_users_keep_their_own_copies(self):
+        report_dir = os.path.join(reports.cache_dir(), f'patient_{self.patient.id}')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        mine = set(os.listdir(report_dir))
+        other = auth_client(make_user('reception', 'receptionist'))
+        self.assertEqual(other.get(self.url).status_code, 200)
+        files = set(os.listdir(report_dir))
+        self.assertEqual(len(files), 2)
+        self.assertLess(mine, files)
+
+        # A copy pruned by another request is rendered again
+        for name in files:
+            os.unlink(os.path.join(report_dir, name))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(set(os.listdir(report_dir)), mine)
+
+    def test_deleted_patients_reports_are_removed(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        other = Patient.objects.exclude(pk=self.patient.pk).first()
+        self.assertEqual(self.client.get(f'/api/patient-report-pdf/{other.id}/').status_code, 200)
+        self.assertEqual(len(os.listdir(reports.cache_dir())), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.patient.delete()
+        self.assertEqual(os.listdir(reports.cache_dir()), [f'patient_{other.id}'])
+
+    def test_bundle_export_streams_zip(self):
+        client = auth_client(make_user('reception', 'receptionist'))
+        response = client.get('/api/patient-reports/export/?patients=' + ','.join(
+            str(pk) for pk in Patient.objects.values_list('id', flat=True)))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with CaptureQueriesContext(connection) as ctx:
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 2)
+        self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in archive.namelist()))
+        # One chunk: patients, medicines, diagnoses
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_bundle_export_requires_a_filter(self):
+        response = self.client.get('/api/patient-reports/export/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_full_render_queue_returns_503(self):
+        with override_settings(PDF_RENDER_MAX_QUEUE=0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_test_pdf_renders_in_pool(self):
+        response = self.client.get('/api/test-pdf/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_timed_out_render_holds_its_slot_until_done(self):
+        pdf_pool.render(time.sleep, 0)  # workers up
+        with override_settings(PDF_RENDER_TIMEOUT=0.05, PDF_RENDER_MAX_QUEUE=1):
+            with self.assertRaises(FuturesTimeoutError):
+                pdf_pool.render(time.sleep, 1)
+            # Still rendering, so the next one is turned away
+            with self.assertRaises(pdf_pool.RenderQueueFull):
+                pdf_pool.render(time.sleep, 0)
+        deadline = time.monotonic() + 10
+        while pdf_pool._in_flight and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(pdf_pool._in_flight, 0)
+
+
+class BedTransferTests(TestCase):
+    def setUp(self):
+        self.client = auth_client(make_user('reception', 'receptionist'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beds = [Bed.objects.create(bed_number=f'T{i}', ward='Ward A' if i < 4 else 'Ward B') for i in range(8)]
+            self.patients = [
+                Patient.objects.create(name=f'P{i}', age=40, gender='Male', contact='1', assigned_bed=self.beds[i])
+                for i in range(3)
+            ]
+
+    def bed_of(self, patient):
+        return Patient.objects.get(pk=patient.pk).assigned_bed_id
+
+    def assertConsistent(self):
+        occupied = set(Bed.objects.filter(is_occupied=True).values_list('id', flat=True))
+        assigned = set(Patient.objects.exclude(assigned_bed=None).values_list('assigned_bed_id', flat=True))
+        self.assertEqual(occupied, assigned)
+
+    def test_swap_in_one_batch(self):
+        a, b = self.patients[0], self.patients[1]
+        response = self.client.post('/api/beds/transfer/', {'transfers': [
+            {'patient': a.pk, 'bed': self.beds[1].pk}, {'patient': b.pk, 'bed': self.beds[0].pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.bed_of(a), self.beds[1].pk)
+        self.assertEqual(self.bed_of(b), self.beds[0].pk)
+        self.assertConsistent()
+
+    def test_occupied_target_rolls_back(self):
+        response = self.client.post('/api/beds/transfer/', {'transfers': [
+            {'patient': self.patients[0].pk, 'bed': self.beds[5].pk},
+            {'patient': self.patients[1].pk, 'bed': self.beds[2].pk},  # held by patient 2
+        ]}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.bed_of(self.patients[0]), self.beds[0].pk)
+        self.assertConsistent()
+
+    def test_target_held_despite_free_flag_rolls_back(self):
+        Bed.objects.filter(pk=self.beds[2].pk).update(is_occupied=False)  # drifted flag, patient 2 still in it
+        response = self.client.post('/api/beds/transfer/', {'transfers': [
+            {'patient': self.patients[0].pk, 'bed': self.beds[2].pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.bed_of(self.patients[0]), self.beds[0].pk)
+        self.assertEqual(self.bed_of(self.patients[2]), self.beds[2].pk)
+
+    def test_ward_move_uses_fixed_queries(self):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/beds/transfer/', {'from_ward': 'Ward A', 'to_ward': 'Ward B'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['transferred'], 3)
+        self.assertFalse(Patient.objects.filter(assigned_bed__ward='Ward A').exists())
+        self.assertConsistent()
+        # 2 selects per step, 4 updates, the held-bed check, 2 version bumps
+        # and a counter update per ward, plus test savepoints; independent
+        # of patient count
+        self.assertLessEqual(len(ctx.captured_queries), 17)
+        summary = {row['ward']: row['occupied'] for row in bed_summary.get_summary()}
+        self.assertEqual(summary, {'Ward A': 0, 'Ward B': 3, 'Ward C': 0})
+
+    def test_ward_move_without_room(self):
+        Bed.objects.filter(ward='Ward B').exclude(pk=self.beds[4].pk).delete()
+        response = self.client.post('/api/beds/transfer/', {'from_ward': 'Ward A', 'to_ward': 'Ward B'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertConsistent()
+
+
+class AuditLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(patients=1)
+        cls.admin = make_user('boss', 'admin')
+
+    def test_events_are_compact_and_need_no_lookups(self):
+        patient = Patient.objects.get()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with CaptureQueriesContext(connection) as ctx:
+                appointment = Appointment.objects.create(
+                    patient=patient, doctor=self.doctors[0],
+                    appointment_date=date.today(), appointment_time='10:00',
+                )
+                appointment_id = appointment.id
+                appointment.delete()
+            # Only the INSERT and DELETE; the receivers add nothing but the
+            # version bumps
+            self.assertEqual(len([q for q in ctx.captured_queries
+                                  if 'SAVEPOINT' not in q['sql'] and 'api_modelversion' not in q['sql']]), 2)
+        self.assertEqual(len(callbacks), 2)
+        events = list(AuditEvent.objects.filter(model='Appointment', object_id=appointment_id).order_by('id'))
+        self.assertEqual([e.action for e in events], ['create', 'delete'])
+        self.assertEqual(events[0].data['patient'], patient.id)
+
+    def test_time_range_query(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Bed.objects.create(bed_number='AUD1', ward='Ward C')
+        client = auth_client(self.admin)
+        data = client.get('/api/audit-events/', {'model': 'Bed', 'start': date.today().isoformat()}).json()
+        self.assertEqual([row['data']['bed_number'] for row in data['results']], ['AUD1'])
+        data = client.get('/api/audit-events/', {'model': 'Bed', 'end': date.today().isoformat()}).json()
+        self.assertEqual(data['results'], [])
+        self.assertEqual(client.get('/api/audit-events/', {'start': 'yesterday'}).status_code, 400)
+
+    def test_only_admins_read_the_trail(self):
+        response = auth_client(self.doctors[0].user).get('/api/audit-events/')
+        self.assertEqual(response.status_code, 403)
+
+
+class FreeSlotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(patients=6)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def test_booked_times_are_excluded_with_fixed_queries(self):
+        start = date.today() + timedelta(days=1)
+        end = start + timedelta(days=6)
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as ctx:
+            data = client.get('/api/doctor-availability/slots/', {'start': start, 'end': end}).json()
+        # doctors, appointments
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(len(data['doctors']), 3)
+
+        booked = set(
+            Appointment.objects.filter(appointment_date__range=(start, end))
+            .values_list('doctor_id', 'appointment_date', 'appointment_time')
+        )
+        self.assertTrue(booked)
+        for doctor in data['doctors']:
+            self.assertEqual(len(doctor['slots']), 7)
+            for day in doctor['slots']:
+                for time in day['times']:
+                    self.assertNotIn((doctor['doctor_id'], date.fromisoformat(day['date']), time), booked)
+        total_free = sum(len(day['times']) for doctor in data['doctors'] for day in doctor['slots'])
+        self.assertEqual(total_free, 3 * 7 * 16 - len(booked))
+
+    def test_unpadded_and_off_grid_bookings_block_their_slot(self):
+        from .slots import free_slots
+
+        doctor = self.doctors[0]
+        day = date.today() + timedelta(days=8)
+        for time in ('9:30', '10:15', '11:00:00', '18:00', 'soon'):
+            Appointment.objects.create(
+                patient=Patient.objects.first(), doctor=doctor, appointment_date=day, appointment_time=time,
+            )
+        free = free_slots([doctor], day, day)[doctor.id][day]
+        self.assertEqual([slot for slot in ('09:00', '09:30', '10:00', '10:30', '11:00') if slot not in free],
+                         ['09:30', '10:00', '11:00'])
+        self.assertEqual(len(free), 16 - 3)
+
+    def test_unavailable_weekdays_have_no_slots(self):
+        doctor = self.doctors[0]
+        doctor.availability = 'Monday'
+        doctor.save()
+        start = date.today() + timedelta(days=1)
+        data = auth_client(self.receptionist).get('/api/doctor-availability/slots/', {
+            'doctor_id': doctor.id, 'start': start, 'end': start + timedelta(days=6),
+        }).json()
+        self.assertEqual([date.fromisoformat(day['date']).weekday() for day in data['doctors'][0]['slots']], [0])
+
+
+class DoctorAvailabilityMaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.receptionist = make_user('reception', 'receptionist')
+        for username, availability in [('mon', 'Monday'), ('weekdays', 'Monday, tuesday,Wednesday,Thursday,Friday'),
+                                       ('thu', 'Thursday'), ('none', '')]:
+            doctor = make_user(username, 'doctor').doctor_profile
+            doctor.availability = availability
+            doctor.specialization = 'Cardiology' if username != 'thu' else 'Neurology'
+            doctor.save()
+
+    def test_mask_round_trip(self):
+        doctor = Doctor.objects.get(user__username='weekdays')
+        self.assertEqual(doctor.availability_mask, 0b0011111)
+        self.assertEqual(doctor.get_available_days(), ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'])
+        self.assertTrue(doctor.is_available_on_day('Tuesday'))
+        self.assertFalse(doctor.is_available_on_date(date(2025, 1, 4)))  # Saturday
+
+    def test_available_on_filters_in_database(self):
+        thursday = date(2025, 1, 2)
+        client = auth_client(self.receptionist)
+        usernames = lambda rows: sorted(Doctor.objects.get(pk=row['id']).user.username for row in rows)
+        self.assertEqual(usernames(client.get('/api/doctors/', {'available_on': thursday}).json()), ['thu', 'weekdays'])
+        self.assertEqual(
+            usernames(client.get('/api/doctors/', {'available_on': thursday, 'specialization': 'cardiology'}).json()),
+            ['weekdays'],
+        )
+        self.assertEqual(client.get('/api/doctors/', {'available_on': '02/01/2025'}).status_code, 400)
+
+
+class MedicineFrequencyMaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        populate(patients=6)  # every other patient has a bed; all take Breakfast,Dinner
+        cls.receptionist = make_user('reception', 'receptionist')
+        lunch_patient = Patient.objects.filter(assigned_bed__ward='Ward B').first()
+        Medicine.objects.create(
+            patient=lunch_patient, medicine_name='Metformin', dosage='500mg',
+            frequency='Lunch,Breakfast', relation_to_food='With', no_of_days=10,
+        )
+
+    def test_mask_follows_frequency(self):
+        medicine = Medicine.objects.get(medicine_name='Metformin')
+        self.assertEqual(medicine.frequency_mask, 0b011)
+        self.assertEqual(medicine.get_frequency_list(), ['Breakfast', 'Lunch'])
+
+    def test_due_at_and_ward_filter_in_one_query(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as ctx:
+            rows = client.get('/api/medicines/', {'due_at': 'Lunch', 'ward': 'Ward B'}).json()
+        self.assertEqual([row['medicine_name'] for row in rows], ['Metformin'])
+        self.assertEqual(len(ctx.captured_queries), 2)  # versions for the ETag, then the list
+        self.assertEqual(len(client.get('/api/medicines/', {'due_at': 'Dinner'}).json()), 6)
+        self.assertEqual(client.get('/api/medicines/', {'due_at': 'Brunch'}).status_code, 400)
+
+
+class MedicationRoundTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        populate(patients=12)  # two bedded patients per ward, all on Paracetamol Breakfast,Dinner After
+        cls.receptionist = make_user('reception', 'receptionist')
+        first, second = Patient.objects.filter(assigned_bed__ward='Ward A').order_by('id')
+        Medicine.objects.create(
+            patient=first, medicine_name='Metformin', dosage='500mg',
+            frequency='Lunch', relation_to_food='With', no_of_days=3,
+        )
+        # A finished course is left out of the round
+        Medicine.objects.filter(patient=second).update(created_at=date.today() - timedelta(days=5))
+
+    def get_round(self, client, **params):
+        response = client.get('/api/medication-rounds/', params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_json_round_groups_by_slot_and_relation(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as ctx:
+            response, body = self.get_round(client, ward='Ward A')
+        self.assertEqual(len(ctx.captured_queries), 1)  # every dose in one query
+        data = json.loads(body)
+        self.assertEqual(data['ward'], 'Ward A')
+        rounds = {r['slot']: r['groups'] for r in data['rounds']}
+        self.assertEqual([g['relation_to_food'] for g in rounds['Breakfast']], ['After'])
+        self.assertEqual(len(rounds['Breakfast'][0]['doses']), 1)
+        lunch = rounds['Lunch'][0]
+        self.assertEqual((lunch['relation_to_food'], lunch['doses'][0]['medicine_name']), ('With', 'Metformin'))
+        # Metformin has ended three days from now
+        _, body = self.get_round(client, ward='Ward A', date=str(date.today() + timedelta(days=3)))
+        self.assertEqual({r['slot']: r['groups'] for r in json.loads(body)['rounds']}['Lunch'], [])
+
+    def test_round_reads_back_as_far_as_the_longest_course(self):
+        patient = Patient.objects.filter(assigned_bed__ward='Ward C').first()
+        Medicine.objects.filter(patient__assigned_bed__ward='Ward C').delete()
+        for name, days, started in (('Warfarin', 30, 29), ('Amoxicillin', 7, 7)):
+            medicine = Medicine.objects.create(
+                patient=patient, medicine_name=name, dosage='1 tablet',
+                frequency='Breakfast', relation_to_food='After', no_of_days=days,
+            )
+            Medicine.objects.filter(pk=medicine.pk).update(created_at=datetime.now() - timedelta(days=started))
+        rounds = medication_rounds.active_doses(Medicine.objects.all(), 'Ward C', date.today())
+        # Warfarin is on its last day; Amoxicillin ended yesterday
+        doses = rounds['Breakfast']['After']
+        self.assertEqual([(d['medicine_name'], d['course_day']) for d in doses], [('Warfarin', 30)])
+
+    def test_csv_round_and_validation(self):
+        client = auth_client(self.receptionist)
+        response, body = self.get_round(client, ward='Ward B', output='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = body.strip().splitlines()
+        self.assertTrue(lines[0].startswith('slot,relation_to_food,bed_number'))
+        self.assertEqual(len(lines), 1 + 4)  # two patients, Breakfast and Dinner
+        self.assertEqual(client.get('/api/medication-rounds/').status_code, 400)
+        self.assertEqual(client.get('/api/medication-rounds/', {'ward': 'Ward B', 'date': 'soon'}).status_code, 400)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=4)  # doc0 has patients 0 and 2
+        cls.receptionist = make_user('reception', 'receptionist')
+        cls.patient = Patient.objects.get(name='Patient 0')
+        cls.patient.condition = 'Type 2 diabetes'
+        cls.patient.save()
+        Diagnosis.objects.create(patient=cls.patient, diagnosis='Suspected pneumonia, chest x-ray ordered')
+        # Bulk writes skip the signals; the index triggers still see them
+        Diagnosis.objects.bulk_create([
+            Diagnosis(patient=Patient.objects.get(name='Patient 1'), diagnosis='Pneumonia confirmed'),
+        ])
+
+    def search(self, user, **params):
+        return auth_client(user).get('/api/search/', params)
+
+    def test_ranked_hits_in_one_query(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as ctx:
+            data = client.get('/api/search/', {'q': 'pneumon'}).json()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual({(hit['kind'], hit['patient_name']) for hit in data['results']},
+                         {('diagnosis', 'Patient 0'), ('diagnosis', 'Patient 1')})
+        self.assertIn('[', data['results'][0]['snippet'])
+        hits = self.search(self.receptionist, q='paracetamol', kind='medicine', page_size=3).json()
+        self.assertEqual(len(hits['results']), 3)
+        self.assertIsNotNone(hits['next'])
+        self.assertEqual(self.search(self.receptionist, q='diabetes').json()['results'][0]['kind'], 'patient')
+
+    def test_doctors_only_find_their_patients(self):
+        hits = self.search(self.doctors[0].user, q='pneumonia').json()['results']
+        self.assertEqual([hit['patient_name'] for hit in hits], ['Patient 0'])
+
+    def test_index_follows_updates_and_deletes(self):
+        Medicine.objects.filter(patient=self.patient).update(medicine_name='Ibuprofen')
+        self.assertEqual(len(self.search(self.receptionist, q='ibuprofen').json()['results']), 1)
+        self.patient.delete()
+        self.assertEqual(self.search(self.receptionist, q='ibuprofen').json()['results'], [])
+        self.assertEqual(self.search(self.receptionist, q='').status_code, 400)
+        self.assertEqual(self.search(self.receptionist, q='x', kind='bed').status_code, 400)
+
+    def test_admin_search_uses_index(self):
+        from django.contrib import admin
+        from django.test import RequestFactory
+
+        model_admin = admin.site._registry[Diagnosis]
+        request = RequestFactory().get('/admin/api/diagnosis/')
+        results, _ = model_admin.get_search_results(request, Diagnosis.objects.all(), 'pneumonia')
+        self.assertEqual(results.count(), 2)
+        # Patient names match too, as with the old patient__name lookup
+        results, _ = model_admin.get_search_results(request, Diagnosis.objects.all(), 'Patient 1')
+        self.assertEqual(set(results.values_list('patient__name', flat=True)), {'Patient 1'})
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN for the hot, filtered queries: each must find its rows
+    through an index. A plain "SCAN <table>" means a full table scan, and for
+    querysets in cursor order "USE TEMP B-TREE FOR ORDER BY" means every
+    matching row is sorted before the first page is returned.
+
+    Unfiltered staff listings read the whole table by definition and are
+    left out; cursor pagination bounds those.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=3, patients=30)
+        cls.receptionist = make_user('reception', 'receptionist')
+        cls.admin = make_user('boss', 'admin')
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexed(self, queryset, ordered=True):
+        plan = self.plan(queryset)
+        scans = [step for step in plan if re.fullmatch(r'SCAN \w+', step)]
+        self.assertEqual(scans, [], f'Full table scan in:\n' + '\n'.join(plan))
+        if ordered:
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, '\n'.join(plan))
+
+    def viewset_queryset(self, viewset, user, **params):
+        """The queryset a list request builds, in the cursor pagination order"""
+        request = Request(APIRequestFactory().get('/', params))
+        request.user = user
+        view = viewset(request=request, action='list', format_kwarg=None, kwargs={})
+        return view.get_queryset().order_by(*getattr(view, 'cursor_ordering', ('-id',)))
+
+    def test_viewset_list_queries(self):
+        patient_id = Patient.objects.values_list('id', flat=True).first()
+        doctor_user = self.doctors[0].user
+        cases = [
+            (PatientViewSet, doctor_user, {}),
+            (AppointmentViewSet, doctor_user, {}),
+            (AppointmentViewSet, self.receptionist, {}),
+            (MedicineViewSet, self.receptionist, {'patient': patient_id}),
+            (DiagnosisViewSet, self.receptionist, {'patient': patient_id}),
+            (AuditEventViewSet, self.admin, {'start': '2025-01-01'}),
+        ]
+        for viewset, user, params in cases:
+            with self.subTest(viewset=viewset.__name__, role=user.role, **params):
+                self.assertIndexed(self.viewset_queryset(viewset, user, **params))
+
+        # One row's history is a handful of events; sorting them is fine
+        self.assertIndexed(
+            self.viewset_queryset(AuditEventViewSet, self.admin, model='Patient', object_id=patient_id),
+            ordered=False,
+        )
+
+    def test_later_cursor_pages(self):
+        """A page after a cursor starts with an index range on the first ordering column"""
+        paginator = CompatCursorPagination()
+        patient_id = Patient.objects.values_list('id', flat=True).first()
+        cases = [
+            (AppointmentViewSet, self.receptionist, {}),
+            (MedicineViewSet, self.receptionist, {'patient': patient_id}),
+        ]
+        for viewset, user, params in cases:
+            with self.subTest(viewset=viewset.__name__, **params):
+                queryset = self.viewset_queryset(viewset, user, **params)
+                paginator.ordering = viewset.cursor_ordering
+                row = queryset.values(*(field.lstrip('-') for field in paginator.ordering)).first()
+                position = json.loads(paginator._get_position_from_instance(row, paginator.ordering))
+                self.assertIndexed(queryset.filter(paginator._after(position, reverse=False)))
+
+    def test_filter_only_queries(self):
+        today = date.today()
+        doctor_ids = [doctor.id for doctor in self.doctors]
+        cases = {
+            'doctors available on a day': Doctor.objects.available_on(today),
+            'medicines due in a ward': Medicine.objects.due_at('Lunch').filter(patient__assigned_bed__ward='Ward A'),
+            'free beds of a ward': Bed.objects.filter(ward='Ward A', is_occupied=False),
+            'booked slots': Appointment.objects.filter(
+                doctor_id__in=doctor_ids, appointment_date__gte=today, appointment_date__lte=today + timedelta(days=7),
+            ).values_list('doctor_id', 'appointment_date', 'appointment_time'),
+            "today's appointments": Appointment.objects.filter(appointment_date=today).values('status'),
+        }
+        for name, queryset in cases.items():
+            with self.subTest(name):
+                self.assertIndexed(queryset, ordered=False)
+
+    def test_change_feed_queries(self):
+        self.assertIndexed(Change.objects.filter(model='Patient', id__gt=10).order_by('id'))
+        for viewset in (PatientViewSet, BedViewSet, AppointmentViewSet, MedicineViewSet, DiagnosisViewSet):
+            with self.subTest(viewset.__name__):
+                queryset = self.viewset_queryset(viewset, self.receptionist)
+                self.assertIndexed(queryset.filter(id__in=[1, 2, 3]), ordered=False)
+
+
+class SQLiteConnectionTests(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], pragmas['busy_timeout'])
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], pragmas['cache_size'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=4)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def setUp(self):
+        user_cache.clear()
+
+    def user_queries(self, ctx):
+        return [q['sql'] for q in ctx.captured_queries if 'FROM "api_customuser"' in q['sql']]
+
+    def test_cached_user_costs_no_query(self):
+        client = auth_client(self.doctors[0].user)
+        client.get('/api/patients/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/patients/')
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(self.user_queries(ctx), [])
+
+    def test_cold_cache_checks_the_user(self):
+        # Another worker changed the user: nothing here was invalidated, and
+        # the token still carries the old role
+        client = auth_client(self.receptionist)
+        CustomUser.objects.filter(pk=self.receptionist.pk).update(role='doctor')
+        user_cache.clear()
+        self.assertEqual(client.get('/api/beds/').status_code, 403)
+        CustomUser.objects.filter(pk=self.receptionist.pk).update(is_active=False)
+        user_cache.clear()
+        self.assertEqual(client.get('/api/beds/').status_code, 401)
+
+    def test_full_user_is_loaded_once(self):
+        client = auth_client(self.doctors[0].user)
+        user_cache.clear()
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(client.get('/api/user-info/').json()['role'], 'doctor')
+        with CaptureQueriesContext(connection) as second:
+            client.get('/api/user-info/')
+        self.assertEqual(len(self.user_queries(first)), 1)
+        self.assertEqual(self.user_queries(second), [])
+
+    def test_saved_user_applies_to_issued_tokens(self):
+        client = auth_client(self.receptionist)
+        self.assertEqual(client.get('/api/audit-events/').status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.receptionist.role = 'admin'
+            self.receptionist.save()
+        self.assertEqual(client.get('/api/audit-events/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.receptionist.is_active = False
+            self.receptionist.save()
+        self.assertEqual(client.get('/api/beds/').status_code, 401)
+
+    def test_tokens_without_claims_still_work(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.receptionist).access_token}')
+        self.assertEqual(client.get('/api/beds/').status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=4)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def test_unchanged_list_is_304_without_a_queryset(self):
+        client = auth_client(self.receptionist)
+        response = client.get('/api/patients/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/patients/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Only the version read
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'api_modelversion' not in q['sql']], [])
+
+    def test_writes_change_the_etag(self):
+        client = auth_client(self.receptionist)
+        etag = client.get('/api/beds/').get('ETag')
+        Patient.objects.filter(name='Patient 0').get().save()
+        self.assertEqual(client.get('/api/beds/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # Set-based transfers bypass the signals and bump the versions themselves
+        etag = client.get('/api/patients/').get('ETag')
+        patient = Patient.objects.filter(assigned_bed__isnull=False).first()
+        free_bed = Bed.objects.filter(is_occupied=False).first()
+        client.post('/api/beds/transfer/', {'patient': patient.id, 'bed': free_bed.id}, format='json')
+        self.assertEqual(client.get('/api/patients/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_user_and_url(self):
+        staff = auth_client(self.receptionist).get('/api/patients/')['ETag']
+        doctor = auth_client(self.doctors[0].user).get('/api/patients/')['ETag']
+        detail = auth_client(self.receptionist).get(f'/api/patients/{Patient.objects.first().id}/')['ETag']
+        self.assertEqual(len({staff, doctor, detail}), 3)
+
+
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=6)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def feed(self, client, url, since='', **params):
+        response = client.get(url, {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_then_returns_only_changes_and_deletes(self):
+        client = auth_client(self.receptionist)
+        seen, cursor, more = [], '', True
+        while more:
+            page = self.feed(client, '/api/beds/', cursor, page_size=4)
+            seen += [bed['id'] for bed in page['results']]
+            cursor, more = page['cursor'], page['more']
+        self.assertEqual(sorted(seen), sorted(Bed.objects.values_list('id', flat=True)))
+        self.assertEqual(self.feed(client, '/api/beds/', cursor)['results'], [])
+
+        free_bed = Bed.objects.filter(is_occupied=False).first()
+        deleted_id = free_bed.id
+        free_bed.delete()
+        changed = Bed.objects.filter(is_occupied=False).first()
+        changed.ward = 'Ward C'
+        changed.save()
+        page = self.feed(client, '/api/beds/', cursor)
+        self.assertEqual([bed['id'] for bed in page['results']], [changed.id])
+        self.assertEqual(page['deleted'], [deleted_id])
+        self.assertFalse(page['more'])
+
+    def test_set_based_transfers_appear_in_the_feed(self):
+        client = auth_client(self.receptionist)
+        cursor = self.feed(client, '/api/patients/')['cursor']
+        patient = Patient.objects.filter(assigned_bed__isnull=False).first()
+        free_bed = Bed.objects.filter(is_occupied=False).first()
+        client.post('/api/beds/transfer/', {'patient': patient.id, 'bed': free_bed.id}, format='json')
+        page = self.feed(client, '/api/patients/', cursor)
+        self.assertEqual([(p['id'], p['assigned_bed']) for p in page['results']], [(patient.id, free_bed.id)])
+
+    def test_cursor_follows_commit_order_not_updated_at(self):
+        client = auth_client(self.receptionist)
+        cursor = self.feed(client, '/api/patients/')['cursor']
+        patient = Patient.objects.first()
+        # A long transaction commits rows stamped before the last poll
+        Patient.objects.filter(id=patient.id).update(condition='Stable', updated_at=datetime(2000, 1, 1))
+        page = self.feed(client, '/api/patients/', cursor)
+        self.assertEqual([(p['id'], p['condition']) for p in page['results']], [(patient.id, 'Stable')])
+        self.assertEqual(self.feed(client, '/api/patients/', page['cursor'])['results'], [])
+
+    def test_doctors_only_get_their_patients(self):
+        doctor = self.doctors[0]
+        page = self.feed(auth_client(doctor.user), '/api/patients/')
+        expected = Patient.objects.filter(assigned_doctor=doctor).values_list('id', flat=True)
+        self.assertEqual(sorted(p['id'] for p in page['results']), sorted(expected))
+
+    def test_reassigned_patient_leaves_the_old_doctors_feed(self):
+        old_doctor, new_doctor = self.doctors
+        old_client, new_client = auth_client(old_doctor.user), auth_client(new_doctor.user)
+        old_cursor = self.feed(old_client, '/api/patients/')['cursor']
+        new_cursor = self.feed(new_client, '/api/patients/')['cursor']
+        patient = Patient.objects.filter(assigned_doctor=old_doctor).first()
+        patient.assigned_doctor = new_doctor
+        patient.save()
+        old_page = self.feed(old_client, '/api/patients/', old_cursor)
+        self.assertEqual((old_page['results'], old_page['deleted']), ([], [patient.id]))
+        new_page = self.feed(new_client, '/api/patients/', new_cursor)
+        self.assertEqual(([p['id'] for p in new_page['results']], new_page['deleted']), ([patient.id], []))
+
+    def test_fixed_queries_and_bad_cursor(self):
+        client = auth_client(self.receptionist)
+        with CaptureQueriesContext(connection) as ctx:
+            self.feed(client, '/api/medicines/')
+        # Version read, change log, changed rows
+        self.assertEqual(len(ctx.captured_queries), 3)
+        response = client.get('/api/medicines/', {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('since', response.json())
+
+
+@override_settings(LIVE_EVENTS_POLL_INTERVAL=0.01)
+class LiveEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=4)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def book(self, doctor):
+        patient = Patient.objects.filter(assigned_doctor=doctor).first()
+        Appointment.objects.create(
+            patient=patient, doctor=doctor, appointment_date=date.today(), appointment_time='11:00',
+        )
+        bed = Bed.objects.filter(is_occupied=False).first()
+        bed.ward = 'Ward C'
+        bed.save()
+
+    def events(self, feed):
+        return [(event['kind'], event['data']['id']) for event in feed.poll()]
+
+    def test_events_are_filtered_by_role(self):
+        staff = live.Feed('receptionist')
+        mine, other = (live.Feed('doctor', doctor.id) for doctor in self.doctors)
+        self.book(self.doctors[0])
+        self.assertEqual([kind for kind, _ in self.events(staff)], ['appointment', 'bed'])
+        self.assertEqual([kind for kind, _ in self.events(mine)], ['appointment'])
+        self.assertEqual(self.events(other), [])
+        self.assertEqual(self.events(staff), [])
+
+    def test_transfers_reach_the_patients_doctor(self):
+        patient = Patient.objects.filter(assigned_bed__isnull=False).first()
+        free_bed = Bed.objects.filter(is_occupied=False).first()
+        feed = live.Feed('doctor', patient.assigned_doctor_id)
+        bed_transfers.transfer_patients({patient.id: free_bed.id})
+        self.assertEqual(self.events(feed), [('patient', patient.id)])
+
+    def test_reassignment_and_deletion_reach_the_old_doctor(self):
+        old_doctor, new_doctor = self.doctors
+        old_feed, new_feed = live.Feed('doctor', old_doctor.id), live.Feed('doctor', new_doctor.id)
+        patient = Patient.objects.filter(assigned_doctor=old_doctor).first()
+        patient.assigned_doctor = new_doctor
+        patient.save()
+        self.assertEqual(self.events(old_feed), [('patient', patient.id)])
+        self.assertEqual(self.events(new_feed), [('patient', patient.id)])
+        patient_id = patient.id
+        patient.delete()
+        self.assertNotIn(('patient', patient_id), self.events(old_feed))
+        self.assertIn(('patient', patient_id), self.events(new_feed))
+
+    def test_resumes_after_last_event_id(self):
+        feed = live.Feed('receptionist')
+        self.book(self.doctors[0])
+        first, second = feed.poll()
+        resumed = live.Feed('receptionist', position=first['id'])
+        self.assertEqual(resumed.poll(), [second])
+
+    async def test_asgi_stream(self):
+        token = await sync_to_async(lambda: str(MyTokenObtainPairSerializer.get_token(self.receptionist).access_token))()
+        client = AsyncClient()
+        self.assertEqual((await client.get('/api/live/')).status_code, 401)
+
+        response = await client.get('/api/live/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        await sync_to_async(self.book)(self.doctors[0])
+        event = (await asyncio.wait_for(anext(chunks), 1)).decode()
+        await chunks.aclose()
+        self.assertIn('event: appointment\n', event)
+        self.assertEqual(json.loads(event.split('data: ')[1].split('\n')[0])['status'], 'scheduled')
+
+    @override_settings(LIVE_EVENTS_WSGI_STREAMS=1)
+    def test_wsgi_stream_and_limit(self):
+        client = auth_client(self.receptionist)
+        response = client.get('/api/live/')
+        self.assertEqual(response.status_code, 200)
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b'retry: 3000\n\n')
+        self.book(self.doctors[0])
+        self.assertIn(b'event: bed\n', next(chunks))
+
+        refused = client.get('/api/live/')
+        self.assertEqual((refused.status_code, refused['Retry-After']), (503, '30'))
+        response.close()
+        second = client.get('/api/live/')
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+    def test_cross_origin_clients_can_resume_and_back_off(self):
+        origin = 'http://localhost:5173'
+        preflight = self.client.options(
+            '/api/live/', HTTP_ORIGIN=origin, HTTP_ACCESS_CONTROL_REQUEST_METHOD='GET',
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS='authorization, last-event-id',
+        )
+        self.assertIn('last-event-id', preflight['Access-Control-Allow-Headers'])
+        response = auth_client(self.receptionist).get('/api/dashboard/receptionist/', HTTP_ORIGIN=origin)
+        self.assertIn('Retry-After', response['Access-Control-Expose-Headers'])
+
+
+class BulkWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=4)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def setUp(self):
+        self.client = auth_client(self.receptionist)
+
+    def admissions(self, count, start=0):
+        beds = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                beds.append(Bed.objects.create(bed_number=f'E{start + i:03d}', ward='Ward B'))
+        return [
+            {'name': f'Emergency {start + i}', 'age': 40, 'gender': 'Male', 'contact': '555-0199',
+             'assigned_bed': bed.id, 'assigned_doctor': self.doctors[i % 2].id}
+            for i, bed in enumerate(beds)
+        ]
+
+    def post(self, url, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(url, items, format='json')
+        return response, len(ctx.captured_queries)
+
+    def test_admissions_in_fixed_queries_with_side_effects(self):
+        summary = bed_summary.get_summary()
+        occupied_b = next(ward['occupied'] for ward in summary if ward['ward'] == 'Ward B')
+
+        small, small_queries = self.post('/api/patients/bulk/', self.admissions(2))
+        large, large_queries = self.post('/api/patients/bulk/', self.admissions(12, start=2))
+        self.assertEqual(small.status_code, 201, small.content)
+        self.assertEqual(large.json()['created'], 12)
+        self.assertEqual(small_queries, large_queries)
+
+        created = Patient.objects.filter(name__startswith='Emergency')
+        self.assertEqual(created.count(), 14)
+        self.assertFalse(Bed.objects.filter(bed_number__startswith='E', is_occupied=False).exists())
+        summary = bed_summary.get_summary()
+        self.assertEqual(next(ward['occupied'] for ward in summary if ward['ward'] == 'Ward B'), occupied_b + 14)
+        self.assertEqual(AuditEvent.objects.filter(model='Patient', action='create', object_id__in=created.values('id')).count(), 14)
+        self.assertEqual(large.json()['results'][0]['assigned_bed_number'], 'E002')
+
+    def test_errors_are_reported_per_item_and_nothing_is_written(self):
+        items = self.admissions(3)
+        taken = Bed.objects.filter(is_occupied=True).first()
+        items[1]['age'] = 'old'
+        items[2]['assigned_bed'] = taken.id
+        items.append({**items[0], 'name': 'Duplicate bed'})
+        response, _ = self.post('/api/patients/bulk/', items)
+        self.assertEqual(response.status_code, 400)
+        errors = {error['index']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(set(errors), {1, 2, 3})
+        self.assertIn('age', errors[1])
+        self.assertIn('assigned_bed', errors[2])
+        self.assertIn('assigned_bed', errors[3])
+        self.assertFalse(Patient.objects.filter(name__startswith='Emergency').exists())
+
+    def test_bulk_update_swaps_beds_and_sets_masks(self):
+        a, b = Patient.objects.filter(assigned_bed__isnull=False).order_by('id')[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/patients/bulk/', [
+                {'id': a.id, 'assigned_bed': b.assigned_bed_id},
+                {'id': b.id, 'assigned_bed': a.assigned_bed_id},
+            ], format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        a_after, b_after = Patient.objects.get(id=a.id), Patient.objects.get(id=b.id)
+        self.assertEqual((a_after.assigned_bed_id, b_after.assigned_bed_id), (b.assigned_bed_id, a.assigned_bed_id))
+        self.assertTrue(Bed.objects.get(id=a.assigned_bed_id).is_occupied)
+        self.assertGreater(a_after.updated_at, a.updated_at)
+
+        medicines = list(Medicine.objects.values_list('id', flat=True)[:2])
+        response = self.client.patch('/api/medicines/bulk/', [
+            {'id': medicines[0], 'frequency': 'Lunch'}, {'id': medicines[1], 'frequency': 'Breakfast,Lunch,Dinner'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            list(Medicine.objects.filter(id__in=medicines).order_by('id').values_list('frequency_mask', flat=True)),
+            [2, 7],
+        )
+        response = self.client.post('/api/medicines/bulk/', [
+            {'patient': a.id, 'medicine_name': 'Ibuprofen', 'dosage': '200mg', 'frequency': 'Dinner',
+             'relation_to_food': 'After', 'no_of_days': 3},
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Medicine.objects.due_at('Dinner').filter(medicine_name='Ibuprofen').count(), 1)
+
+    def test_bulk_beds_need_staff_and_unique_numbers(self):
+        response = auth_client(self.doctors[0].user).post('/api/beds/bulk/', [{'bed_number': 'N1', 'ward': 'Ward A'}],
+                                                          format='json')
+        self.assertEqual(response.status_code, 403)
+        response, _ = self.post('/api/beds/bulk/', [
+            {'bed_number': 'N1', 'ward': 'Ward A'}, {'bed_number': 'N1', 'ward': 'Ward C'},
+            {'bed_number': 'B000', 'ward': 'Ward C'},
+        ])
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2])
+        response, _ = self.post('/api/beds/bulk/', [{'bed_number': f'N{i}', 'ward': 'Ward A'} for i in range(5)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Bed.objects.filter(bed_number__startswith='N').count(), 5)
+
+
+class CSVImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=2)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    @staticmethod
+    def csv_file(header, rows, name='import.csv'):
+        content = '\n'.join([','.join(header)] + [','.join(str(value) for value in row) for row in rows])
+        upload = io.BytesIO(content.encode())
+        upload.name = name
+        return upload
+
+    def patient_rows(self, count, start=0):
+        return [[f'Imported {i}', 30 + i % 40, 'Female', '555-0300', f'N{i:05d}', 'doc1'] for i in range(start, start + count)]
+
+    def upload(self, kind, upload, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client(self.receptionist).post(
+                f'/api/imports/{kind}/?{query}', {'file': upload}, format='multipart',
+            )
+        return response, len(ctx.captured_queries)
+
+    def test_beds_then_patients_in_chunks(self):
+        beds = [[f'N{i:05d}', 'Ward B'] for i in range(30)] + [['B000', 'Ward A'], ['N00001', 'Ward A'], ['N99', 'Ward Z']]
+        response, _ = self.upload('beds', self.csv_file(['bed_number', 'ward'], beds))
+        self.assertEqual(response.status_code, 201, response.content)
+        report = response.json()
+        self.assertEqual((report['rows'], report['created'], report['error_count']), (33, 30, 3))
+        self.assertEqual([error['line'] for error in report['errors']], [32, 33, 34])
+
+        header = ['name', 'age', 'gender', 'contact', 'bed_number', 'doctor_username']
+        small, small_queries = self.upload('patients', self.csv_file(header, self.patient_rows(5)), chunk_size=100)
+        large, large_queries = self.upload('patients', self.csv_file(header, self.patient_rows(20, start=5)),
+                                           chunk_size=100)
+        self.assertEqual((small.json()['created'], large.json()['created']), (5, 20))
+        # Lookups are loaded once per import, not per row
+        self.assertEqual(small_queries, large_queries)
+
+        imported = Patient.objects.filter(name__startswith='Imported')
+        self.assertEqual(imported.count(), 25)
+        self.assertEqual(set(imported.values_list('assigned_doctor__user__username', flat=True)), {'doc1'})
+        self.assertEqual(Bed.objects.filter(bed_number__startswith='N', is_occupied=True).count(), 25)
+        # The counters follow the chunks without a recount
+        counted = {row['ward']: (row['total'], row['occupied']) for row in bed_summary.get_summary()}
+        rebuilt = {ward: (row['total'], row['occupied']) for ward, row in bed_summary.rebuild().items()}
+        self.assertEqual(counted, rebuilt)
+
+        again, _ = self.upload('patients', self.csv_file(header, self.patient_rows(1) + [['X', 'old', 'Male', '1', 'N99999', 'nobody']]))
+        errors = {error['line']: error['errors'] for error in again.json()['errors']}
+        self.assertIn('bed_number', errors[2])
+        self.assertEqual(set(errors[3]), {'age', 'bed_number', 'doctor_username'})
+
+    def test_missing_columns_and_permissions(self):
+        response, _ = self.upload('patients', self.csv_file(['name'], [['Someone']]))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('age', response.json()['error'])
+        response = auth_client(self.doctors[0].user).post(
+            '/api/imports/beds/', {'file': self.csv_file(['bed_number', 'ward'], [])}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_command_resumes_after_committed_rows(self):
+        from django.core.management import call_command
+
+        path = f'{self.tmpdir}/doctors.csv'
+        with open(path, 'w') as f:
+            f.write('username,first_name,last_name,specialization,contact,availability\n')
+            for i in range(6):
+                f.write(f'newdoc{i},New,Doctor,Neurology,555-0400,"Monday,Wed"\n')
+        with open(f'{path}.progress', 'w') as f:
+            json.dump({'kind': 'doctors', 'rows': 4}, f)
+
+        call_command('import_csv', 'doctors', path, '--resume', '--chunk-size', '1', stdout=io.StringIO())
+        imported = Doctor.objects.filter(user__username__startswith='newdoc').select_related('user')
+        self.assertEqual(sorted(doctor.user.username for doctor in imported), ['newdoc4', 'newdoc5'])
+        doctor = imported[0]
+        self.assertEqual((doctor.user.role, doctor.availability_mask), ('doctor', 1 | 4))
+        self.assertFalse(doctor.user.has_usable_password())
+
+    def test_each_distinct_password_is_hashed_once(self):
+        from .csv_import import DoctorImporter
+
+        rows = [['shared1', 'welcome1'], ['shared2', 'welcome1'], ['own', 'secret99'], ['none', '']]
+        lines = ['username,password,specialization,contact,availability'] + [
+            f'{username},{password},Neurology,555-0400,Monday' for username, password in rows
+        ]
+        with mock.patch('api.csv_import.make_password', wraps=make_password) as hashed:
+            report = DoctorImporter().run(io.StringIO('\n'.join(lines)))
+        self.assertEqual(report['created'], 4)
+        self.assertEqual(hashed.call_count, 3)
+        users = {user.username: user for user in CustomUser.objects.filter(username__in=[row[0] for row in rows])}
+        self.assertTrue(users['shared2'].check_password('welcome1'))
+        self.assertTrue(users['own'].check_password('secret99'))
+        self.assertFalse(users['none'].has_usable_password())
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctors = populate(doctors=2, patients=8)
+        cls.receptionist = make_user('reception', 'receptionist')
+
+    def export(self, user, kind, **params):
+        client = auth_client(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'/api/exports/{kind}/', params)
+            body = b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+        return response, body, len(ctx.captured_queries)
+
+    def test_csv_export_in_one_query(self):
+        response, body, queries = self.export(self.receptionist, 'patients')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="patients_', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([int(row['id']) for row in rows], sorted(Patient.objects.values_list('id', flat=True)))
+        self.assertEqual(rows[0]['bed_number'], 'B000')
+        self.assertEqual(rows[0]['doctor_username'], 'doc0')
+        self.assertEqual(queries, 1)
+
+    def test_ndjson_follows_viewset_scoping_and_dates(self):
+        doctor = self.doctors[0]
+        response, body, _ = self.export(doctor.user, 'appointments', output='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), Appointment.objects.filter(doctor=doctor).count())
+        self.assertEqual({row['doctor_username'] for row in rows}, {'doc0'})
+
+        patient = Patient.objects.first()
+        _, body, _ = self.export(self.receptionist, 'prescriptions', output='ndjson', patient=patient.id)
+        self.assertEqual([json.loads(line)['patient_id'] for line in body.splitlines()], [patient.id])
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        _, body, _ = self.export(self.receptionist, 'prescriptions', output='ndjson', start=tomorrow)
+        self.assertEqual(body, '')
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.export(self.receptionist, 'beds')[0].status_code, 404)
+        self.assertEqual(self.export(self.receptionist, 'patients', output='xml')[0].status_code, 400)
+        self.assertEqual(self.export(self.receptionist, 'patients', start='last week')[0].status_code, 400)
+
+    def test_command_streams_to_a_file(self):
+        from django.core.management import call_command
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = f'{tmpdir}/appointments.csv'
+        call_command('export_data', 'appointments', '--file', path, '--chunk-size', '3', stderr=io.StringIO())
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), Appointment.objects.count())
+
+
+class SyntheticDataTests(TestCase):
+    counts = {'doctors': 4, 'beds': 40, 'patients': 60, 'appointments': 300, 'medicines': 80, 'diagnoses': 50}
+
+    def generate(self, seed=3, prefix='syn'):
+        from .synthetic import Generator
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return Generator(seed=seed, batch_size=25, prefix=prefix).generate(**self.counts)
+
+    def test_counts_and_derived_fields(self):
+        bed_summary.get_summary()
+        created = self.generate()
+        self.assertEqual(created, {
+            'CustomUser': 4, 'Doctor': 4, 'Bed': 40, 'Patient': 60,
+            'Appointment': 300, 'Medicine': 80, 'Diagnosis': 50,
+        })
+        for doctor in Doctor.objects.all():
+            self.assertEqual(doctor.availability_mask, weekday_mask(doctor.availability))
+        for medicine in Medicine.objects.all():
+            self.assertEqual(medicine.frequency_mask, frequency_mask(medicine.frequency))
+        # Written over the past PAST_DAYS (180) days, not all at once
+        for model in (Medicine, Diagnosis):
+            stamps = list(model.objects.values_list('created_at', 'updated_at'))
+            self.assertTrue(all(created == updated for created, updated in stamps))
+            self.assertGreater(len({created for created, _ in stamps}), len(stamps) // 2)
+            self.assertTrue(all(
+                datetime.now() - timedelta(days=181) < created <= datetime.now() for created, _ in stamps
+            ))
+        for appointment in Appointment.objects.select_related('doctor'):
+            self.assertTrue(appointment.doctor.availability_mask & (1 << appointment.appointment_date.weekday()))
+            if appointment.status != 'cancelled':
+                self.assertEqual(appointment.status == 'completed', appointment.appointment_date < date.today())
+
+        occupied = set(Bed.objects.filter(is_occupied=True).values_list('id', flat=True))
+        self.assertEqual(len(occupied), 34)
+        held = Patient.objects.exclude(assigned_bed=None).values_list('assigned_bed_id', flat=True)
+        self.assertEqual(occupied, set(held))
+        self.assertEqual(sum(row['occupied'] for row in bed_summary.get_summary()), 34)
+        counted = {row['ward']: (row['total'], row['occupied']) for row in bed_summary.get_summary()}
+        self.assertEqual(counted, {ward: (row['total'], row['occupied']) for ward, row in bed_summary.rebuild().items()})
+        self.assertFalse(AuditEvent.objects.exists())
+
+    def test_same_seed_same_data(self):
+        def snapshot(prefix):
+            patients = Patient.objects.filter(assigned_doctor__user__username__startswith=f'{prefix}_dr')
+            return (
+                list(patients.order_by('id').values_list('name', 'age', 'gender', 'condition', 'assigned_bed__ward')),
+                list(Appointment.objects.filter(patient__in=patients).order_by('id')
+                     .values_list('appointment_date', 'appointment_time', 'status')),
+                list(Medicine.objects.filter(patient__in=patients).order_by('id')
+                     .values_list('medicine_name', 'frequency', 'no_of_days')),
+            )
+
+        self.generate(prefix='one')
+        self.generate(prefix='two')
+        self.assertEqual(snapshot('one'), snapshot('two'))
+        self.generate(seed=4, prefix='three')
+        self.assertNotEqual(snapshot('one'), snapshot('three'))
+
+    def test_command_refuses_an_existing_prefix(self):
+        from django.core.management import CommandError, call_command
+
+        self.generate()
+        with self.assertRaises(CommandError):
+            call_command('generate_data', '--prefix', 'syn', stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('generate_data', '--prefix', 'toolongprefix', stdout=io.StringIO())
+
+
+@tag('benchmark')
+class EndpointBenchmarkTests(TestCase):
+    """Every route on growing synthetic datasets, against the recorded baseline (api/benchmarks.py)"""
+
+    def setUp(self):
+        report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, report_dir, ignore_errors=True)
+        settings_override = override_settings(PDF_REPORT_CACHE_DIR=report_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_compare_flags_regressions(self):
+        from . import benchmarks
+
+        def result(queries, median, p95, peak):
+            stats = {'queries': queries, 'median_ms': median, 'p95_ms': p95, 'peak_kb': peak}
+            return {'100': {'routes': {'patient-list': stats}}}
+
+        baseline = {'results': result(2, 10, 20, 100)}
+        self.assertEqual(benchmarks.compare(result(2, 12, 60, 100), baseline, 1.0, 10, 256), ([], []))
+        self.assertEqual(benchmarks.compare(result(2, 25, 45, 2000), baseline, 1.0, 10, 256), ([], [
+            '100 patients, patient-list: p95 45ms, median 25ms (baseline 20ms, 10ms)',
+            '100 patients, patient-list: peak 2000KB (baseline 100KB)',
+        ]))
+        self.assertEqual(benchmarks.compare(result(3, 10, 20, 100), baseline, 1.0, 10, 256), (
+            ['100 patients, patient-list: 3 queries (baseline 2)'], [],
+        ))
+        self.assertEqual(benchmarks.compare(result(9, 99, 99, 9999), {'results': {}}, 1.0, 10, 256), ([], []))
+
+    @skipUnless(os.environ.get('RUN_BENCHMARKS') == '1', 'Set RUN_BENCHMARKS=1 to run the endpoint benchmarks')
+    def test_routes_against_baseline(self):
+        from contextlib import redirect_stdout
+        from django.conf import settings
+        from . import benchmarks
+
+        # Some views print debug lines on every request
+        with redirect_stdout(io.StringIO()):
+            results = benchmarks.run(settings.BENCHMARK_SIZES, settings.BENCHMARK_REPEAT)
+
+        failed = [
+            f'{size} patients, {name}: HTTP {stats["status"]}'
+            for size, run in results.items() for name, stats in run['routes'].items() if stats['status'] >= 400
+        ]
+        self.assertFalse(failed, '\n'.join(failed))
+        # Every named route is benchmarked, except the SSE stream
+        from .urls import router, urlpatterns
+        names = {getattr(pattern, 'name', None) for pattern in [*urlpatterns, *router.urls]} - {None, 'live_events'}
+        covered = {stats['url_name'] for run in results.values() for stats in run['routes'].values()}
+        self.assertEqual(names - covered, set())
+
+        if not os.path.exists(settings.BENCHMARK_BASELINE):
+            benchmarks.write(settings.BENCHMARK_BASELINE, results, settings.BENCHMARK_REPEAT)
+            return
+        benchmarks.write(settings.BENCHMARK_RESULTS, results, settings.BENCHMARK_REPEAT)
+        queries, timings = benchmarks.compare(
+            results, benchmarks.load(settings.BENCHMARK_BASELINE), settings.BENCHMARK_TOLERANCE,
+            settings.BENCHMARK_LATENCY_FLOOR_MS, settings.BENCHMARK_MEMORY_FLOOR_KB,
+        )
+        if timings and not settings.BENCHMARK_GATE_TIMINGS:
+            # Timings vary too much between runs and machines to fail on by default
+            print('Slower than the baseline:\n' + '\n'.join(timings))
+            timings = []
+        regressions = queries + timings
+        self.assertFalse(regressions, 'Regressed against the baseline:\n' + '\n'.join(regressions))
@@ -9,10 +9,19 @@ from .views import (
     AppointmentViewSet,
     MedicineViewSet,
     DiagnosisViewSet,
+    AuditEventViewSet,
     UserInfoView,
     DebugDataView,
     DoctorAvailabilityView,
+    DoctorFreeSlotsView,
+    MedicationRoundView,
+    SearchView,
+    CSVImportView,
+    ExportView,
+    live_events,
+    ReceptionistDashboardDataView,
     PatientReportPDFView,
+    PatientReportBundleView,
     TestPDFView
 )
 
@@ -24,6 +33,7 @@ router.register(r'beds', BedViewSet, basename='bed')
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
 router.register(r'medicines', MedicineViewSet, basename='medicine')
 router.register(r'diagnoses', DiagnosisViewSet, basename='diagnosis')
+router.register(r'audit-events', AuditEventViewSet, basename='audit-event')
 
 # The API URLs are now automatically generated by the router.
 urlpatterns = [
@@ -32,7 +42,15 @@ urlpatterns = [
     path('user-info/', UserInfoView.as_view(), name='user_info'),
     path('debug-data/', DebugDataView.as_view(), name='debug_data'),
     path('doctor-availability/', DoctorAvailabilityView.as_view(), name='doctor_availability'),
+    path('doctor-availability/slots/', DoctorFreeSlotsView.as_view(), name='doctor_free_slots'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('live/', live_events, name='live_events'),
+    path('imports/<str:kind>/', CSVImportView.as_view(), name='csv_import'),
+    path('exports/<str:kind>/', ExportView.as_view(), name='export'),
+    path('medication-rounds/', MedicationRoundView.as_view(), name='medication_rounds'),
+    path('dashboard/receptionist/', ReceptionistDashboardDataView.as_view(), name='receptionist_dashboard_data'),
     path('patient-report-pdf/<int:patient_id>/', PatientReportPDFView.as_view(), name='patient_report_pdf'),
+    path('patient-reports/export/', PatientReportBundleView.as_view(), name='patient_report_bundle'),
     path('test-pdf/', TestPDFView.as_view(), name='test_pdf'),
     
     # Add the router-generated URLs
@@ -2,15 +2,22 @@
 
 from django.shortcuts import render, redirect
 from django.contrib.auth import logout
+from django.db.models import Count, Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
 from rest_framework import serializers
-from .serializers import MyTokenObtainPairSerializer, DoctorSerializer, PatientSerializer, BedSerializer, AppointmentSerializer, MedicineSerializer, DiagnosisSerializer
+from .serializers import MyTokenObtainPairSerializer, DoctorSerializer, PatientSerializer, BedSerializer, AppointmentSerializer, MedicineSerializer, DiagnosisSerializer, AuditEventSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import Doctor, Patient, Bed, Appointment, Medicine, Diagnosis
-from .permissions import IsAdminOrReceptionist, IsDoctor # Import new permissions
+from .models import Doctor, Patient, Bed, Appointment, Medicine, Diagnosis, AuditEvent, DOSE_SLOTS
+from .permissions import IsAdmin, IsAdminOrReceptionist, IsDoctor # Import new permissions
+from .pagination import AlwaysCursorPagination
+from . import bed_summary, bed_transfers, live, medication_rounds, reports, pdf_pool, search, slots
+from .versions import VersionedETagMixin
+from .changes import ChangeFeedMixin
+from .bulk import BulkWriteMixin
 
 # Custom Login View - Standard JWT approach, only returns tokens
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -39,24 +46,58 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         
         return response
 
-class DoctorViewSet(viewsets.ModelViewSet):
-    queryset = Doctor.objects.all()
+# Maximum number of SQL queries each ViewSet may issue per request, including
+# any made by authentication (none while the user is in the JWT user cache)
+# and the version read behind the ETag. Enforced by the tests in api/tests.py,
+# so an N+1 regression in a serializer fails the build instead of the ward.
+# `etag_models` lists every model a ViewSet renders (see api/versions.py).
+# ChangeFeedMixin serves ?since= change feeds from the same scoped queryset
+# (see api/changes.py); BulkWriteMixin adds the /bulk/ create and update
+# action (see api/bulk.py).
+class DoctorViewSet(VersionedETagMixin, ChangeFeedMixin, viewsets.ModelViewSet):
+    # full_name, email etc. come from the linked user
+    queryset = Doctor.objects.select_related('user')
     serializer_class = DoctorSerializer
     # Only receptionists and admins can manage doctors
     permission_classes = [IsAdminOrReceptionist]
+    query_budget = {'list': 2, 'retrieve': 2}
+    etag_models = ('Doctor', 'CustomUser')
 
-class PatientViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        """Optional ?available_on=YYYY-MM-DD and ?specialization= filters, applied in the database"""
+        queryset = super().get_queryset()
+        available_on = self.request.query_params.get('available_on')
+        if available_on:
+            from datetime import datetime
+            try:
+                day = datetime.strptime(available_on, '%Y-%m-%d').date()
+            except ValueError:
+                raise serializers.ValidationError({'available_on': 'Invalid date format. Use YYYY-MM-DD'})
+            queryset = queryset.available_on(day)
+        specialization = self.request.query_params.get('specialization')
+        if specialization:
+            queryset = queryset.filter(specialization__iexact=specialization)
+        return queryset
+
+def patients_visible_to(user):
+    """Patients a user may see: doctors get their own, staff get everyone"""
+    if user.role == 'doctor':
+        # Filter through the join instead of loading user.doctor_profile first;
+        # by id, since request.user is built from the token claims
+        return Patient.objects.filter(assigned_doctor__user_id=user.id)
+    elif user.role in ['admin', 'receptionist']:
+        return Patient.objects.all()
+    return Patient.objects.none()
+
+class PatientViewSet(VersionedETagMixin, ChangeFeedMixin, BulkWriteMixin, viewsets.ModelViewSet):
     serializer_class = PatientSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2}
+    etag_models = ('Patient', 'Bed', 'Doctor', 'CustomUser')
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'doctor':
-            # Use the direct relationship! This is robust.
-            return Patient.objects.filter(assigned_doctor=user.doctor_profile)
-        elif user.role in ['admin', 'receptionist']:
-            return Patient.objects.all()
-        return Patient.objects.none()
+        # Bed number/ward and doctor name are rendered for every row
+        return patients_visible_to(self.request.user).select_related('assigned_bed', 'assigned_doctor__user')
     
     def perform_create(self, serializer):
         """Override to add bed validation during patient creation"""
@@ -76,7 +117,7 @@ class PatientViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         """Override to add bed validation during patient updates"""
         assigned_bed = serializer.validated_data.get('assigned_bed')
-        patient = self.get_object()
+        patient = serializer.instance
         
         # Check if bed is already occupied by another patient
         if assigned_bed and assigned_bed != patient.assigned_bed and assigned_bed.is_occupied:
@@ -89,23 +130,70 @@ class PatientViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class BedViewSet(viewsets.ModelViewSet):
-    queryset = Bed.objects.all()
+class BedViewSet(VersionedETagMixin, ChangeFeedMixin, BulkWriteMixin, viewsets.ModelViewSet):
+    # patient_name follows the reverse one-to-one from Patient.assigned_bed
+    queryset = Bed.objects.select_related('patient')
     serializer_class = BedSerializer
     # Only receptionists and admins can manage beds
     permission_classes = [IsAdminOrReceptionist]
+    query_budget = {'list': 2, 'retrieve': 2}
+    etag_models = ('Bed', 'Patient')
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def summary(self, request):
+        """Total, occupied and free beds per ward, from the per-ward counters"""
+        return Response(bed_summary.get_summary())
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def transfer(self, request):
+        """
+        Move patients between beds atomically. Accepts one of:
+        {"patient": 1, "bed": 5}  (bed null discharges from the bed)
+        {"transfers": [{"patient": 1, "bed": 5}, ...]}
+        {"from_ward": "Ward A", "to_ward": "Ward B"}
+        """
+        data = request.data
+        try:
+            if 'from_ward' in data:
+                ward_names = [ward for ward, _ in Bed.WARD_CHOICES]
+                if data.get('from_ward') not in ward_names or data.get('to_ward') not in ward_names:
+                    return Response({'error': f"from_ward and to_ward must be one of: {', '.join(ward_names)}"}, status=400)
+                if data['from_ward'] == data['to_ward']:
+                    return Response({'error': 'from_ward and to_ward must differ'}, status=400)
+                results = bed_transfers.transfer_ward(data['from_ward'], data['to_ward'])
+            else:
+                items = data.get('transfers') if 'transfers' in data else [data]
+                if not isinstance(items, list):
+                    return Response({'error': 'transfers must be a list'}, status=400)
+                moves = {}
+                for item in items:
+                    patient_id, bed_id = int(item['patient']), item.get('bed')
+                    if patient_id in moves:
+                        return Response({'error': f'Patient {patient_id} appears more than once'}, status=400)
+                    moves[patient_id] = int(bed_id) if bed_id is not None else None
+                results = bed_transfers.transfer_patients(moves)
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Each transfer needs a numeric patient and a numeric or null bed'}, status=400)
+        except bed_transfers.BedTransferError as e:
+            return Response({'error': str(e)}, status=e.status)
+
+        return Response({'transferred': len(results), 'transfers': results})
+
+class AppointmentViewSet(VersionedETagMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2}
+    etag_models = ('Appointment', 'Patient', 'Doctor', 'CustomUser')
+    cursor_ordering = ('appointment_date', 'id')
 
     def get_queryset(self):
         user = self.request.user
+        queryset = Appointment.objects.select_related('patient', 'doctor__user')
         if user.role == 'doctor':
             # Use the direct relationship here as well!
-            return Appointment.objects.filter(doctor=user.doctor_profile)
+            return queryset.filter(doctor__user_id=user.id)
         elif user.role in ['admin', 'receptionist']:
-            return Appointment.objects.all()
+            return queryset.all()
         return Appointment.objects.none()
 
     def create(self, request, *args, **kwargs):
@@ -134,34 +222,50 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         
         return response
 
-class MedicineViewSet(viewsets.ModelViewSet):
+class MedicineViewSet(VersionedETagMixin, ChangeFeedMixin, BulkWriteMixin, viewsets.ModelViewSet):
     serializer_class = MedicineSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2}
+    etag_models = ('Medicine', 'Patient', 'Bed')
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         user = self.request.user
         queryset = Medicine.objects.none()
         
         if user.role in ['admin', 'receptionist', 'doctor']:
-            queryset = Medicine.objects.all()
+            queryset = Medicine.objects.select_related('patient')
             
             # Filter by patient if provided in query params
             patient_id = self.request.query_params.get('patient', None)
             if patient_id is not None:
                 queryset = queryset.filter(patient_id=patient_id)
+            
+            # Filter by dose slot (?due_at=Lunch) and by the patient's ward (?ward=Ward B)
+            due_at = self.request.query_params.get('due_at', None)
+            if due_at is not None:
+                if due_at not in DOSE_SLOTS:
+                    raise serializers.ValidationError({'due_at': f"Valid choices are: {', '.join(DOSE_SLOTS)}"})
+                queryset = queryset.due_at(due_at)
+            ward = self.request.query_params.get('ward', None)
+            if ward is not None:
+                queryset = queryset.filter(patient__assigned_bed__ward=ward)
                 
         return queryset.order_by('-created_at')
 
-class DiagnosisViewSet(viewsets.ModelViewSet):
+class DiagnosisViewSet(VersionedETagMixin, ChangeFeedMixin, viewsets.ModelViewSet):
     serializer_class = DiagnosisSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2}
+    etag_models = ('Diagnosis', 'Patient')
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         user = self.request.user
         queryset = Diagnosis.objects.none()
         
         if user.role in ['admin', 'receptionist', 'doctor']:
-            queryset = Diagnosis.objects.all()
+            queryset = Diagnosis.objects.select_related('patient')
             
             # Filter by patient if provided in query params
             patient_id = self.request.query_params.get('patient', None)
@@ -171,6 +275,36 @@ class DiagnosisViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-created_at')
 
 
+class AuditEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Audit trail, newest first. Filter with ?start= and ?end= (ISO datetimes,
+    served from the timestamp index), ?model= and ?object_id=.
+    """
+    serializer_class = AuditEventSerializer
+    permission_classes = [IsAdmin]
+    pagination_class = AlwaysCursorPagination
+    cursor_ordering = ('-timestamp', '-id')
+    query_budget = {'list': 2, 'retrieve': 2}
+
+    def get_queryset(self):
+        from django.utils.dateparse import parse_datetime, parse_date
+        queryset = AuditEvent.objects.all()
+        params = self.request.query_params
+
+        for param, lookup in (('start', 'timestamp__gte'), ('end', 'timestamp__lt')):
+            value = params.get(param)
+            if value:
+                parsed = parse_datetime(value) or parse_date(value)
+                if parsed is None:
+                    raise serializers.ValidationError({param: 'Use an ISO date or datetime, e.g. 2025-01-31T08:00'})
+                queryset = queryset.filter(**{lookup: parsed})
+
+        if params.get('model'):
+            queryset = queryset.filter(model=params['model'])
+        if params.get('object_id'):
+            queryset = queryset.filter(object_id=params['object_id'])
+        return queryset
+
 # Login Page View
 def login_view(request):
     return render(request, 'api/login.html')
@@ -205,7 +339,8 @@ class UserInfoView(APIView):
         # If user is a doctor, include doctor profile information
         if user.role == 'doctor':
             try:
-                doctor_profile = user.doctor_profile
+                # Read fresh: the full user behind request.user may be cached
+                doctor_profile = Doctor.objects.get(user_id=user.id)
                 response_data.update({
                     'doctor_info': {
                         'id': doctor_profile.id,
@@ -229,6 +364,126 @@ class UserInfoView(APIView):
         
         return Response(response_data)
 
+# Aggregated data for the receptionist dashboard cards
+class ReceptionistDashboardDataView(APIView):
+    permission_classes = [IsAdminOrReceptionist]
+    upcoming_limit = 50
+    today_limit = 50
+    # Bed tiles drawn per ward, free beds first; ?tiles_offset= pages on
+    # through every ward, ?ward= keeps the tiles to one ward
+    tiles_per_ward = 40
+
+    @staticmethod
+    def appointment_rows(queryset, limit):
+        return [
+            {
+                'id': row['id'],
+                'appointment_date': row['appointment_date'],
+                'appointment_time': row['appointment_time'],
+                'status': row['status'],
+                'patient_name': row['patient__name'],
+                'doctor_name': f"{row['doctor__user__first_name']} {row['doctor__user__last_name']}".strip(),
+            }
+            for row in queryset.order_by('appointment_date', 'appointment_time')
+            .values('id', 'appointment_date', 'appointment_time', 'status', 'patient__name',
+                    'doctor__user__first_name', 'doctor__user__last_name')[:limit]
+        ]
+
+    def get(self, request):
+        """Counts and the few rows the dashboard shows, computed with GROUP BY aggregates"""
+        from datetime import date
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
+        today = date.today()
+
+        ward = request.query_params.get('ward')
+        try:
+            tiles_offset = int(request.query_params.get('tiles_offset', 0))
+        except ValueError:
+            tiles_offset = -1
+        if tiles_offset < 0:
+            return Response({'error': 'tiles_offset must be a non-negative number'}, status=400)
+
+        # Beds: per-ward occupancy from the counters, plus a bounded page of
+        # the compact tiles drawn in the bed overview
+        wards = bed_summary.get_summary()
+        beds = Bed.objects.filter(ward=ward) if ward else Bed.objects.all()
+        bed_tiles = list(
+            beds.annotate(position=Window(
+                RowNumber(), partition_by=[F('ward')], order_by=[F('is_occupied').asc(), F('bed_number').asc()],
+            ))
+            .filter(position__gt=tiles_offset, position__lte=tiles_offset + self.tiles_per_ward)
+            .order_by('ward', 'position')
+            .values('id', 'bed_number', 'ward', 'is_occupied')
+        )
+        more_tiles = any(
+            row['total'] > tiles_offset + self.tiles_per_ward for row in wards if not ward or row['ward'] == ward
+        )
+
+        patient_counts = Patient.objects.aggregate(
+            total=Count('id'),
+            without_bed=Count('id', filter=Q(assigned_bed__isnull=True)),
+        )
+
+        # Appointments: today's breakdown by status, and the first rows of
+        # today and of what is coming up
+        today_by_status = {status: 0 for status, _ in Appointment.STATUS_CHOICES}
+        for row in Appointment.objects.filter(appointment_date=today).values('status').annotate(count=Count('id')).order_by():
+            today_by_status[row['status']] = row['count']
+        today_rows = self.appointment_rows(
+            Appointment.objects.filter(appointment_date=today).exclude(status='cancelled'), self.today_limit,
+        )
+        upcoming_appointments = Appointment.objects.filter(appointment_date__gte=today)
+        upcoming = self.appointment_rows(upcoming_appointments, self.upcoming_limit)
+
+        # Per-doctor load. Counted by two separate GROUP BYs: annotating both
+        # counts on Doctor joins every patient with every appointment first
+        patient_load = dict(
+            Patient.objects.exclude(assigned_doctor=None).values_list('assigned_doctor')
+            .annotate(count=Count('id')).order_by()
+        )
+        today_load = dict(
+            Appointment.objects.filter(appointment_date=today).values_list('doctor')
+            .annotate(count=Count('id')).order_by()
+        )
+        doctors = [
+            {
+                'id': row['id'],
+                'name': f"{row['user__first_name']} {row['user__last_name']}".strip(),
+                'specialization': row['specialization'],
+                'patient_count': patient_load.get(row['id'], 0),
+                'today_appointments': today_load.get(row['id'], 0),
+            }
+            for row in Doctor.objects.values(
+                'id', 'user__first_name', 'user__last_name', 'specialization',
+            ).order_by('id')
+        ]
+
+        total_beds = sum(row['total'] for row in wards)
+        occupied_beds = sum(row['occupied'] for row in wards)
+
+        return Response({
+            'date': today,
+            'patients': patient_counts,
+            'beds': {
+                'total': total_beds,
+                'occupied': occupied_beds,
+                'free': total_beds - occupied_beds,
+                'by_ward': wards,
+                'tiles': bed_tiles,
+                'tiles_next_offset': tiles_offset + self.tiles_per_ward if more_tiles else None,
+            },
+            'appointments': {
+                'total': Appointment.objects.count(),
+                'today_by_status': today_by_status,
+                'today_count': sum(today_by_status.values()) - today_by_status['cancelled'],
+                'today': today_rows,
+                'upcoming': upcoming,
+                'upcoming_count': upcoming_appointments.count(),
+            },
+            'doctors': doctors,
+        })
+
 # Debug view to check data
 class DebugDataView(APIView):
     permission_classes = [IsAuthenticated]
@@ -304,6 +559,246 @@ class DoctorAvailabilityView(APIView):
         
         return Response(response_data)
 
+# Open appointment slots for one or many doctors over a date range
+class DoctorFreeSlotsView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_days = 31
+
+    def get(self, request):
+        """?doctor_id=1,2 (default: all doctors), ?start=YYYY-MM-DD, ?end=YYYY-MM-DD (default: start)"""
+        from datetime import datetime, date
+
+        try:
+            start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date() \
+                if 'start' in request.query_params else date.today()
+            end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date() \
+                if 'end' in request.query_params else start
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+        if end < start:
+            return Response({'error': 'end must not be before start'}, status=400)
+        if (end - start).days >= self.max_days:
+            return Response({'error': f'Date range is limited to {self.max_days} days'}, status=400)
+
+        doctors = Doctor.objects.select_related('user').order_by('id')
+        doctor_ids = request.query_params.get('doctor_id')
+        if doctor_ids:
+            try:
+                doctors = doctors.filter(id__in=[int(pk) for pk in doctor_ids.split(',') if pk.strip()])
+            except ValueError:
+                return Response({'error': 'doctor_id must be a comma-separated list of ids'}, status=400)
+        doctors = list(doctors)
+
+        open_slots = slots.free_slots(doctors, start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'doctors': [
+                {
+                    'doctor_id': doctor.id,
+                    'doctor_name': doctor.user.get_full_name(),
+                    'specialization': doctor.specialization,
+                    'available_days': doctor.get_available_days(),
+                    'slots': [
+                        {'date': day, 'times': times} for day, times in open_slots[doctor.id].items()
+                    ],
+                }
+                for doctor in doctors
+            ],
+        })
+
+# Per-ward medication round (MAR) for one day, grouped by dose slot and relation to food
+class MedicationRoundView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """?ward=Ward A (required), ?date=YYYY-MM-DD (default: today), ?output=json|csv"""
+        from django.http import StreamingHttpResponse
+        from datetime import datetime, date
+
+        ward = request.query_params.get('ward')
+        if not ward:
+            return Response({'error': 'ward parameter is required'}, status=400)
+        try:
+            day = datetime.strptime(request.query_params['date'], '%Y-%m-%d').date() \
+                if 'date' in request.query_params else date.today()
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+        # ?format= is taken by DRF's renderer negotiation
+        output = request.query_params.get('output', 'json')
+        if output not in ('json', 'csv'):
+            return Response({'error': 'output must be json or csv'}, status=400)
+
+        rounds = medication_rounds.active_doses(Medicine.objects.all(), ward, day)
+        if output == 'csv':
+            response = StreamingHttpResponse(medication_rounds.stream_csv(rounds), content_type='text/csv')
+            safe_ward = ''.join(c if c.isalnum() else '_' for c in ward)
+            response['Content-Disposition'] = f'attachment; filename="medication_round_{safe_ward}_{day}.csv"'
+            return response
+        return StreamingHttpResponse(
+            medication_rounds.stream_json(ward, day, rounds), content_type='application/json'
+        )
+
+# Ranked full-text search over patients, diagnoses and medicines
+class SearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        """?q=text (required), ?kind=patient,diagnosis,medicine, ?page=1, ?page_size=20"""
+        from rest_framework.utils.urls import replace_query_param
+
+        text = request.query_params.get('q', '').strip()
+        if not search.match_expression(text):
+            return Response({'error': 'q parameter is required'}, status=400)
+        kinds = request.query_params.get('kind')
+        kinds = [kind.strip() for kind in kinds.split(',') if kind.strip()] if kinds else list(search.KINDS)
+        invalid = [kind for kind in kinds if kind not in search.KINDS]
+        if invalid:
+            return Response({'error': f"Valid kinds are: {', '.join(search.KINDS)}"}, status=400)
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', self.page_size)), 1), self.max_page_size)
+        except ValueError:
+            return Response({'error': 'page and page_size must be numbers'}, status=400)
+
+        # One extra hit tells whether there is a next page without a COUNT
+        hits = search.search(
+            text, patients_visible_to(request.user), kinds,
+            limit=page_size + 1, offset=(page - 1) * page_size,
+        )
+        url = request.build_absolute_uri()
+        return Response({
+            'query': text,
+            'next': replace_query_param(url, 'page', page + 1) if len(hits) > page_size else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            'results': hits[:page_size],
+        })
+
+class CSVImportView(APIView):
+    """
+    POST a CSV file (multipart field "file") to /api/imports/<kind>/ for
+    beds, doctors or patients. ?skip=N resumes after the N rows a failed
+    upload already committed; ?chunk_size= sets the rows per transaction.
+    """
+    permission_classes = [IsAdminOrReceptionist]
+
+    def post(self, request, kind):
+        import io
+        from django.db import DatabaseError
+        from .csv_import import IMPORTERS, CSVImportError
+
+        if kind not in IMPORTERS:
+            return Response({'error': f"Valid kinds are: {', '.join(IMPORTERS)}"}, status=404)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Upload the CSV as the "file" field'}, status=400)
+        try:
+            skip = max(int(request.query_params.get('skip', 0)), 0)
+            chunk_size = min(max(int(request.query_params.get('chunk_size', 1000)), 1), 10000)
+        except ValueError:
+            return Response({'error': 'skip and chunk_size must be numbers'}, status=400)
+
+        importer = IMPORTERS[kind](chunk_size=chunk_size)
+        committed = {'rows': skip}
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = importer.run(stream, skip=skip, on_commit=lambda rows: committed.update(rows=rows))
+        except CSVImportError as e:
+            return Response({'error': str(e)}, status=400)
+        except (UnicodeDecodeError, DatabaseError) as e:
+            # Chunks before the failure stay committed; resume with ?skip=
+            return Response({'error': str(e), 'committed_rows': committed['rows']}, status=409)
+        return Response({**report, 'committed_rows': committed['rows']}, status=201)
+
+class ExportView(APIView):
+    """
+    GET /api/exports/<kind>/ streams patients, appointments or prescriptions
+    as ?output=csv (default) or ndjson, optionally within ?start= / ?end=.
+    Rows are the ones the matching list endpoint shows, with its filters.
+    """
+    permission_classes = [IsAuthenticated]
+    viewsets = {
+        'patients': PatientViewSet,
+        'appointments': AppointmentViewSet,
+        'prescriptions': MedicineViewSet,
+    }
+    chunk_size = 2000
+
+    def get(self, request, kind):
+        from django.http import StreamingHttpResponse
+        from . import exports
+
+        if kind not in exports.EXPORTS:
+            return Response({'error': f"Valid kinds are: {', '.join(exports.EXPORTS)}"}, status=404)
+        # ?format= is taken by DRF's renderer negotiation
+        output = request.query_params.get('output', 'csv')
+        if output not in exports.FORMATS:
+            return Response({'error': f"output must be one of: {', '.join(exports.FORMATS)}"}, status=400)
+        try:
+            start, end = (
+                exports.parse_bound(request.query_params[param]) if request.query_params.get(param) else None
+                for param in ('start', 'end')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        viewset = self.viewsets[kind](request=request, action='list', format_kwarg=None, kwargs={})
+        viewset.check_permissions(request)
+        rows = exports.export_rows(kind, viewset.get_queryset(), start, end, self.chunk_size)
+        stream, content_type = exports.STREAMS[output]
+        response = StreamingHttpResponse(stream(kind, rows, self.chunk_size), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{exports.filename(kind, output)}"'
+        return response
+
+# Server-Sent Events stream of bed, patient and appointment changes (see
+# api/live.py). A plain view rather than an APIView, so the ASGI application
+# can be handed an async body that does not hold a thread between polls.
+def live_events(request):
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse, StreamingHttpResponse
+    from rest_framework.exceptions import AuthenticationFailed
+    from .authentication import CustomJWTAuthentication
+
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    try:
+        authenticated = CustomJWTAuthentication().authenticate(request)
+    except AuthenticationFailed as e:
+        detail = e.detail.get('detail', e.detail) if isinstance(e.detail, dict) else e.detail
+        return JsonResponse({'detail': str(detail)}, status=401)
+    if authenticated is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    user = authenticated[0]
+    doctor_id = None
+    if user.role == 'doctor':
+        doctor_id = Doctor.objects.filter(user_id=user.id).values_list('id', flat=True).first()
+        if doctor_id is None:
+            return JsonResponse({'error': 'Doctor profile not found'}, status=404)
+    elif user.role not in live.STAFF_ROLES:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    # Resume after the last event the client saw, if it says
+    last_event = request.headers.get('Last-Event-ID', '')
+    position = int(last_event) if last_event.isdigit() else None
+    feed = live.Feed(user.role, doctor_id, position)
+    if isinstance(request, ASGIRequest):
+        body = live.astream(feed)
+    else:
+        body = live.wsgi_streams.open(feed)
+        if body is None:
+            response = JsonResponse({'error': 'Too many live streams open, poll the change feeds instead'}, status=503)
+            response['Retry-After'] = '30'
+            return response
+
+    response = StreamingHttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # Redirection logic based on role (kept for backward compatibility)
 class RoleRedirectView(APIView):
     permission_classes = [IsAuthenticated]
@@ -341,22 +836,27 @@ class DoctorDashboardView(APIView):
             return Response({"error": "Forbidden"}, status=403)
         return render(request, 'api/doctor_dashboard.html')
 
+def pdf_busy_response():
+    """503 returned when the PDF render queue is full"""
+    from django.conf import settings
+    response = Response({'error': 'PDF rendering is busy, please retry shortly'}, status=503)
+    response['Retry-After'] = str(settings.PDF_RENDER_RETRY_AFTER)
+    return response
+
 # PDF Generation View
 class PatientReportPDFView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, patient_id):
-        """Generate a comprehensive PDF report for a patient"""
+        """Generate a comprehensive PDF report for a patient, served from the report cache when unchanged"""
         print(f"PDF generation requested for patient ID: {patient_id}")
         print(f"User: {request.user}")
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.lib import colors
-            from django.http import HttpResponse
+            from django.http import FileResponse
+            from django.utils.cache import get_conditional_response
+            from django.utils.http import http_date
             import datetime
+            import os
             
             # Get patient data with error handling
             try:
@@ -364,154 +864,42 @@ class PatientReportPDFView(APIView):
             except Patient.DoesNotExist:
                 return Response({'error': 'Patient not found'}, status=404)
             
-            medicines = Medicine.objects.filter(patient=patient)
-            diagnoses = Diagnosis.objects.filter(patient=patient)
+            medicines = list(Medicine.objects.filter(patient=patient))
+            diagnoses = list(Diagnosis.objects.filter(patient=patient))
+            generated_by = request.user.get_full_name() or request.user.username
             
-            # Create the HttpResponse object with PDF headers for inline viewing
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'inline; filename="patient_report_{patient.name}_{datetime.date.today()}.pdf"'
+            # The ETag is the fingerprint of the printed rows; a match means the
+            # client's copy is current and ReportLab is never touched
+            fingerprint = reports.report_fingerprint(patient, medicines, diagnoses, generated_by)
+            etag = f'"{fingerprint}"'
+            pdf_file = reports.open_cached_report(patient.id, generated_by, fingerprint)
+            last_modified = int(os.fstat(pdf_file.fileno()).st_mtime) if pdf_file else None
             
-            # Create the PDF document
-            doc = SimpleDocTemplate(response, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Custom styles - Black and White theme
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                spaceAfter=20,
-                textColor=colors.black,
-                alignment=1  # Center alignment
-            )
-            
-            header_style = ParagraphStyle(
-                'CustomHeader',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=10,
-                textColor=colors.black
-            )
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                if pdf_file:
+                    pdf_file.close()
+                return not_modified
             
-            # Title
-            story.append(Paragraph("Patient Medical Report", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Patient Information Section
-            story.append(Paragraph("Patient Information", header_style))
-            
-            patient_data = [
-                ['Patient Name:', patient.name],
-                ['Patient ID:', str(patient.id)],
-                ['Age:', str(patient.age)],
-                ['Gender:', patient.gender],
-                ['Contact:', patient.contact],
-                ['Address:', patient.address],
-                ['Condition:', patient.condition],
-            ]
-            
-            patient_table = Table(patient_data, colWidths=[2*inch, 4*inch])
-            patient_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.white),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            
-            story.append(patient_table)
-            story.append(Spacer(1, 20))
-            
-            # Medicines Section
-            story.append(Paragraph("Prescribed Medicines", header_style))
-            
-            if medicines.exists():
-                medicine_data = [['Medicine Name', 'Dosage', 'Frequency', 'Date Prescribed']]
-                for med in medicines:
-                    frequency_display = ', '.join(med.frequency.split(',')) if med.frequency else 'As needed'
-                    medicine_data.append([
-                        med.medicine_name,
-                        med.dosage,
-                        frequency_display,
-                        med.created_at.strftime('%Y-%m-%d') if med.created_at else 'Not specified'
-                    ])
-                
-                medicine_table = Table(medicine_data, colWidths=[2*inch, 1.5*inch, 2*inch, 1.5*inch])
-                medicine_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.black),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 11),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 10),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ]))
-                
-                story.append(medicine_table)
-            else:
-                story.append(Paragraph("No medicines prescribed.", styles['Normal']))
-            
-            story.append(Spacer(1, 20))
-            
-            # Diagnoses Section
-            story.append(Paragraph("Medical Diagnoses", header_style))
-            
-            if diagnoses.exists():
-                diagnosis_data = [['Diagnosis', 'Description', 'Date']]
-                for diag in diagnoses:
-                    diagnosis_text = diag.diagnosis[:100] + '...' if len(diag.diagnosis) > 100 else diag.diagnosis
-                    diagnosis_data.append([
-                        diagnosis_text,
-                        'Diagnosis Details',  # Static description since no description field exists
-                        diag.created_at.strftime('%Y-%m-%d') if diag.created_at else 'Not specified'
-                    ])
-                
-                diagnosis_table = Table(diagnosis_data, colWidths=[2*inch, 3*inch, 2*inch])
-                diagnosis_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.black),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 11),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 10),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ]))
-                
-                story.append(diagnosis_table)
-            else:
-                story.append(Paragraph("No diagnoses recorded.", styles['Normal']))
-            
-            story.append(Spacer(1, 30))
-            
-            # Footer
-            footer_text = f"""
-            <para align="center">
-                <b>Report Generated:</b> {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>
-                <b>Generated by:</b> {request.user.get_full_name() or request.user.username}<br/>
-                <i>Hospital Management System</i>
-            </para>
-            """
-            story.append(Paragraph(footer_text, styles['Normal']))
-            
-            # Build the PDF
-            doc.build(story)
+            if pdf_file is None:
+                context = reports.report_context(patient, medicines, diagnoses, generated_by)
+                pdf_file = reports.store_report(
+                    patient.id, generated_by, fingerprint,
+                    lambda tmp_path: pdf_pool.render(reports.render_patient_report, tmp_path, context),
+                )
+                last_modified = int(os.fstat(pdf_file.fileno()).st_mtime)
+                print(f"PDF generated successfully for patient: {patient.name}")
             
-            print(f"PDF generated successfully for patient: {patient.name}")
+            # Inline viewing, revalidated on every view
+            response = FileResponse(pdf_file, content_type='application/pdf')
+            response['Content-Disposition'] = f'inline; filename="patient_report_{patient.name}_{datetime.date.today()}.pdf"'
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = 'private, no-cache'
             return response
             
-        except Patient.DoesNotExist:
-            print(f"Patient not found: {patient_id}")
-            return Response({'error': 'Patient not found'}, status=404)
+        except pdf_pool.RenderQueueFull:
+            return pdf_busy_response()
         except Exception as e:
             # Log the full error for debugging
             import traceback
@@ -519,6 +907,88 @@ class PatientReportPDFView(APIView):
             print(f"Traceback: {traceback.format_exc()}")
             return Response({'error': f'Failed to generate PDF: {str(e)}'}, status=500)
 
+# Bulk PDF export: a ZIP of per-patient reports, streamed as each one is ready
+class PatientReportBundleView(APIView):
+    permission_classes = [IsAuthenticated]
+    # Patients loaded (with their medicines and diagnoses) per round trip
+    chunk_size = 50
+
+    class _ZipStream:
+        """Write-only sink for zipfile; the generator drains it after every entry."""
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, data):
+            self.chunks.append(bytes(data))
+            return len(data)
+
+        def flush(self):
+            pass
+
+        def drain(self):
+            data = b''.join(self.chunks)
+            self.chunks = []
+            return data
+
+    def get(self, request):
+        """Stream a ZIP of patient reports selected by ?ward=, ?doctor= or ?patients=1,2,3"""
+        from django.http import StreamingHttpResponse
+        import datetime
+
+        ward = request.query_params.get('ward')
+        doctor_id = request.query_params.get('doctor')
+        patient_ids = request.query_params.get('patients')
+        if not (ward or doctor_id or patient_ids):
+            return Response({'error': 'Provide ward, doctor or patients parameter'}, status=400)
+
+        patients = patients_visible_to(request.user)
+        try:
+            if ward:
+                patients = patients.filter(assigned_bed__ward=ward)
+            if doctor_id:
+                patients = patients.filter(assigned_doctor_id=int(doctor_id))
+            if patient_ids:
+                patients = patients.filter(id__in=[int(pk) for pk in patient_ids.split(',') if pk.strip()])
+        except ValueError:
+            return Response({'error': 'doctor and patients must be numeric ids'}, status=400)
+
+        patients = patients.order_by('id').prefetch_related('medicines', 'diagnoses')
+        generated_by = request.user.get_full_name() or request.user.username
+
+        response = StreamingHttpResponse(
+            self.stream_bundle(patients, generated_by), content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="patient_reports_{datetime.date.today()}.zip"'
+        return response
+
+    def stream_bundle(self, patients, generated_by):
+        import zipfile
+
+        stream = self._ZipStream()
+        # PDFs are already compressed; storing them keeps the export CPU-light
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as bundle:
+            # iterator(chunk_size) runs the prefetches once per chunk, so memory
+            # and query count per chunk stay fixed however many patients match
+            for patient in patients.iterator(chunk_size=self.chunk_size):
+                medicines = list(patient.medicines.all())
+                diagnoses = list(patient.diagnoses.all())
+                fingerprint = reports.report_fingerprint(patient, medicines, diagnoses, generated_by)
+                pdf_file = reports.open_cached_report(patient.id, generated_by, fingerprint)
+                if pdf_file is None:
+                    context = reports.report_context(patient, medicines, diagnoses, generated_by)
+                    # Already streaming, so wait for a worker rather than rejecting
+                    pdf_file = reports.store_report(
+                        patient.id, generated_by, fingerprint,
+                        lambda tmp_path: pdf_pool.render(
+                            reports.render_patient_report, tmp_path, context, reject_when_full=False
+                        ),
+                    )
+                safe_name = ''.join(c if c.isalnum() else '_' for c in patient.name)
+                with pdf_file:
+                    bundle.writestr(f'patient_{patient.id}_{safe_name}.pdf', pdf_file.read())
+                yield stream.drain()
+        yield stream.drain()
+
 # Simple test PDF endpoint
 class TestPDFView(APIView):
     permission_classes = [IsAuthenticated]
@@ -526,27 +996,27 @@ class TestPDFView(APIView):
     def get(self, request):
         """Generate a simple test PDF"""
         try:
-            from reportlab.lib.pagesizes import A4
-            from reportlab.platypus import SimpleDocTemplate, Paragraph
-            from reportlab.lib.styles import getSampleStyleSheet
-            from django.http import HttpResponse
+            from django.http import FileResponse
             import datetime
+            import os
+            import tempfile
             
-            response = HttpResponse(content_type='application/pdf')
-            response['Content-Disposition'] = f'inline; filename="test_pdf_{datetime.date.today()}.pdf"'
-            
-            doc = SimpleDocTemplate(response, pagesize=A4)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            story.append(Paragraph("Test PDF Generation", styles['Title']))
-            story.append(Paragraph("This is a test PDF to verify the functionality is working.", styles['Normal']))
-            story.append(Paragraph(f"Generated at: {datetime.datetime.now()}", styles['Normal']))
-            story.append(Paragraph(f"User: {request.user.username}", styles['Normal']))
+            # The worker renders into a temp file; it is unlinked right away and
+            # streamed from the open handle
+            fd, path = tempfile.mkstemp(suffix='.pdf')
+            os.close(fd)
+            try:
+                pdf_pool.render(reports.render_test_pdf, path, request.user.username)
+                pdf_file = open(path, 'rb')
+            finally:
+                os.unlink(path)
             
-            doc.build(story)
+            response = FileResponse(pdf_file, content_type='application/pdf')
+            response['Content-Disposition'] = f'inline; filename="test_pdf_{datetime.date.today()}.pdf"'
             return response
             
+        except pdf_pool.RenderQueueFull:
+            return pdf_busy_response()
         except Exception as e:
             import traceback
             print(f"Test PDF Error: {str(e)}")
@@ -3,6 +3,9 @@ ASGI config for bms_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live event stream at /api/live/ is served by both applications; here an
+open stream does not hold a thread between polls (see api/live.py).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -83,8 +85,24 @@ WSGI_APPLICATION = 'my_project.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # Django's sqlite3 backend plus WAL/PRAGMA setup on connect and
+        # BEGIN IMMEDIATE transactions (api/sqlite_backend/base.py)
+        'ENGINE': 'api.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep each worker's connection open across requests instead of
+        # reconnecting (and re-running the PRAGMAs) every time
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'cache_size': -20000,  # KiB
+                'mmap_size': 268435456,
+                'busy_timeout': 5000,  # ms a writer waits for the lock
+            },
+        },
     }
 }
 
@@ -142,6 +160,10 @@ REST_FRAMEWORK = {
         'api.authentication.CustomJWTAuthentication', 
         'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
     ),
+    # Cursor pagination is opt-in per request (?page_size= or ?cursor=), so
+    # clients that expect a bare list keep working.
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CompatCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -162,6 +184,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
+# The live event stream resumes with Last-Event-ID and backs off on Retry-After
+CORS_ALLOW_HEADERS = (*default_headers, 'last-event-id')
+CORS_EXPOSE_HEADERS = ['Retry-After', 'ETag']
 
 
 import os
@@ -174,4 +199,65 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 CSRF_TRUSTED_ORIGINS = [
     'https://api.themahadeva.live',
     'https://themahadeva.live'
-]
\ No newline at end of file
+]
+# Rendered patient PDF reports, keyed by a fingerprint of the printed rows
+PDF_REPORT_CACHE_DIR = os.path.join(BASE_DIR, 'report_cache')
+
+# PDF rendering process pool (api/pdf_pool.py). Set PDF_RENDER_WORKERS = 0 to
+# render inside the request process.
+PDF_RENDER_WORKERS = 2
+# Renders queued or running per web worker before answering 503
+PDF_RENDER_MAX_QUEUE = 8
+PDF_RENDER_TIMEOUT = 30
+PDF_RENDER_RETRY_AFTER = 5
+
+# Audit log (api/audit.py): events are queued on commit and written in
+# batches by a background thread.
+AUDIT_LOG_ASYNC = True
+AUDIT_LOG_BATCH_SIZE = 200
+AUDIT_LOG_FLUSH_INTERVAL = 1.0
+AUDIT_LOG_QUEUE_SIZE = 10000
+
+# Appointment slots offered by /api/doctor-availability/slots/
+APPOINTMENT_DAY_START = '09:00'
+APPOINTMENT_DAY_END = '17:00'
+APPOINTMENT_SLOT_MINUTES = 30
+
+# request.user is checked against the full CustomUser row (api/authentication.py),
+# served from a per-process LRU cache. The timeout is how long another worker
+# may keep serving a user deactivated or given a new role elsewhere.
+JWT_USER_CACHE_SIZE = 1024
+JWT_USER_CACHE_TIMEOUT = 60
+
+# Live events over Server-Sent Events at /api/live/ (api/live.py): each stream
+# polls the change log every LIVE_EVENTS_POLL_INTERVAL seconds, reading up to
+# LIVE_EVENTS_BATCH entries; streams end after LIVE_EVENTS_MAX_AGE seconds and
+# clients reconnect; keep-alive comments go out every LIVE_EVENTS_HEARTBEAT
+# seconds. Under WSGI a stream holds a worker thread, so each process serves
+# at most LIVE_EVENTS_WSGI_STREAMS (run gunicorn with more --threads than that)
+LIVE_EVENTS_POLL_INTERVAL = 1
+LIVE_EVENTS_BATCH = 500
+LIVE_EVENTS_HEARTBEAT = 15
+LIVE_EVENTS_MAX_AGE = 300
+LIVE_EVENTS_WSGI_STREAMS = 4
+
+# Largest batch accepted by the /bulk/ endpoints (api/bulk.py)
+BULK_MAX_ITEMS = 500
+
+# Endpoint benchmarks (api/benchmarks.py), run by EndpointBenchmarkTests only
+# when RUN_BENCHMARKS=1 is set. Sizes are patient counts; the other tables grow
+# with them. The first run writes BENCHMARK_BASELINE; later runs write
+# BENCHMARK_RESULTS and fail when a route issues more queries than the
+# baseline. Latency (p95 and median) or peak memory growing by more than
+# BENCHMARK_TOLERANCE (1.0 = doubles) and the floor is reported, and only
+# fails the run with BENCHMARK_GATE_TIMINGS. Results live in BENCHMARK_DIR
+# (git-ignored), which depends on the machine that records them.
+BENCHMARK_SIZES = (100, 1000)
+BENCHMARK_REPEAT = 20
+BENCHMARK_TOLERANCE = 1.0
+BENCHMARK_LATENCY_FLOOR_MS = 10
+BENCHMARK_MEMORY_FLOOR_KB = 256
+BENCHMARK_GATE_TIMINGS = os.environ.get('BENCHMARK_GATE_TIMINGS') == '1'
+BENCHMARK_DIR = os.environ.get('BENCHMARK_DIR', os.path.join(BASE_DIR, 'benchmarks'))
+BENCHMARK_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+BENCHMARK_RESULTS = os.path.join(BENCHMARK_DIR, 'latest.json')
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import './beds.css';
-import { bedsAPI, patientsAPI, doctorsAPI } from '../../services/api';
+import { bedsAPI, patientsAPI, doctorsAPI, liveAPI } from '../../services/api';
 
 const initialBedsData = [];
 
@@ -311,11 +311,23 @@ export default function BedsDashboard() {
 
   useEffect(() => {
     fetchBeds();
+    // Reload quietly when beds change elsewhere; bursts (transfers, imports)
+    // arrive together, so wait a moment and reload once
+    let reload = null;
+    const unsubscribe = liveAPI.subscribe((kind) => {
+      if (kind !== 'bed') return;
+      clearTimeout(reload);
+      reload = setTimeout(() => fetchBeds({ quiet: true }), 500);
+    });
+    return () => {
+      clearTimeout(reload);
+      unsubscribe();
+    };
   }, []);
 
-  const fetchBeds = async () => {
+  const fetchBeds = async ({ quiet = false } = {}) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       const bedsData = await bedsAPI.getAll();
       
       // Group beds by ward
@@ -1,8 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import "./ReceptionistDashboard.css";
-import { patientsAPI, doctorsAPI, bedsAPI, appointmentsAPI } from "../../services/api";
-import { getTodayString } from "../../utils/dateUtils";
+import { dashboardAPI } from "../../services/api";
 
 function ReceptionistDashboard() {
   const navigate = useNavigate();
@@ -12,9 +11,11 @@ function ReceptionistDashboard() {
     occupiedBeds: 0,
     totalBeds: 0,
     todayAppointments: 0,
-    allAppointments: 0
+    upcomingAppointments: 0
   });
   const [beds, setBeds] = useState([]);
+  // Beds per ward; the summary only sends the first tiles of each ward
+  const [wardTotals, setWardTotals] = useState({});
   const [appointments, setAppointments] = useState({
     today: [],
     all: [] // Changed from tomorrow to all
@@ -30,49 +31,19 @@ function ReceptionistDashboard() {
       setLoading(true);
       console.log('Fetching receptionist dashboard data...');
       
-      const [patientsData, doctorsData, bedsData, appointmentsData] = await Promise.all([
-        patientsAPI.getAll(),
-        doctorsAPI.getAll(), 
-        bedsAPI.getAll(),
-        appointmentsAPI.getAll()
-      ]);
-
-      console.log('Receptionist dashboard data:', {
-        patients: patientsData?.length || 0,
-        doctors: doctorsData?.length || 0,
-        beds: bedsData?.length || 0, 
-        appointments: appointmentsData?.length || 0
-      });
+      // One aggregated request instead of four full-table downloads
+      const summary = await dashboardAPI.getReceptionistSummary();
 
-      // Calculate bed stats
-      const totalBeds = bedsData.length;
-      const occupiedBeds = bedsData.filter(bed => bed.is_occupied).length;
-      
-      // Get all non-cancelled appointments and sort by date
-      // Use consistent date format across all components
-      const todayStr = getTodayString();
-      
-      const allAppointmentsList = appointmentsData
-        .sort((a, b) => {
-          // Sort by date first, then by time
-          if (a.appointment_date === b.appointment_date) {
-            return a.appointment_time.localeCompare(b.appointment_time);
-          }
-          return a.appointment_date.localeCompare(b.appointment_date);
-        });
-      
-      const todayAppointmentsList = appointmentsData.filter(app => 
-        app.appointment_date === todayStr && app.status !== 'cancelled'
-      );
+      console.log('Receptionist dashboard summary:', summary);
 
-      // Set all appointments for detailed display
+      // Show upcoming appointments, today's non-cancelled ones first
       setAppointments({
-        today: todayAppointmentsList,
-        all: allAppointmentsList // Show all appointments instead of just tomorrow
+        today: summary.appointments.today,
+        all: summary.appointments.upcoming
       });
 
-      // Group beds by ward for display
-      const wardBeds = bedsData.reduce((acc, bed) => {
+      // Group bed tiles by ward for display
+      const wardBeds = summary.beds.tiles.reduce((acc, bed) => {
         const ward = bed.ward || 'Ward A'; // Default ward if not specified
         if (!acc[ward]) acc[ward] = [];
         acc[ward].push(bed);
@@ -80,15 +51,16 @@ function ReceptionistDashboard() {
       }, {});
 
       setStats({
-        totalPatients: patientsData.length,
-        availableDoctors: doctorsData.length,
-        occupiedBeds,
-        totalBeds,
-        todayAppointments: todayAppointmentsList.length,
-        allAppointments: appointmentsData.length // Show total count including cancelled
+        totalPatients: summary.patients.total,
+        availableDoctors: summary.doctors.length,
+        occupiedBeds: summary.beds.occupied,
+        totalBeds: summary.beds.total,
+        todayAppointments: summary.appointments.today_count,
+        upcomingAppointments: summary.appointments.upcoming_count // From today on; the list holds the first ones
       });
 
       setBeds(wardBeds);
+      setWardTotals(Object.fromEntries(summary.beds.by_ward.map(ward => [ward.ward, ward.total])));
       
     } catch (error) {
       console.error("Error fetching dashboard data:", error);
@@ -160,6 +132,11 @@ function ReceptionistDashboard() {
                         {bed.bed_number}
                       </span>
                     ))}
+                    {wardTotals[wardName] > wardBeds.length && (
+                      <span className="bed more" onClick={() => navigate("/beds")}>
+                        +{wardTotals[wardName] - wardBeds.length} more
+                      </span>
+                    )}
                   </div>
                 </div>
               ))}
@@ -208,7 +185,10 @@ function ReceptionistDashboard() {
               </div>
             )}
 
-            <h4>All Appointments ({appointments.all.length} total)</h4>
+            <h4>
+              Upcoming Appointments ({stats.upcomingAppointments})
+              {appointments.all.length < stats.upcomingAppointments && ` - showing the first ${appointments.all.length}`}
+            </h4>
             {loading ? (
               <p>Loading appointments...</p>
             ) : appointments.all.length > 0 ? (
@@ -120,6 +120,25 @@ export const patientsAPI = {
     return handleResponse(response);
   },
 
+  // One request for a whole list; errors come back per item index
+  bulkCreate: async (items) => {
+    const response = await fetch(`${API_BASE_URL}/patients/bulk/`, {
+      method: 'POST',
+      headers: getAuthHeaders(),
+      body: JSON.stringify(items),
+    });
+    return handleResponse(response);
+  },
+
+  bulkUpdate: async (items) => {
+    const response = await fetch(`${API_BASE_URL}/patients/bulk/`, {
+      method: 'PATCH',
+      headers: getAuthHeaders(),
+      body: JSON.stringify(items),
+    });
+    return handleResponse(response);
+  },
+
   delete: async (id) => {
     const response = await fetch(`${API_BASE_URL}/patients/${id}/`, {
       method: 'DELETE',
@@ -196,6 +215,14 @@ export const doctorsAPI = {
       headers: getAuthHeaders(),
     });
     return handleResponse(response);
+  },
+
+  // Doctors working on the given date (YYYY-MM-DD), filtered by the backend
+  getAvailableOn: async (date) => {
+    const response = await fetch(`${API_BASE_URL}/doctors/?available_on=${date}`, {
+      headers: getAuthHeaders(),
+    });
+    return handleResponse(response);
   }
 };
 
@@ -226,6 +253,25 @@ export const bedsAPI = {
     return handleResponse(response);
   },
 
+  // One request for a whole list; errors come back per item index
+  bulkCreate: async (items) => {
+    const response = await fetch(`${API_BASE_URL}/beds/bulk/`, {
+      method: 'POST',
+      headers: getAuthHeaders(),
+      body: JSON.stringify(items),
+    });
+    return handleResponse(response);
+  },
+
+  bulkUpdate: async (items) => {
+    const response = await fetch(`${API_BASE_URL}/beds/bulk/`, {
+      method: 'PATCH',
+      headers: getAuthHeaders(),
+      body: JSON.stringify(items),
+    });
+    return handleResponse(response);
+  },
+
   delete: async (id) => {
     const response = await fetch(`${API_BASE_URL}/beds/${id}/`, {
       method: 'DELETE',
@@ -319,6 +365,25 @@ export const medicinesAPI = {
     return handleResponse(response);
   },
 
+  // One request for a whole list; errors come back per item index
+  bulkCreate: async (items) => {
+    const response = await fetch(`${API_BASE_URL}/medicines/bulk/`, {
+      method: 'POST',
+      headers: getAuthHeaders(),
+      body: JSON.stringify(items),
+    });
+    return handleResponse(response);
+  },
+
+  bulkUpdate: async (items) => {
+    const response = await fetch(`${API_BASE_URL}/medicines/bulk/`, {
+      method: 'PATCH',
+      headers: getAuthHeaders(),
+      body: JSON.stringify(items),
+    });
+    return handleResponse(response);
+  },
+
   delete: async (id) => {
     const response = await fetch(`${API_BASE_URL}/medicines/${id}/`, {
       method: 'DELETE',
@@ -337,6 +402,15 @@ export const medicinesAPI = {
     return handleResponse(response);
   },
 
+  getWardRound: async (ward, date) => {
+    const params = new URLSearchParams({ ward });
+    if (date) params.append('date', date);
+    const response = await fetch(`${API_BASE_URL}/medication-rounds/?${params}`, {
+      headers: getAuthHeaders(),
+    });
+    return handleResponse(response);
+  },
+
   getByPatient: async (patientId) => {
     console.log(`Fetching medicines for patient ID: ${patientId}`);
     console.log(`API URL: ${API_BASE_URL}/medicines/?patient=${patientId}`);
@@ -483,6 +557,130 @@ export const reportsAPI = {
   }
 };
 
+// Dashboard API
+export const dashboardAPI = {
+  getReceptionistSummary: async () => {
+    const response = await fetch(`${API_BASE_URL}/dashboard/receptionist/`, {
+      headers: getAuthHeaders(),
+    });
+    return handleResponse(response);
+  }
+};
+
+export const searchAPI = {
+  search: async (query, { kind, page } = {}) => {
+    const params = new URLSearchParams({ q: query });
+    if (kind) params.append('kind', kind);
+    if (page) params.append('page', page);
+    const response = await fetch(`${API_BASE_URL}/search/?${params}`, {
+      headers: getAuthHeaders(),
+    });
+    return handleResponse(response);
+  }
+};
+
+// Live bed, patient and appointment events (Server-Sent Events). Read with
+// fetch so the Bearer token can be sent; reconnects when the server ends the
+// stream, resuming after the last event seen, and waits as long as the server
+// asks when it is busy. Returns a function that stops listening.
+export const liveAPI = {
+  subscribe: (onEvent, { retryMs = 3000 } = {}) => {
+    const controller = new AbortController();
+    let lastEventId = null;
+
+    const dispatch = (block) => {
+      let kind = 'message';
+      const data = [];
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) kind = line.slice(7);
+        else if (line.startsWith('data: ')) data.push(line.slice(6));
+        else if (line.startsWith('id: ')) lastEventId = line.slice(4);
+      }
+      if (data.length) onEvent(kind, JSON.parse(data.join('\n')));
+    };
+
+    const connect = async () => {
+      while (!controller.signal.aborted) {
+        let waitMs = retryMs;
+        try {
+          const headers = getAuthHeaders();
+          if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+          const response = await fetch(`${API_BASE_URL}/live/`, {
+            headers,
+            signal: controller.signal,
+          });
+          if (response.status === 401) {
+            await handleResponse(response);
+            return;
+          }
+          const retryAfter = Number(response.headers.get('Retry-After'));
+          if (retryAfter) waitMs = retryAfter * 1000;
+          if (response.ok) {
+            const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+            let buffer = '';
+            for (;;) {
+              const { value, done } = await reader.read();
+              if (done) break;
+              buffer += value;
+              const blocks = buffer.split('\n\n');
+              buffer = blocks.pop();
+              blocks.forEach(dispatch);
+            }
+          }
+        } catch (error) {
+          if (controller.signal.aborted) return;
+          console.error('Live events error:', error);
+        }
+        await new Promise((resolve) => setTimeout(resolve, waitMs));
+      }
+    };
+
+    connect();
+    return () => controller.abort();
+  }
+};
+
+// CSV import of beds, doctors or patients (multipart upload). After a failed
+// upload, pass the returned committed_rows as skip to resume.
+export const importsAPI = {
+  upload: async (kind, file, { skip = 0 } = {}) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    // Let the browser set the multipart boundary
+    const { 'Content-Type': _, ...headers } = getAuthHeaders();
+    const response = await fetch(`${API_BASE_URL}/imports/${kind}/?skip=${skip}`, {
+      method: 'POST',
+      headers,
+      body: formData,
+    });
+    return handleResponse(response);
+  }
+};
+
+// Patients, appointments or prescriptions as CSV / NDJSON, e.g.
+// exportsAPI.download('appointments', { start: '2025-01-01', end: '2025-02-01' })
+export const exportsAPI = {
+  download: async (kind, { output = 'csv', ...filters } = {}) => {
+    const params = new URLSearchParams({ output, ...filters });
+    const response = await fetch(`${API_BASE_URL}/exports/${kind}/?${params}`, {
+      headers: getAuthHeaders(),
+    });
+    if (!response.ok) {
+      return handleResponse(response);
+    }
+    const blob = await response.blob();
+    const url = window.URL.createObjectURL(blob);
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = `${kind}_${new Date().toISOString().split('T')[0]}.${output}`;
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+    window.URL.revokeObjectURL(url);
+    return true;
+  }
+};
+
 export default {
   authAPI,
   patientsAPI,
@@ -491,5 +689,10 @@ export default {
   appointmentsAPI,
   medicinesAPI,
   diagnosesAPI,
-  reportsAPI
+  reportsAPI,
+  dashboardAPI,
+  searchAPI,
+  liveAPI,
+  importsAPI,
+  exportsAPI
 };
\ No newline at end of file